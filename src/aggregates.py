@@ -0,0 +1,149 @@
+import numpy as np
+import pandas as pd
+
+from filter import filter_second
+from dictionary import DICTIONARY
+from engine import get_engine
+
+# additive statistics kept per (year, genres, networks); every metric of the 2nd hypothesis
+# (aka. hipotheses_silvio) can be rebuilt from sums of these columns
+STATS = ['count', 'popularity', 'vote_count', 'average']
+
+# metric name -> (column of the result table, plot title, x label, y label)
+METRICS = {
+    'frequent': ('count', "Most frequent genres by network", "Network and genre", "Average frequency"),
+    'popular': ('popularity_log', "Most popular genres by network", "Networks and genres", "Popularity"),
+    'voted': ('final_average', "Most voted genres by network", "Networks and genres", "Vote average"),
+}
+
+def yearly_aggregates(data : pd.DataFrame=None) -> pd.DataFrame:
+    """
+    Sums the statistics of the 2nd hypothesis per first air year, genre and network.
+
+    Parameters
+    ----------
+    data : pandas.DataFrame, default None
+        Exploded rows as returned by filter_second. When None, filter_second(0) is used, which
+        keeps every valid show of every year.
+
+    Returns
+    -------
+    pandas.DataFrame
+        One row per (year, genres, networks) with the columns in STATS: the number of exploded
+        rows, the sum of popularity, the sum of vote_count and the sum of vote_count * vote_average.
+        Being plain sums, the rows of any set of years can be added (or subtracted) freely.
+
+    Examples
+    --------
+    >>> yearly_aggregates()
+           year       genres      networks  count  popularity  vote_count   average
+    0      1950       Comedy           CBS      2      10.383          12    96.200
+    ...
+    """
+    if data is None:
+        data = filter_second(0)
+
+    # grouped over the dictionary codes of the genres and networks, decoded once summed; the year
+    # is parsed once per distinct date
+    engine = get_engine()
+    dates, uniques = engine.factorize(data['first_air_date'])
+    frame = pd.DataFrame({
+        'year': engine.years(uniques)[dates],
+        'genres': DICTIONARY.encode(data['genres']),
+        'networks': DICTIONARY.encode(data['networks']),
+        'count': 1,
+        'popularity': data['popularity'].to_numpy(),
+        'vote_count': data['vote_count'].to_numpy(),
+        'average': (data['vote_count'] * data['vote_average']).to_numpy(),
+    })
+    frame = frame[(frame['genres'] >= 0) & (frame['networks'] >= 0)]
+    summed = engine.group_sum(frame, ['year', 'genres', 'networks'], STATS)
+    ranks = DICTIONARY.ranks()
+    summed = summed.iloc[np.lexsort((ranks[summed['networks']], ranks[summed['genres']], summed['year']))]
+    summed['genres'] = DICTIONARY.decode(summed['genres'])
+    summed['networks'] = DICTIONARY.decode(summed['networks'])
+    return summed.reset_index(drop=True)
+
+def best_genres(pairs : pd.DataFrame, metric : str) -> pd.DataFrame:
+    """
+    Picks the best genre of every network from summed (genres, networks) statistics.
+
+    Parameters
+    ----------
+    pairs : pandas.DataFrame
+        One row per (genres, networks) with the columns in STATS, already summed over the
+        wanted years.
+    metric : str
+        One of the keys of METRICS: 'frequent', 'popular' or 'voted'.
+
+    Returns
+    -------
+    pandas.DataFrame
+        One row per network with the columns 'networks', 'genres', the metric column and 'shows',
+        the number of (exploded) shows of the network that filter_second compares to shows_minimum.
+
+    Raises
+    ------
+    ValueError:
+        When metric isn't one of the keys of METRICS.
+    """
+    if metric not in METRICS:
+        raise ValueError(f"metric must be one of {list(METRICS)}")
+    column = METRICS[metric][0]
+
+    pairs = pairs[pairs['count'] > 0]
+    # the networks are grouped by the alphabetical rank of their codes, and the pairs sorted like the
+    # groupby of the original functions, so ties are broken the same way
+    ranks = DICTIONARY.ranks()
+    genres = ranks[DICTIONARY.encode(pairs['genres'])]
+    networks = ranks[DICTIONARY.encode(pairs['networks'])]
+    order = np.lexsort((networks, genres))
+    pairs = pairs.iloc[order].reset_index(drop=True)
+    networks = networks[order]
+    pairs['shows'] = pairs.groupby(networks)['count'].transform('sum')
+
+    if metric == 'frequent':
+        pairs['count'] = pairs['count'].astype(int)
+    elif metric == 'popular':
+        pairs['popularity_log'] = np.log(pairs['popularity'] / pairs['count'])
+    else:
+        pairs['final_average'] = pairs['average'] / pairs['vote_count']
+
+    best = pairs.loc[pairs.groupby(networks)[column].idxmax()]
+    return best[['networks', 'genres', column, 'shows']].reset_index(drop=True)
+
+def top_genres(pairs : pd.DataFrame, metric : str, top_n : int, shows_minimum : int=0) -> pd.DataFrame:
+    """
+    Builds the table plotted by the most_*_genre functions from summed (genres, networks) statistics.
+
+    Parameters
+    ----------
+    pairs : pandas.DataFrame
+        One row per (genres, networks) with the columns in STATS, already summed over the
+        wanted years.
+    metric : str
+        One of the keys of METRICS: 'frequent', 'popular' or 'voted'.
+    top_n : int
+        Keeps just the first top_n networks.
+    shows_minimum : int, default 0
+        Keeps just the networks with more than this number of (exploded) shows, as filter_second does.
+
+    Returns
+    -------
+    pandas.DataFrame
+        Indexed by 'for_plot' ("network: (genre)") with the metric column, sorted in descending
+        order. Empty when no network is left.
+
+    Raises
+    ------
+    ValueError:
+        When metric isn't one of the keys of METRICS.
+    """
+    best = best_genres(pairs, metric)
+    column = METRICS[metric][0]
+
+    top_data = best[best['shows'] > shows_minimum]
+    top_data = top_data.sort_values(column, ascending=False).head(top_n)
+    # the labels are built just for the rows shown
+    top_data = top_data.assign(for_plot=top_data['networks'] + ": (" + top_data['genres'] + ")")
+    return top_data[['for_plot', column]].set_index('for_plot')
@@ -0,0 +1,262 @@
+import concurrent.futures
+import json
+import pandas as pd
+
+import filter as flt
+import silvio_hypothesis as sv
+import dilmar_hypothesis as dm
+import leonardo_hypothesis as ln
+from aggregates import METRICS
+from warm import Warm
+from sinks import Sink, open_sink
+from results import ResultsStore, fingerprint
+
+# hypothesis -> its parameters and their defaults (None meaning required)
+JOBS = {
+    'leonardo': {'num_bins': 5, 'votes_minimum': 0, 'resamples': 0},
+    'frequent': {'top_n': None, 'shows_minimum': 0, 'years': [0, 9999]},
+    'popular': {'top_n': None, 'shows_minimum': 0, 'years': [0, 9999]},
+    'voted': {'top_n': None, 'shows_minimum': 0, 'years': [0, 9999]},
+    'dilmar': {'shows_minimum': None, 'votes_minimum': None, 'resamples': 0},
+}
+
+# the analyses that main.py used to run
+DEFAULT_JOBS = [{'hypothesis': 'leonardo', 'num_bins': 20, 'votes_minimum': 0}] + [
+    {'hypothesis': metric, 'top_n': 10, 'shows_minimum': 100, 'years': years}
+    for years in [[0, 9999], [2022, 2023], [2023, 2024]] for metric in ['frequent', 'popular', 'voted']
+] + [{'hypothesis': 'dilmar', 'shows_minimum': 10, 'votes_minimum': 100}]
+
+# estimated seconds of each stage over the real dataset (about 57000 rows), from benchmark.py;
+# the computations grow with the number of rows, the charts don't
+REFERENCE_ROWS = 57000
+COSTS = {
+    'yearly_aggregates': 0.5,
+    'genre_table': 0.02,
+    'dilmar_bins': 0.06,
+    'analysis_bins': 0.12,
+    'plot_bar': 0.5,
+    'plot_bins': 2.0,
+    'plot_charts': 2.8,
+}
+CHARTS = ['plot_bar', 'plot_bins', 'plot_charts']
+
+def read_jobs(path : str) -> list[dict]:
+    """
+    Reads a job file: a list of jobs, or a mapping with the key 'jobs' holding it, as JSON or,
+    when the file ends in .yaml or .yml, as YAML (which needs PyYAML).
+
+    Every job is a mapping with the key 'hypothesis' (one of the keys of JOBS), the parameters of
+    the hypothesis and, optionally, 'output': a subfolder of the output folder for its charts.
+
+    Examples
+    --------
+    >>> read_jobs("jobs.yaml")
+    [{'hypothesis': 'voted', 'top_n': 10, 'shows_minimum': 100, 'years': [2022, 2023]}]
+
+    With jobs.yaml holding:
+
+        jobs:
+          - {hypothesis: voted, top_n: 10, shows_minimum: 100, years: [2022, 2023]}
+    """
+    with open(path) as file:
+        if path.endswith(('.yaml', '.yml')):
+            import yaml
+            jobs = yaml.safe_load(file)
+        else:
+            jobs = json.load(file)
+    if isinstance(jobs, dict):
+        jobs = jobs.get('jobs')
+    if not isinstance(jobs, list):
+        raise ValueError("a job file must hold a list of jobs")
+    return jobs
+
+def normalize(job : dict) -> dict:
+    """
+    Checks a job and fills in the default values of its parameters.
+
+    Raises
+    ------
+    TypeError:
+        When the job isn't a mapping or a parameter has the wrong type.
+    ValueError:
+        When the hypothesis or a parameter is unknown, or a required one is missing.
+    """
+    if not isinstance(job, dict):
+        raise TypeError("every job must be a mapping")
+    job = dict(job)
+    hypothesis = job.pop('hypothesis', None)
+    if hypothesis not in JOBS:
+        raise ValueError(f"hypothesis must be one of {list(JOBS)}, not {hypothesis!r}")
+    normalized = {'hypothesis': hypothesis, 'output': job.pop('output', '')}
+    for parameter, default in JOBS[hypothesis].items():
+        value = job.pop(parameter, default)
+        if value is None:
+            raise ValueError(f"{hypothesis} jobs need the parameter {parameter}")
+        if parameter == 'years':
+            if not isinstance(value, list) or len(value) != 2 or not all(isinstance(year, int) for year in value):
+                raise TypeError("years must be a list of two integers")
+            if value[0] > value[1]:
+                raise ValueError("the first element of years must be less or equal the second")
+        elif not isinstance(value, int):
+            raise TypeError(f"{parameter} must be an integer")
+        normalized[parameter] = value
+    if job:
+        raise ValueError(f"unknown parameters {sorted(job)} for {hypothesis}")
+    return normalized
+
+def _key(job : dict) -> tuple:
+    # hashable form of a normalized job
+    return tuple((key, tuple(value) if isinstance(value, list) else value) for key, value in job.items())
+
+def _files(job : dict) -> tuple:
+    # identifies the charts a job writes; jobs with the same one would overwrite each other
+    if job['hypothesis'] in METRICS:
+        return job['output'], job['hypothesis'], tuple(job['years'])
+    return job['output'], job['hypothesis']
+
+def _describe(job : dict) -> str:
+    return job['hypothesis'] + "(" + ", ".join(f"{key}={value}" for key, value in job.items()
+                                               if key not in ['hypothesis', 'output']) + ")"
+
+def _unique(jobs : list[dict]) -> list[dict]:
+    # normalized jobs without repetitions, in the order they first appear
+    unique, writers = {}, {}
+    for job in map(normalize, jobs):
+        key = _key(job)
+        if key in unique:
+            continue
+        other = writers.setdefault(_files(job), job)
+        if other is not job:
+            raise ValueError(f"{_describe(other)} and {_describe(job)} write the same charts, "
+                             "give one of them another 'output' folder")
+        unique[key] = job
+    return list(unique.values())
+
+def plan(jobs : list[dict], data : pd.DataFrame=None) -> pd.DataFrame:
+    """
+    Plans a batch of jobs: repeated jobs run once and every genre job (frequent, popular and voted)
+    shares the same per year aggregates, which are built just once.
+
+    Parameters
+    ----------
+    jobs : list[dict]
+        As returned by read_jobs.
+    data : pandas.DataFrame, default None
+        The table the jobs would run on. When None, the dataset of the data folder.
+
+    Returns
+    -------
+    pandas.DataFrame
+        One row per stage, in the order they run, with the columns 'stage', 'job' (empty for shared
+        stages) and 'estimated_seconds', from COSTS scaled to the size of the loaded dataset.
+
+    Raises
+    ------
+    TypeError, ValueError:
+        When a job is invalid, see normalize, or two jobs would write the same charts.
+
+    Examples
+    --------
+    >>> plan(DEFAULT_JOBS)
+                    stage                                                    job  estimated_seconds
+    0   yearly_aggregates                                                                      0.50
+    1       analysis_bins                          leonardo(num_bins=20, votes_minimum=0)      0.12
+    ...
+    """
+    unique = _unique(jobs)
+    scale = len(flt.raw_file if data is None else data) / REFERENCE_ROWS
+    rows = []
+    if any(job['hypothesis'] in METRICS for job in unique):
+        rows.append(('yearly_aggregates', ''))
+    stages = {'leonardo': ['analysis_bins', 'plot_charts'], 'dilmar': ['dilmar_bins', 'plot_bins']}
+    for job in unique:
+        for stage in stages.get(job['hypothesis'], ['genre_table', 'plot_bar']):
+            rows.append((stage, _describe(job)))
+
+    table = pd.DataFrame(rows, columns=['stage', 'job'])
+    table['estimated_seconds'] = [COSTS[stage] * (1 if stage in CHARTS else scale) for stage in table['stage']]
+    return table
+
+def _compute(job : dict, warm : Warm, data : pd.DataFrame):
+    # the data of a job, computed in the worker threads
+    if job['hypothesis'] == 'leonardo':
+        return ln.analysis_bins(job['num_bins'], job['votes_minimum'], data)
+    if job['hypothesis'] == 'dilmar':
+        return dm.dilmar_bins(job['shows_minimum'], job['votes_minimum'], data, job['resamples'])
+    return warm.genre_table(job['hypothesis'], job['top_n'], job['shows_minimum'], tuple(job['years']))
+
+def _render(job : dict, result, sink : Sink) -> pd.DataFrame:
+    # the charts of a job, drawn in the calling thread as pyplot isn't thread safe; returns the
+    # result table of the job
+    if job['hypothesis'] == 'leonardo':
+        table = ln.display_analysis(result)
+        ln.plot_charts(result, sink, job['resamples'])
+        return table
+    if job['hypothesis'] == 'dilmar':
+        print(result[0])
+        dm.plot_bins(*result, sink)
+        return result[0]
+    _, title, x_axis, y_axis = METRICS[job['hypothesis']]
+    if job['years'] != [0, 9999]:
+        title = title + ", from " + str(job['years'][0]) + " to " + str(job['years'][1])
+    sv.plot_bar(result, title, x_axis, y_axis, file=sink)
+    return result
+
+def run_jobs(jobs : list[dict], output_dir : str="./output", workers : int=4, data : pd.DataFrame=None,
+             results : str=None) -> list:
+    """
+    Runs a batch of jobs as planned by plan, computing independent jobs in parallel threads and
+    drawing their charts in the output folder.
+
+    Parameters
+    ----------
+    jobs : list[dict]
+        As returned by read_jobs.
+    output_dir : str, default "./output"
+        Folder of the charts, created when missing. Jobs with an 'output' write to that subfolder.
+        When it ends in .pdf, .zip, .tar, .tar.gz or .tgz, all the charts are written to that single
+        file instead, see sinks.open_sink.
+    workers : int, default 4
+        Number of threads computing the jobs.
+    data : pandas.DataFrame, default None
+        The table analysed, with the columns of the TMDB dataset. When None, the dataset of the
+        data folder is used.
+    results : str or ResultsStore, default None
+        When given, the result table of every job (the table of a genre job, the table of
+        dilmar_bins or the sorted shows of display_analysis) is written to this results store, named
+        after the hypothesis and tagged with the parameters of the job and the fingerprint of data.
+
+    Returns
+    -------
+    list
+        The data of every (unique) job, in order: the table of a genre job, the (table, intervals)
+        of dilmar_bins or the categorized shows of analysis_bins.
+
+    Raises
+    ------
+    TypeError, ValueError:
+        When a job is invalid, see normalize, two jobs would write the same charts or a job fails.
+
+    Examples
+    --------
+    >>> run_jobs(read_jobs("jobs.yaml"), "output/2024-10-20")
+    >>> run_jobs(read_jobs("jobs.yaml"), "output/2024-10-20.zip", results="output/results")
+    """
+    unique = _unique(jobs)
+    # the dataset is read once, before the threads share it
+    data = flt.dataset() if data is None else data
+    warm = Warm(data=data) if any(job['hypothesis'] in METRICS for job in unique) else None
+    if results is not None:
+        store = results if isinstance(results, ResultsStore) else ResultsStore(results)
+        dataset = fingerprint(data)
+
+    computed = []
+    with concurrent.futures.ThreadPoolExecutor(workers) as pool, open_sink(output_dir) as sink:
+        futures = [pool.submit(_compute, job, warm, data) for job in unique]
+        for job, future in zip(unique, futures):
+            computed.append(future.result())
+            table = _render(job, computed[-1], sink.subfolder(job['output']))
+            if results is not None:
+                params = {key: value for key, value in job.items() if key not in ['hypothesis', 'output']}
+                store.write(job['hypothesis'], table, params, dataset)
+    return computed
@@ -0,0 +1,207 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+import pandas as pd
+
+import filter as flt
+import silvio_hypothesis as sv
+import dilmar_hypothesis as dm
+import leonardo_hypothesis as ln
+from synthetic import write_synthetic
+from memory import accounting
+
+# 1x and 10x the size of the real dataset
+SIZES = [57000, 570000]
+
+def _stages(path : str) -> list:
+    # (name, function) of every benchmarked stage, in the order they run; every function reads the
+    # dataset that is in filter.raw_file at the time it is called
+    def leonardo_input():
+        df = flt.filter_first(0)
+        limit_iqr, labels_iqr = ln.bins_IQR(df)
+        limit_outliers, labels_outliers = ln.bins_with_outliers(df, 20)
+        df['category_bin_iqr'] = pd.cut(df['avg_ep_per_season'], bins=limit_iqr, labels=labels_iqr)
+        df['category_bin_outliers'] = pd.cut(df['avg_ep_per_season'], bins=limit_outliers, labels=labels_outliers, duplicates='drop')
+        return df
+
+    def render():
+        table = sv.voted_genre_table(10, 10)
+        df = leonardo_input()
+        sv.plot_bar(table, "Most voted genres by network", "Networks and genres", "Vote average")
+        ln.plot_charts(df)
+
+    return [
+        ('load', lambda: pd.read_csv(path, delimiter=",")),
+        ('filter_first', lambda: flt.filter_first(10)),
+        ('filter_second', lambda: flt.filter_second(10)),
+        ('filter_second_years', lambda: flt.filter_second(10, [2022, 2023])),
+        ('filter_third', lambda: flt.filter_third(10, 10)),
+        ('frequent_genre_table', lambda: sv.frequent_genre_table(10, 10)),
+        ('popular_genre_table', lambda: sv.popular_genre_table(10, 10)),
+        ('voted_genre_table', lambda: sv.voted_genre_table(10, 10)),
+        ('dilmar_bins', lambda: dm.dilmar_bins(10, 10)),
+        ('bins_IQR', lambda: ln.bins_IQR(flt.filter_first(0))),
+        ('bins_with_outliers', lambda: ln.bins_with_outliers(flt.filter_first(0), 20)),
+        ('render', render),
+    ]
+
+def _measure(function, repeat : int) -> dict:
+    # best wall time of repeat runs, then one more run under tracemalloc for the peak memory
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    function()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {'seconds': min(times), 'peak_bytes': peak}
+
+def run_benchmarks(sizes : list[int]=SIZES, repeat : int=3, seed : int=0, memory : bool=False) -> dict:
+    """
+    Times and memory-profiles every stage of the project over synthetic datasets of many sizes.
+
+    The stages are the csv load, the three filters (filter_second with and without a year window),
+    the three tables of the 2nd hypothesis, the bins of the 3rd, bins_IQR, bins_with_outliers and
+    the rendering of the charts. While it runs, filter.raw_file is replaced by each synthetic dataset
+    and charts are written to a temporary folder; both are restored at the end.
+
+    Parameters
+    ----------
+    sizes : list[int], default SIZES
+        Number of rows of each synthetic dataset.
+    repeat : int, default 3
+        Number of timed runs of each stage; the fastest one is kept.
+    seed : int, default 0
+        Seed of the synthetic datasets.
+    memory : bool, default False
+        Whether each stage also runs once under memory.accounting, adding the key 'memory' to the
+        result: {size: {stage: report}}, with the peak and retained bytes of every span and the
+        intermediate frames of the filters.
+
+    Returns
+    -------
+    dict
+        {'environment': {...}, 'results': {size: {stage: {'seconds': float, 'peak_bytes': int}}}},
+        with sizes as strings, ready to be written as JSON.
+
+    Raises
+    ------
+    TypeError:
+        When sizes isn't a list of integers, or repeat and seed aren't instances of int.
+    ValueError:
+        When repeat is lesser than 1.
+
+    Examples
+    --------
+    >>> run_benchmarks([57000], 1)['results']['57000']['filter_second']
+    {'seconds': 1.0514, 'peak_bytes': 142265839}
+    """
+    if not isinstance(sizes, list) or not all(isinstance(size, int) for size in sizes) \
+            or not isinstance(repeat, int) or not isinstance(seed, int):
+        raise TypeError("check the argument types")
+    if repeat < 1:
+        raise ValueError("repeat must be greater than 0")
+
+    results, reports = {}, {}
+    raw_file, working_dir = flt.raw_file, os.getcwd()
+    with tempfile.TemporaryDirectory() as folder:
+        os.makedirs(os.path.join(folder, 'output'))
+        os.chdir(folder)
+        try:
+            for size in sizes:
+                path = os.path.join(folder, f"tmdb_{size}.csv")
+                write_synthetic(path, size, seed)
+                flt.raw_file = pd.read_csv(path, delimiter=",")
+                results[str(size)] = {name: _measure(function, repeat) for name, function in _stages(path)}
+                if memory:
+                    reports[str(size)] = {}
+                    for name, function in _stages(path):
+                        with accounting() as account:
+                            function()
+                        reports[str(size)][name] = account.report()
+                print(f"benchmarked {size} rows")
+        finally:
+            os.chdir(working_dir)
+            flt.raw_file = raw_file
+
+    benchmark = {
+        'environment': {'python': platform.python_version(), 'pandas': pd.__version__, 'machine': platform.machine()},
+        'results': results,
+    }
+    if memory:
+        benchmark['memory'] = reports
+    return benchmark
+
+def compare(current : dict, baseline : dict, threshold : float=0.2) -> list[str]:
+    """
+    Compares two outputs of run_benchmarks.
+
+    Parameters
+    ----------
+    current : dict
+        The new results.
+    baseline : dict
+        The stored results to compare against. Stages or sizes missing from it are ignored.
+    threshold : float, default 0.2
+        Relative slowdown tolerated, 0.2 meaning 20% slower than the baseline.
+
+    Returns
+    -------
+    list[str]
+        One message per (size, stage) slower than the baseline by more than threshold, empty when
+        there are no regressions.
+
+    Examples
+    --------
+    >>> compare(current, baseline, 0.1)
+    ['57000 filter_second: 1.2140s against 1.0514s in the baseline (+15%)']
+    """
+    regressions = []
+    for size, stages in current['results'].items():
+        for stage, measure in stages.items():
+            reference = baseline['results'].get(size, {}).get(stage)
+            if reference is None or reference['seconds'] <= 0:
+                continue
+            change = measure['seconds'] / reference['seconds'] - 1
+            if change > threshold:
+                regressions.append(f"{size} {stage}: {measure['seconds']:.4f}s against "
+                                   f"{reference['seconds']:.4f}s in the baseline (+{change:.0%})")
+    return regressions
+
+def main(argv : list[str]=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks every stage of lp-tmdb over synthetic datasets.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES, help="rows of each synthetic dataset")
+    parser.add_argument('--repeat', type=int, default=3, help="timed runs per stage")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default="benchmark.json", help="where the results are written")
+    parser.add_argument('--baseline', help="results of a previous run to compare against")
+    parser.add_argument('--threshold', type=float, default=0.2, help="tolerated relative slowdown")
+    parser.add_argument('--memory', action='store_true',
+                        help="also write a memory report per stage next to the output, as <output>.memory.json")
+    args = parser.parse_args(argv)
+
+    current = run_benchmarks(args.sizes, args.repeat, args.seed, args.memory)
+    if args.memory:
+        with open(os.path.splitext(args.output)[0] + ".memory.json", 'w') as file:
+            json.dump(current.pop('memory'), file, indent=2)
+    with open(args.output, 'w') as file:
+        json.dump(current, file, indent=2)
+
+    if args.baseline is None:
+        return 0
+    with open(args.baseline) as file:
+        regressions = compare(current, json.load(file), args.threshold)
+    for message in regressions:
+        print(f"regression: {message}")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,187 @@
+import warnings
+import numpy as np
+import pandas as pd
+
+# largest number of (resample, row) cells drawn at once, about 32MB of float64
+BLOCK_CELLS = 2 ** 22
+
+def _check(resamples : int, confidence : float) -> None:
+    if not isinstance(resamples, int) or not isinstance(confidence, float):
+        raise TypeError("check the argument types")
+    if resamples < 1 or not 0 < confidence < 1:
+        raise ValueError("resamples must be greater than 0 and confidence between 0 and 1")
+
+def _table(labels : pd.Index, means : np.ndarray, resampled : np.ndarray, confidence : float) -> pd.DataFrame:
+    # percentile intervals of the resampled means (resamples x groups)
+    tail = (1 - confidence) / 2 * 100
+    with warnings.catch_warnings():
+        # groups without rows have no resampled means
+        warnings.simplefilter('ignore', RuntimeWarning)
+        low, high = np.nanpercentile(resampled, [tail, 100 - tail], axis=0)
+    return pd.DataFrame({'mean': means, 'low': low, 'high': high}, index=labels)
+
+def bootstrap_means(values, groups, resamples : int=1000, confidence : float=0.95, method : str='index',
+                    seed : int=0) -> pd.DataFrame:
+    """
+    Computes the mean of values per group with bootstrap confidence intervals, drawing the
+    resamples of every group at once.
+
+    Each block of resamples is a (resamples x rows) matrix, with the rows sorted by group, and
+    the means of all the groups in all the resamples come out of a single bincount over
+    resample * groups + group, instead of a loop over groups or resamples. Blocks hold at most
+    BLOCK_CELLS cells, so the memory doesn't grow with the number of resamples.
+
+    Parameters
+    ----------
+    values : array-like
+        The numbers to be averaged.
+    groups : array-like
+        The group of each value, of the same length. Missing groups are ignored, and every
+        category of a categorical is a group.
+    resamples : int, default 1000
+        Number of bootstrap resamples.
+    confidence : float, default 0.95
+        Confidence level of the percentile intervals.
+    method : str, default 'index'
+        'index' draws, for every group, as many indices of its rows as its size (the classic
+        bootstrap); 'poisson' gives every row a Poisson(1) weight instead, so a resample of a
+        group may have a different size, but rows can be weighted independently of each other.
+    seed : int, default 0
+        Seed of the random generator.
+
+    Returns
+    -------
+    pandas.DataFrame
+        Indexed by group, in sorted order, with the columns 'mean', 'low' and 'high'.
+
+    Raises
+    ------
+    TypeError:
+        When resamples isn't an int or confidence isn't a float.
+    ValueError:
+        When the lengths differ, the method is unknown, resamples is lesser than 1 or confidence
+        isn't between 0 and 1.
+
+    Examples
+    --------
+    >>> bootstrap_means(df['vote_average'], df['category_bin_iqr'])
+                     mean       low      high
+    category_bin_iqr
+    0-4          6.943124  6.905311  6.980502
+    ...
+    """
+    _check(resamples, confidence)
+    if method not in ['index', 'poisson']:
+        raise ValueError("method must be 'index' or 'poisson'")
+    values = np.asarray(values, dtype=float)
+    groups = pd.Series(groups)
+    if isinstance(groups.dtype, pd.CategoricalDtype):
+        # every category is kept, even without rows, as the group-bys of the charts do
+        codes, labels = groups.cat.codes.to_numpy(), groups.cat.categories
+    else:
+        codes, labels = pd.factorize(groups, sort=True)
+    if len(values) != len(codes):
+        raise ValueError("values and groups must have the same length")
+    present = codes >= 0
+    values, codes = values[present], codes[present]
+
+    # rows sorted by group, so the rows of group g are starts[g]:starts[g] + sizes[g]
+    order = np.argsort(codes, kind='stable')
+    values, codes = values[order], codes[order]
+    n_groups = len(labels)
+    sizes = np.bincount(codes, minlength=n_groups)
+    starts = np.cumsum(sizes) - sizes
+    means = np.bincount(codes, weights=values, minlength=n_groups) / np.maximum(sizes, 1)
+    means[sizes == 0] = np.nan
+
+    rng = np.random.default_rng(seed)
+    block = max(1, BLOCK_CELLS // max(len(values), 1))
+    resampled = np.empty((resamples, n_groups))
+    for first in range(0, resamples, block):
+        count = min(block, resamples - first)
+        cells = (np.arange(count)[:, None] * n_groups + codes).ravel()
+        if method == 'index':
+            picks = starts[codes] + (rng.random((count, len(codes))) * sizes[codes]).astype(int)
+            sums = np.bincount(cells, weights=values[picks].ravel(), minlength=count * n_groups)
+            resampled[first:first + count] = sums.reshape(count, n_groups) / np.maximum(sizes, 1)
+        else:
+            weights = rng.poisson(1, (count, len(codes))).astype(float)
+            sums = np.bincount(cells, weights=(weights * values).ravel(), minlength=count * n_groups)
+            totals = np.bincount(cells, weights=weights.ravel(), minlength=count * n_groups)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                resampled[first:first + count] = (sums / totals).reshape(count, n_groups)
+    resampled[:, sizes == 0] = np.nan
+
+    return _table(pd.Index(labels, name=groups.name), means, resampled, confidence)
+
+class StreamingBootstrap:
+    """
+    Poisson bootstrap of the means per group over data that arrives in chunks, for groups too
+    big to be held in memory at once.
+
+    Every row gets an independent Poisson(1) weight per resample, so a chunk can be folded into
+    the running (resamples x groups) weighted sums and discarded.
+
+    Parameters
+    ----------
+    resamples : int, default 1000
+        Number of bootstrap resamples.
+    seed : int, default 0
+        Seed of the random generator.
+
+    Examples
+    --------
+    >>> stream = StreamingBootstrap(500)
+    >>> for chunk in pd.read_csv(path, chunksize=100000):
+    ...     stream.update(chunk['popularity'], chunk['networks'])
+    >>> stream.result()
+    """
+    def __init__(self, resamples : int=1000, seed : int=0):
+        _check(resamples, 0.95)
+        self.resamples = resamples
+        self.rng = np.random.default_rng(seed)
+        self.labels = {}
+        self.sums = np.zeros((resamples, 0))
+        self.totals = np.zeros((resamples, 0))
+        self.value_sums = np.zeros(0)
+        self.counts = np.zeros(0)
+
+    def update(self, values, groups) -> None:
+        """
+        Folds a chunk of values and their groups into the running sums. Missing groups are ignored.
+        """
+        values = np.asarray(values, dtype=float)
+        groups = pd.Series(groups)
+        present = groups.notna().to_numpy()
+        values, groups = values[present], groups[present]
+        local, uniques = pd.factorize(groups)
+        codes = np.array([self.labels.setdefault(group, len(self.labels)) for group in uniques], dtype=int)[local]
+        n_groups = len(self.labels)
+        if n_groups > self.sums.shape[1]:
+            grow = n_groups - self.sums.shape[1]
+            self.sums = np.pad(self.sums, ((0, 0), (0, grow)))
+            self.totals = np.pad(self.totals, ((0, 0), (0, grow)))
+            self.value_sums = np.pad(self.value_sums, (0, grow))
+            self.counts = np.pad(self.counts, (0, grow))
+
+        self.value_sums += np.bincount(codes, weights=values, minlength=n_groups)
+        self.counts += np.bincount(codes, minlength=n_groups)
+        block = max(1, BLOCK_CELLS // max(len(values), 1))
+        for first in range(0, self.resamples, block):
+            count = min(block, self.resamples - first)
+            cells = (np.arange(count)[:, None] * n_groups + codes).ravel()
+            weights = self.rng.poisson(1, (count, len(codes))).astype(float)
+            self.sums[first:first + count] += np.bincount(cells, weights=(weights * values).ravel(),
+                                                          minlength=count * n_groups).reshape(count, n_groups)
+            self.totals[first:first + count] += np.bincount(cells, weights=weights.ravel(),
+                                                            minlength=count * n_groups).reshape(count, n_groups)
+
+    def result(self, confidence : float=0.95) -> pd.DataFrame:
+        """
+        Returns the means per group so far, indexed by group in sorted order, with the columns
+        'mean', 'low' and 'high'.
+        """
+        _check(self.resamples, confidence)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            table = _table(pd.Index(list(self.labels)), self.value_sums / self.counts, self.sums / self.totals, confidence)
+        return table.sort_index()
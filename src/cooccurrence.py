@@ -0,0 +1,166 @@
+import numpy as np
+import pandas as pd
+
+import filter as flt
+from dictionary import DICTIONARY, split_codes
+from tracing import span, traced
+
+def _sparse():
+    # scipy.sparse when it's installed, None otherwise
+    try:
+        import scipy.sparse
+        return scipy.sparse
+    except ImportError:
+        return None
+
+def _alphabetical(codes : np.ndarray, ranks : np.ndarray) -> tuple[pd.Index, np.ndarray]:
+    # the distinct strings of the dictionary codes in alphabetical order, and the position of every
+    # code, from one snapshot of DICTIONARY.ranks() taken after the codes were encoded
+    used, positions = np.unique(ranks[codes], return_inverse=True)
+    return pd.Index(DICTIONARY.decode(np.argsort(ranks)[used])), positions
+
+class CoOccurrence:
+    """
+    The genres and networks of the shows as incidence matrices, (shows x genres) and
+    (shows x networks) with a 1 where a show has the genre or network, and the products of them:
+    how often two genres are in the same show, and how many shows of every genre each network has
+    (its genre mix). The products are sparse when scipy is installed, and dense otherwise.
+
+    Built by cooccurrence.
+
+    Attributes
+    ----------
+    genres, networks : pandas.Index
+        The genres and networks, in alphabetical order, one per column of the incidence matrices.
+    genre_incidence, network_incidence : scipy.sparse.csr_matrix or numpy.ndarray
+        The incidence matrices, a row per show. The (shows x networks) one is None without scipy,
+        as it would be dense.
+    """
+    def __init__(self, genres : pd.Index, networks : pd.Index, genre_incidence, network_incidence, mix : np.ndarray):
+        self.genres = genres
+        self.networks = networks
+        self.genre_incidence = genre_incidence
+        self.network_incidence = network_incidence
+        self.mix = mix
+        norms = np.linalg.norm(mix, axis=1, keepdims=True)
+        self._unit = np.divide(mix, norms, out=np.zeros(mix.shape), where=norms > 0)
+
+    def genre_pairs(self) -> pd.DataFrame:
+        """
+        Returns the number of shows of every pair of genres, (genres x genres), the number of shows
+        of every genre in the diagonal.
+        """
+        pairs = self.genre_incidence.T @ self.genre_incidence
+        pairs = pairs.toarray() if hasattr(pairs, 'toarray') else pairs
+        return pd.DataFrame(pairs.astype(np.int64), index=self.genres, columns=self.genres)
+
+    def genre_mix(self) -> pd.DataFrame:
+        """
+        Returns the number of shows of every network with every genre, (networks x genres).
+        """
+        return pd.DataFrame(self.mix.astype(np.int64), index=self.networks, columns=self.genres)
+
+    def similarity(self) -> pd.DataFrame:
+        """
+        Returns the cosine similarity of the genre mixes of every pair of networks, (networks x
+        networks), 1 for networks with the same proportions of genres. It holds 8 bytes per pair,
+        for the nearest networks of just a few of them see nearest.
+        """
+        return pd.DataFrame(self._unit @ self._unit.T, index=self.networks, columns=self.networks)
+
+    def nearest(self, network : str, k : int=10) -> pd.Series:
+        """
+        Returns the k networks whose genre mixes are the most similar to the one of network, with
+        their cosine similarity, from the most similar. network itself is left out.
+
+        Raises
+        ------
+        KeyError:
+            When network isn't one of the networks.
+
+        Examples
+        --------
+        >>> cooccurrence(10).nearest("HBO", 3)
+        """
+        position = self.networks.get_loc(network)
+        scores = self._unit @ self._unit[position]
+        scores[position] = -np.inf
+        k = min(k, len(scores) - 1)
+        # the k best are found without sorting every network, then sorted among themselves
+        best = np.argpartition(-scores, k - 1)[:k] if k > 0 else np.array([], dtype=np.int64)
+        best = best[np.lexsort((best, -scores[best]))]
+        return pd.Series(scores[best], index=self.networks[best], name='similarity')
+
+@traced
+def cooccurrence(shows_minimum : int=0, data : pd.DataFrame=None) -> CoOccurrence:
+    """
+    Builds the incidence matrices of the genres and networks of the shows, split as filter_second
+    splits them, and their products, with no (genre, network) pair of a show ever listed.
+
+    Parameters
+    ----------
+    shows_minimum : int, default 0
+        Keeps just the networks with more than this number of shows.
+    data : pandas.DataFrame, default None
+        The table to be analysed, with the columns of the TMDB dataset. When None, the dataset of
+        the data folder is used. Shows without genres or networks are left out.
+
+    Returns
+    -------
+    CoOccurrence
+        The matrices, see CoOccurrence.
+
+    Raises
+    ------
+    TypeError:
+        When shows_minimum isn't an instance of int.
+
+    Examples
+    --------
+    >>> matrices = cooccurrence(10)
+    >>> matrices.genre_pairs().loc['Drama', 'Crime']
+    >>> matrices.nearest("Netflix", 5)
+    """
+    if not isinstance(shows_minimum, int):
+        raise TypeError("check the argument types")
+    if data is None:
+        data = flt.raw_file
+    sparse = _sparse()
+
+    with span("cooccurrence.incidence", len(data)) as stage:
+        rows = np.flatnonzero(flt.valid_rows(data, ['genres', 'networks']))
+        genre_counts, genre_codes = split_codes(data['genres'].iloc[rows])
+        network_counts, network_codes = split_codes(data['networks'].iloc[rows])
+        # one snapshot of the ranks, as other threads adding strings to the dictionary change them
+        ranks = DICTIONARY.ranks()
+        genres, genre_columns = _alphabetical(genre_codes, ranks)
+        networks, network_columns = _alphabetical(network_codes, ranks)
+        # the (show, column) of every 1 of the matrices, a genre (or network) repeated in a show counted once
+        genre_cells = np.unique(np.repeat(np.arange(len(rows)), genre_counts) * len(genres) + genre_columns)
+        network_cells = np.unique(np.repeat(np.arange(len(rows)), network_counts) * len(networks) + network_columns)
+        genre_rows, genre_columns = np.divmod(genre_cells, len(genres))
+        network_rows, network_columns = np.divmod(network_cells, len(networks))
+        if sparse is not None:
+            genre_incidence = sparse.csr_matrix((np.ones(len(genre_cells)), (genre_rows, genre_columns)),
+                                                shape=(len(rows), len(genres)))
+            network_incidence = sparse.csr_matrix((np.ones(len(network_cells)), (network_rows, network_columns)),
+                                                  shape=(len(rows), len(networks)))
+        else:
+            genre_incidence = np.zeros((len(rows), len(genres)))
+            genre_incidence[genre_rows, genre_columns] = 1
+            network_incidence = None
+        stage.rows_out = len(rows)
+
+    with span("cooccurrence.products", len(rows)):
+        if sparse is not None:
+            mix = (network_incidence.T @ genre_incidence).toarray()
+        else:
+            # the genre rows of the shows of every network, summed one genre at a time as there are few
+            mix = np.zeros((len(networks), len(genres)))
+            for genre in range(len(genres)):
+                mix[:, genre] = np.bincount(network_columns, weights=genre_incidence[network_rows, genre],
+                                            minlength=len(networks))
+        kept = np.bincount(network_columns, minlength=len(networks)) > shows_minimum
+    if sparse is not None:
+        network_incidence = network_incidence[:, np.flatnonzero(kept)]
+    return CoOccurrence(genres, networks[kept], genre_incidence, network_incidence, mix[kept])
@@ -0,0 +1,177 @@
+import numpy as np
+import pandas as pd
+
+from tracing import span
+
+def _mix(values : np.ndarray) -> np.ndarray:
+    # splitmix64, a bijective mix of 64 bit integers (the products wrap around on purpose)
+    values = values + np.uint64(0x9E3779B97F4A7C15)
+    values = (values ^ (values >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    values = (values ^ (values >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return values ^ (values >> np.uint64(31))
+
+def _tokens(data : pd.DataFrame) -> tuple[np.ndarray, np.ndarray]:
+    # the hashed tokens of every show: the 3-character shingles of its normalized name, plus its
+    # genres, networks and year; shows without a name get a token of their own, so they never match
+    names = data['name'].fillna('').astype(str).str.lower().str.replace(r'[\W_]+', ' ', regex=True).str.strip()
+    years = data['first_air_date'].astype(str).str[:4]
+    tokens, counts = [], []
+    for name, genres, networks, year, show in zip(names, data['genres'], data['networks'], years, data['id']):
+        if name:
+            padded = f" {name} "
+            items = [padded[i:i + 3] for i in range(len(padded) - 2)]
+            items += ["g:" + genre for genre in str(genres).split(", ")] if isinstance(genres, str) else []
+            items += ["n:" + network for network in str(networks).split(", ")] if isinstance(networks, str) else []
+            items.append("y:" + year)
+        else:
+            items = [f"id:{show}"]
+        tokens.extend(items)
+        counts.append(len(items))
+    return np.array(counts), pd.util.hash_array(np.array(tokens, dtype=object))
+
+def minhash(data : pd.DataFrame, num_perm : int=64, seed : int=0) -> np.ndarray:
+    """
+    Computes the MinHash signature of every show from the shingles of its name and its genres,
+    networks and year: for each of num_perm hash functions, the least hash of the tokens of the
+    show. The fraction of equal positions of two signatures estimates the Jaccard similarity of
+    their tokens.
+
+    Returns
+    -------
+    numpy.ndarray
+        Of shape (rows, num_perm), of uint64.
+    """
+    counts, hashes = _tokens(data)
+    starts = np.cumsum(counts) - counts
+    seeds = _mix(np.arange(num_perm, dtype=np.uint64) + np.uint64(seed * num_perm))
+    signatures = np.empty((len(counts), num_perm), dtype=np.uint64)
+    for i, permutation in enumerate(seeds):
+        signatures[:, i] = np.minimum.reduceat(_mix(hashes ^ permutation), starts)
+    return signatures
+
+def _candidates(signatures : np.ndarray, bands : int) -> np.ndarray:
+    # pairs (first, other) of rows with the same hash in some band of their signatures; each bucket
+    # pairs all its rows with its first one, so the number of pairs grows with the rows
+    rows = signatures.shape[1] // bands
+    pairs = []
+    for band in range(bands):
+        key = np.zeros(len(signatures), dtype=np.uint64)
+        for column in range(band * rows, (band + 1) * rows):
+            key = _mix(key ^ signatures[:, column])
+        order = np.argsort(key, kind='stable')
+        sorted_key = key[order]
+        new_bucket = np.concatenate([[True], sorted_key[1:] != sorted_key[:-1]])
+        first = order[np.flatnonzero(new_bucket)][np.cumsum(new_bucket) - 1]
+        repeated = ~new_bucket
+        pairs.append(np.stack([first[repeated], order[repeated]], axis=1))
+    pairs = np.concatenate(pairs)
+    pairs.sort(axis=1)
+    return np.unique(pairs, axis=0)
+
+def _roots(pairs : np.ndarray, size : int) -> np.ndarray:
+    # the connected components of the pairs (union-find), as the least row of every component
+    parent = np.arange(size)
+    def find(row):
+        while parent[row] != row:
+            parent[row] = parent[parent[row]]
+            row = parent[row]
+        return row
+    for a, b in pairs:
+        a, b = find(a), find(b)
+        if a != b:
+            parent[max(a, b)] = min(a, b)
+    return np.array([find(row) for row in range(size)])
+
+def find_duplicates(data : pd.DataFrame, threshold : float=0.8, max_years : int=1, num_perm : int=64,
+                    bands : int=16, seed : int=0) -> pd.DataFrame:
+    """
+    Finds the shows that are near duplicates of others, such as re-listings of a snapshot or of a
+    regional extract under another id, with MinHash signatures and locality-sensitive hashing.
+
+    The signatures are cut in bands; shows with an identical band become candidates, so the shows
+    aren't compared all against all. Candidates are duplicates when their estimated similarity is
+    at least threshold and they first aired at most max_years apart. Each group of duplicates keeps
+    the show with the most votes (the first one on ties).
+
+    Parameters
+    ----------
+    data : pandas.DataFrame
+        The shows, with the columns 'id', 'name', 'genres', 'networks', 'first_air_date' and 'vote_count'.
+    threshold : float, default 0.8
+        Least estimated Jaccard similarity of the tokens of two duplicates: the 3-character shingles
+        of their names, their genres, networks and year.
+    max_years : int, default 1
+        Most years between the first air dates of two duplicates. Shows without a date aren't merged.
+    num_perm : int, default 64
+        Length of the signatures.
+    bands : int, default 16
+        Number of bands, which must divide num_perm. More bands find pairs of lower similarity,
+        at the cost of more candidates.
+    seed : int, default 0
+        Seed of the hash functions.
+
+    Returns
+    -------
+    pandas.DataFrame
+        One row per dropped show, with the columns 'kept_id', 'kept_name', 'dropped_id',
+        'dropped_name' and 'similarity' (between the two).
+
+    Raises
+    ------
+    ValueError:
+        When bands doesn't divide num_perm or threshold isn't between 0 and 1.
+
+    Examples
+    --------
+    >>> find_duplicates(raw_file)
+       kept_id        kept_name  dropped_id         dropped_name  similarity
+    0    31917  Pretty Little Liars   239874  Pretty Little Liars     0.96875
+    ...
+    """
+    if num_perm % bands != 0:
+        raise ValueError("bands must divide num_perm")
+    if not 0 <= threshold <= 1:
+        raise ValueError("threshold must be between 0 and 1")
+    with span("minhash", len(data)):
+        signatures = minhash(data, num_perm, seed)
+    with span("lsh", len(data)) as stage:
+        pairs = _candidates(signatures, bands)
+        similarity = (signatures[pairs[:, 0]] == signatures[pairs[:, 1]]).mean(axis=1)
+        years = pd.to_numeric(data['first_air_date'].astype(str).str[:4], errors='coerce').to_numpy()
+        close = np.abs(years[pairs[:, 0]] - years[pairs[:, 1]]) <= max_years
+        numbers = data['name'].fillna('').astype(str).str.findall(r'\d+').str.join(' ').to_numpy()
+        same_numbers = numbers[pairs[:, 0]] == numbers[pairs[:, 1]]
+        pairs = pairs[(similarity >= threshold) & close & same_numbers]
+        stage.rows_out = len(pairs)
+
+    roots = _roots(pairs, len(data))
+    groups = pd.DataFrame({'root': roots, 'votes': data['vote_count'].to_numpy(), 'row': np.arange(len(data))})
+    groups = groups[groups.groupby('root')['root'].transform('size') > 1]
+    groups = groups.sort_values(['root', 'votes', 'row'], ascending=[True, False, True])
+    kept = groups.groupby('root')['row'].transform('first').to_numpy()
+    dropped = groups['row'].to_numpy()
+    kept, dropped = kept[kept != dropped], dropped[kept != dropped]
+    return pd.DataFrame({
+        'kept_id': data['id'].to_numpy()[kept],
+        'kept_name': data['name'].to_numpy()[kept],
+        'dropped_id': data['id'].to_numpy()[dropped],
+        'dropped_name': data['name'].to_numpy()[dropped],
+        'similarity': (signatures[kept] == signatures[dropped]).mean(axis=1),
+    })
+
+def collapse_duplicates(data : pd.DataFrame, **options) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Drops the near duplicate shows of data found by find_duplicates, which takes the options.
+
+    Returns
+    -------
+    tuple[pandas.DataFrame, pandas.DataFrame]
+        The table without the duplicates, indexed from 0, and the report of find_duplicates.
+
+    Examples
+    --------
+    >>> data, report = collapse_duplicates(read_tables("data/snapshots/*.csv"))
+    >>> report.to_csv("duplicates.csv", index=False)
+    """
+    report = find_duplicates(data, **options)
+    return data[~data['id'].isin(report['dropped_id'])].reset_index(drop=True), report
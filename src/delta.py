@@ -0,0 +1,136 @@
+import weakref
+import numpy as np
+import pandas as pd
+
+import filter as flt
+from aggregates import yearly_aggregates, STATS
+from join import id_index
+
+KEYS = ['year', 'genres', 'networks']
+
+# id of a table grown by apply_delta -> (weak reference to it, column -> the buffer its values are the start of)
+_buffers = {}
+
+def _append(data : pd.DataFrame, rows : pd.DataFrame) -> pd.DataFrame:
+    # data with rows appended, numbered after its last row. Every column is a view of the start of a
+    # buffer with room for more rows, so an append usually writes just the new rows; a buffer is
+    # allocated again, twice as large as needed, when it's full, when the rows need another dtype or
+    # when the column isn't (any longer) its buffer, as for the columns of a table just read
+    size, added = len(data), len(rows)
+    entry = _buffers.pop(id(data), None)
+    buffers = entry[1] if entry is not None and entry[0]() is data else {}
+    columns = {}
+    for column in data.columns:
+        values, new = data[column].to_numpy(), rows[column].to_numpy()
+        buffer = buffers.get(column)
+        dtype = np.result_type(values.dtype, new.dtype)
+        if buffer is None or buffer.dtype != dtype or len(buffer) < size + added \
+                or len(values) and values.ctypes.data != buffer.ctypes.data:
+            buffer = np.empty(2 * (size + added), dtype=dtype)
+            buffer[:size] = values
+        buffer[size:size + added] = new
+        buffers[column] = buffer
+        columns[column] = buffer[:size + added]
+    labels = pd.RangeIndex(size, size + added)
+    index = pd.RangeIndex(size + added) if data.index.equals(pd.RangeIndex(size)) else data.index.append(labels)
+    grown = pd.DataFrame(columns, index=index, copy=False)
+    key = id(grown)
+    _buffers[key] = (weakref.ref(grown, lambda _: _buffers.pop(key, None)), buffers)
+    return grown
+
+def read_delta(path : str) -> pd.DataFrame:
+    """
+    Reads a delta file: a csv with the same columns as the TMDB dataset, holding just the new and
+    the changed shows.
+
+    Parameters
+    ----------
+    path : str
+        Path of the delta csv.
+
+    Returns
+    -------
+    pandas.DataFrame
+        The rows of the delta.
+
+    Raises
+    ------
+    ValueError:
+        When the delta has repeated ids or its columns differ from the dataset's.
+    """
+    delta = pd.read_csv(path, delimiter=",")
+    if set(delta.columns) != set(flt.raw_file.columns):
+        raise ValueError("the delta must have the same columns as the dataset")
+    if delta['id'].duplicated().any():
+        raise ValueError("the delta can't have repeated ids")
+    return delta[flt.raw_file.columns]
+
+def apply_delta(delta : pd.DataFrame, yearly : pd.DataFrame=None) -> pd.DataFrame:
+    """
+    Applies a delta to the loaded dataset and to the per year aggregates built from it.
+
+    Changed shows (ids already in the dataset) are overwritten in place and new shows are appended
+    to filter.raw_file, so every filter sees the updated data. The aggregates are updated by
+    subtracting the contributions of the old version of the changed rows and adding the ones of
+    the delta, so the work done is proportional to the size of the delta, not of the dataset.
+    The shows are found through the id index of the dataset, the validity masks of the filters
+    are updated for just the rows of the delta, and the columns of the dataset grow into spare
+    room, so new shows usually don't copy it.
+
+    Parameters
+    ----------
+    delta : pandas.DataFrame
+        New and changed rows keyed by 'id', as returned by read_delta.
+    yearly : pandas.DataFrame, default None
+        Aggregates as returned by aggregates.yearly_aggregates, for the dataset before the delta.
+        When None, they are computed from scratch (after the delta is applied).
+
+    Returns
+    -------
+    pandas.DataFrame
+        The aggregates of the updated dataset, equal to a fresh yearly_aggregates().
+
+    Raises
+    ------
+    ValueError:
+        When the delta has repeated ids.
+
+    Examples
+    --------
+    >>> yearly = yearly_aggregates()
+    >>> yearly = apply_delta(read_delta("data/delta_2024-10-20.csv"), yearly)
+    >>> genre_windows('frequent', 10, 100, 2, yearly=yearly)
+    """
+    if delta['id'].duplicated().any():
+        raise ValueError("the delta can't have repeated ids")
+
+    delta = delta[flt.raw_file.columns].reset_index(drop=True)
+    positions = id_index(flt.raw_file).positions(delta['id'].to_numpy())
+    changed = positions >= 0
+    old_rows = flt.raw_file.iloc[positions[changed]]
+
+    if yearly is not None:
+        # retract what the old version of the rows contributed, then add the new version
+        yearly = yearly.set_index(KEYS)[STATS]
+        for rows, sign in [(delta, 1), (old_rows, -1)]:
+            exploded = flt._explode_second(rows, [0, 9999])
+            if not exploded.empty:
+                yearly = yearly.add(sign * yearly_aggregates(exploded).set_index(KEYS), fill_value=0)
+        yearly = yearly[yearly['count'] > 0].reset_index()
+        yearly[['count', 'vote_count']] = yearly[['count', 'vote_count']].astype(int)
+
+    for position, column in enumerate(flt.raw_file.columns):
+        flt.raw_file.iloc[positions[changed], position] = delta.loc[changed, column].to_numpy()
+    # the masks of the valid rows kept for the dataset, which the filters use, are stale for these rows
+    flt.rows_changed(flt.raw_file, positions[changed])
+    if not changed.all():
+        size = len(flt.raw_file)
+        grown = _append(flt.raw_file, delta[~changed])
+        # the indexes of the dataset are extended with the new rows
+        flt.rows_changed(grown, np.arange(size, len(grown)), previous=flt.raw_file)
+        id_index(grown, previous=flt.raw_file)
+        flt.raw_file = grown
+
+    if yearly is None:
+        yearly = yearly_aggregates()
+    return yearly.sort_values(KEYS).reset_index(drop=True)
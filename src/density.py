@@ -0,0 +1,124 @@
+import numpy as np
+
+def _limits(values : np.ndarray, limits : tuple=None) -> tuple[float, float]:
+    # the range of a grid, widened when every value is the same
+    low, high = (values.min(), values.max()) if limits is None else limits
+    if low == high:
+        low, high = low - 0.5, high + 0.5
+    return float(low), float(high)
+
+def count_grid(x, y, bins : tuple=(300, 200), x_limits : tuple=None, y_limits : tuple=None) -> tuple:
+    """
+    Counts the points (x, y) falling in every cell of a regular 2-D grid, so that a scatter plot
+    of many points can be drawn as an image of the grid.
+
+    Parameters
+    ----------
+    x, y : array-like
+        The coordinates of the points, of the same length. Points with a missing coordinate or
+        outside the limits are ignored.
+    bins : tuple, default (300, 200)
+        Number of cells along x and along y.
+    x_limits, y_limits : tuple, default None
+        (low, high) of each axis. When None, the range of the coordinates.
+
+    Returns
+    -------
+    tuple[numpy.ndarray, tuple]
+        The counts, of shape (bins[1], bins[0]) so that rows go along y, and the extent of the grid
+        (x_low, x_high, y_low, y_high), as taken by matplotlib's imshow.
+
+    Raises
+    ------
+    ValueError:
+        When x and y have different lengths or there are less than one cell per axis.
+
+    Examples
+    --------
+    >>> counts, extent = count_grid(df['avg_ep_per_season'], df['vote_average'], y_limits=(0, 10))
+    >>> plt.imshow(counts, origin='lower', extent=extent, aspect='auto')
+    """
+    x, y = np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+    if len(x) != len(y):
+        raise ValueError("x and y must have the same length")
+    if min(bins) < 1:
+        raise ValueError("there must be at least one cell per axis")
+    finite = np.isfinite(x) & np.isfinite(y)
+    x, y = x[finite], y[finite]
+    if len(x) == 0:
+        return np.zeros(bins[::-1]), (0.0, 1.0, 0.0, 1.0)
+    x_low, x_high = _limits(x, x_limits)
+    y_low, y_high = _limits(y, y_limits)
+
+    inside = (x >= x_low) & (x <= x_high) & (y >= y_low) & (y <= y_high)
+    x, y = x[inside], y[inside]
+    # the highest value belongs to the last cell, as in numpy.histogram
+    columns = np.minimum(((x - x_low) / (x_high - x_low) * bins[0]).astype(int), bins[0] - 1)
+    rows = np.minimum(((y - y_low) / (y_high - y_low) * bins[1]).astype(int), bins[1] - 1)
+    counts = np.bincount(rows * bins[0] + columns, minlength=bins[0] * bins[1]).reshape(bins[1], bins[0])
+    return counts, (x_low, x_high, y_low, y_high)
+
+def binned_kde(values, grid_size : int=512, bandwidth : float=None, limits : tuple=None) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Estimates the density of values with a Gaussian kernel, evaluated on a regular grid.
+
+    The values are first spread linearly over the two nearest points of the grid, and the counts
+    of the grid are then convolved with the kernel through an FFT, so the cost grows with the size
+    of the grid instead of the number of values.
+
+    Parameters
+    ----------
+    values : array-like
+        The sample. Missing values are ignored.
+    grid_size : int, default 512
+        Number of points of the grid.
+    bandwidth : float, default None
+        Standard deviation of the kernel. When None, Scott's rule, as used by seaborn.
+    limits : tuple, default None
+        (low, high) of the grid. When None, the range of the values.
+
+    Returns
+    -------
+    tuple[numpy.ndarray, numpy.ndarray]
+        The points of the grid and the density at each of them.
+
+    Raises
+    ------
+    ValueError:
+        When there are no values or the grid has less than 2 points.
+
+    Examples
+    --------
+    >>> grid, density = binned_kde(df['vote_average'])
+    >>> plt.plot(grid, density * len(df) * bin_width)
+    """
+    values = np.asarray(values, dtype=float)
+    values = values[np.isfinite(values)]
+    if len(values) == 0:
+        raise ValueError("there are no values to estimate the density of")
+    if grid_size < 2:
+        raise ValueError("the grid must have at least 2 points")
+    low, high = _limits(values, limits)
+    grid = np.linspace(low, high, grid_size)
+    step = grid[1] - grid[0]
+    if bandwidth is None:
+        spread = values.std(ddof=1) if len(values) > 1 else 0
+        bandwidth = spread * len(values) ** (-1 / 5)
+    # narrower kernels can't be told apart on the grid
+    bandwidth = max(bandwidth, step / 2)
+
+    total = len(values)
+    values = values[(values >= low) & (values <= high)]
+    position = (values - low) / step
+    left = np.minimum(position.astype(int), grid_size - 2)
+    right_share = position - left
+    counts = (np.bincount(left, weights=1 - right_share, minlength=grid_size)
+              + np.bincount(left + 1, weights=right_share, minlength=grid_size))
+
+    # kernel at every distance between two points of the grid, from -(grid_size - 1) steps on
+    offsets = np.arange(1 - grid_size, grid_size) * step
+    kernel = np.exp(-0.5 * (offsets / bandwidth) ** 2) / (bandwidth * np.sqrt(2 * np.pi))
+    size = 1 << int(3 * grid_size - 2).bit_length()
+    convolved = np.fft.irfft(np.fft.rfft(counts, size) * np.fft.rfft(kernel, size), size)
+    density = np.maximum(convolved[grid_size - 1:2 * grid_size - 1], 0) / total
+    return grid, density
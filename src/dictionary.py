@@ -0,0 +1,113 @@
+import threading
+import numpy as np
+import pandas as pd
+
+from engine import get_engine
+
+class StringDictionary:
+    """
+    Gives every distinct string a stable int32 code, so that columns of repeated strings, such as
+    the names of the genres and networks, can be filtered, grouped and sorted as integers and
+    decoded back to strings only when they are shown.
+
+    Codes are never reused or changed, so codes from different tables of the same dictionary can
+    be compared directly. Missing values are coded as -1. Every string is kept just once, and the
+    decoded columns share these objects instead of holding copies of them.
+
+    Examples
+    --------
+    >>> dictionary = StringDictionary()
+    >>> dictionary.encode(["Netflix", "HBO", "Netflix", None])
+    array([ 0,  1,  0, -1], dtype=int32)
+    >>> dictionary.decode([1, 0])
+    array(['HBO', 'Netflix'], dtype=object)
+    """
+    def __init__(self):
+        self.strings = np.empty(0, dtype=object)
+        self.index = pd.Index([], dtype=object)
+        self._ranks = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.strings)
+
+    def encode(self, values) -> np.ndarray:
+        """
+        Returns the codes of values, adding the strings not seen before to the dictionary.
+        """
+        local, uniques = get_engine().factorize(values)
+        with self._lock:
+            found = self.index.get_indexer(uniques)
+            new = found < 0
+            if new.any():
+                found[new] = np.arange(len(self.strings), len(self.strings) + new.sum())
+                added = np.asarray(uniques[new], dtype=object)
+                self.strings = np.concatenate([self.strings, added])
+                self.index = self.index.append(pd.Index(added, dtype=object))
+                self._ranks = None
+        return np.where(local >= 0, found[local], -1).astype(np.int32)
+
+    def decode(self, codes) -> np.ndarray:
+        """
+        Returns the strings of codes, with NaN for -1.
+        """
+        codes = np.asarray(codes)
+        strings = self.strings[codes]
+        strings[codes < 0] = np.nan
+        return strings
+
+    def ranks(self) -> np.ndarray:
+        """
+        Returns the position of every code in the alphabetical order of the strings, so that
+        ranks()[codes] sorts as the strings would.
+        """
+        with self._lock:
+            if self._ranks is None or len(self._ranks) != len(self.strings):
+                order = np.argsort(self.strings.astype(str), kind='stable')
+                self._ranks = np.empty(len(order), dtype=np.int32)
+                self._ranks[order] = np.arange(len(order), dtype=np.int32)
+            return self._ranks
+
+# the dictionary shared by the whole project
+DICTIONARY = StringDictionary()
+
+def split_codes(values : pd.Series, separator : str=", ",
+                dictionary : StringDictionary=DICTIONARY) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Codes the items of a column of lists joined by separator, such as "Drama, Comedy".
+
+    Only the distinct values of the column are split, so the cost of the strings doesn't grow with
+    the number of rows.
+
+    Parameters
+    ----------
+    values : pandas.Series
+        The column of joined lists. A missing value counts as a single missing item, as with
+        str.split followed by explode.
+    separator : str, default ", "
+        What separates the items.
+    dictionary : StringDictionary, default DICTIONARY
+        Where the items are coded.
+
+    Returns
+    -------
+    tuple[numpy.ndarray, numpy.ndarray]
+        The number of items of every row and the codes of all the items, row after row.
+
+    Examples
+    --------
+    >>> split_codes(pd.Series(["Drama, Comedy", "Drama"]))
+    (array([2, 1]), array([0, 1, 0], dtype=int32))
+    """
+    engine = get_engine()
+    local, uniques = engine.factorize(values)
+    lengths, items = engine.split(uniques, separator)
+    lengths = np.concatenate([lengths, [1]])
+    codes = np.concatenate([dictionary.encode(items), np.array([-1], dtype=np.int32)])
+    # the items of the distinct value u are codes[starts[u]:starts[u] + lengths[u]]; the last
+    # "distinct value" is the missing one
+    starts = np.cumsum(lengths) - lengths
+    local = np.where(local >= 0, local, len(uniques))
+    row_lengths = lengths[local]
+    within = np.arange(row_lengths.sum()) - np.repeat(np.cumsum(row_lengths) - row_lengths, row_lengths)
+    return row_lengths, codes[np.repeat(starts[local], row_lengths) + within]
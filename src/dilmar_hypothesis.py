@@ -1,10 +1,149 @@
 from filter import filter_third
+from tracing import traced
+from bootstrap import bootstrap_means
+from sinks import save_figure
 import matplotlib.pyplot as plt # type: ignore
 import seaborn as sns # type: ignore
 import pandas as pd # type: ignore
 import numpy as np # type: ignore
 
-def dilmar_hypothesis(shows_minimum : int, votes_minimum : int):
+def vote_bins(vote_average : pd.Series) -> tuple[np.ndarray, list[str]]:
+    """
+    Divides the range of "vote_average" in equal intervals, as dilmar_bins does.
+
+    Parameters
+    ----------
+    vote_average : pandas.Series
+        The vote averages of the shows.
+
+    Returns
+    -------
+    tuple[numpy.ndarray, list[str]]
+        The edges of the intervals and their names.
+
+    Examples
+    --------
+    >>> vote_bins(pd.Series([2.0, 9.81]))[1]
+    ['[1.9 - 3.04]', '[3.04 - 4.19]', '[4.19 - 5.33]', '[5.33 - 6.48]', '[6.48 - 7.62]', '[7.62 - 8.77]', '[8.77 - 9.91]']
+    """
+    lower_bound = vote_average.min() - 0.1
+    upper_bound = vote_average.max() + 0.1
+    number_bins = int(np.ceil(np.log2((upper_bound-lower_bound)*10) + 1))
+    # Find the upper bound, lower bound and the number of bins,
+    # the lower_bound and upper_bound are subtracted and added to 0.1
+    # so that no series is on the edge of the interval and does not fall into any.
+    # Sturges' rule was used to calculate the amount of bins based in the tenths between lower and upper bound.
+
+    bins = range(number_bins)*(upper_bound -lower_bound)/(number_bins - 1) + lower_bound
+    bins_intervals = [f"[{round(bins[i], 2)} - {round(bins[i+1], 2)}]" for i in range(len(bins) - 1)]
+    # Calculate the bins by dividing the range from lowest to highest note into equal intervals.
+    # Then make an array of strings that name each interval.
+
+    return bins, bins_intervals
+
+@traced
+def dilmar_bins(shows_minimum : int, votes_minimum : int, data : pd.DataFrame=None,
+                resamples : int=0) -> tuple[pd.DataFrame, list[str]]:
+    """
+    Computes the mean "popularity" of every network in each interval of the column "vote_average",
+    the data plotted by dilmar_hypothesis.
+
+    Parameters
+    ----------
+    shows_minimum : int
+        The minimum amount o tv shows a network need.
+    votes_minimum : int
+        The minimum amount of "vote_count" a tv show need.
+    data : pandas.DataFrame, default None
+        The table to be analysed, with the columns of the TMDB dataset. When None, the dataset of the data folder is used.
+    resamples : int, default 0
+        When greater than 0, the number of bootstrap resamples of a 95% confidence interval of
+        every mean popularity.
+
+    Returns
+    -------
+    tuple[pandas.DataFrame, list[str]]
+        The table with the columns 'labels' (the interval), 'networks' and 'popularity' (plus 'low'
+        and 'high', the bounds of the confidence interval, when resamples is given), sorted by
+        popularity, and the names of the intervals in ascending order.
+
+    Raises
+    ------
+    TypeError:
+        When shows_minimum or votes_minimum aren't instances of int.
+    ValueError:
+        When the filter removes every show.
+
+    Examples
+    --------
+    >>> df, bins_intervals = dilmar_bins(10, 150)
+    >>> bins_intervals
+    ['[1.9 - 3.04]', '[3.04 - 4.19]', '[4.19 - 5.33]', '[5.33 - 6.48]', '[6.48 - 7.62]', '[7.62 - 8.76]', '[8.76 - 9.91]']
+    """
+    if not isinstance(shows_minimum, int) or not isinstance(votes_minimum, int):       
+        raise TypeError("check the argument types")
+
+    df = filter_third(shows_minimum,votes_minimum, data)
+    df = df[['name', 'vote_count', 'vote_average', 'popularity', 'networks']]
+    # Receives clean from the filter_third function and then saves only the useful columns.
+
+    df['networks'] = df['networks'].str.split(',')
+    df = df.explode('networks')
+    # Divide the lines that have more than one network into distinct identical lines, each with a distinct network
+
+    bins, bins_intervals = vote_bins(df['vote_average'])
+
+    df['labels'] = pd.cut(df['vote_average'], bins = bins, labels = bins_intervals, right = True)
+    groups = df[['labels', 'networks']]
+    popularity = df['popularity']
+    df = df.groupby(['labels', 'networks'], observed = True)['popularity'].mean().reset_index()
+    df = df.sort_values(by = ['popularity'], ascending=[True])
+    # Label each row with its proper range, then merge the rows with the same label
+    # and network by averaging the popularity column, then sorting in ascending order.
+
+    if resamples > 0:
+        interval = bootstrap_means(popularity, pd.MultiIndex.from_frame(groups.astype(str)).to_flat_index(), resamples)
+        keys = pd.MultiIndex.from_frame(df[['labels', 'networks']].astype(str)).to_flat_index()
+        df['low'] = interval['low'].reindex(keys).to_numpy()
+        df['high'] = interval['high'].reindex(keys).to_numpy()
+        # Bootstrap the mean popularity of every (label, network) for its confidence interval.
+    return df, bins_intervals
+
+@traced
+def plot_bins(df : pd.DataFrame, bins_intervals : list[str], output_dir : str="./output"):
+    """
+    Plots one bar graph per interval of dilmar_bins, the x-axis is "networks" and the y-axis is "popularity".
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        The table returned by dilmar_bins. When it has the columns 'low' and 'high', they are drawn as error bars.
+    bins_intervals : list[str]
+        The names of the intervals returned by dilmar_bins.
+    output_dir : str or sinks.Sink, default "./output"
+        The folder, or the sink, where the graphs are saved, as graph0.png, graph1.png and so on.
+
+    Examples
+    --------
+    >>> plot_bins(*dilmar_bins(10, 150))
+    $
+    """
+    for i in bins_intervals:
+        df_filtrado = df[df['labels'] == i]
+        sns.barplot(x='networks', y='popularity', data = df_filtrado)
+        if 'low' in df_filtrado.columns:
+            plt.errorbar(range(len(df_filtrado)), df_filtrado['popularity'],
+                         yerr=[df_filtrado['popularity'] - df_filtrado['low'], df_filtrado['high'] - df_filtrado['popularity']],
+                         fmt='none', ecolor='black', capsize=3)
+        plt.xticks(rotation=45, ha='right', fontsize = 10)
+        plt.title(f"Vote average bin: {i}", fontsize=16)
+        save_figure(output_dir, f'graph{bins_intervals.index(i)}.png')
+        fig_legend = plt.figure(figsize=(25, 10))
+    # Make a graph for each interval
+
+@traced
+def dilmar_hypothesis(shows_minimum : int, votes_minimum : int, output_dir : str="./output", data : pd.DataFrame=None,
+                      resamples : int=0):
     """
     Create graphs for many intervals of the column "vote_average", the x-axis is "networks" and the y-axis is "popularity"
 
@@ -14,6 +153,12 @@ def dilmar_hypothesis(shows_minimum : int, votes_minimum : int):
         The minimum amount o tv shows a network need.
     votes_minimum : int
         The minimum amount of "vote_count" a tv show need.
+    output_dir : str or sinks.Sink, default "./output"
+        The folder, or the sink, where the graphs are saved.
+    data : pandas.DataFrame, default None
+        The table to be analysed, with the columns of the TMDB dataset. When None, the dataset of the data folder is used.
+    resamples : int, default 0
+        Number of bootstrap resamples of the error bars. With 0, no error bars are drawn.
 
     Examples
     --------
@@ -31,41 +176,8 @@ def dilmar_hypothesis(shows_minimum : int, votes_minimum : int):
 
     try:
 
-        df = filter_third(shows_minimum,votes_minimum)
-        df = df[['name', 'vote_count', 'vote_average', 'popularity', 'networks']]
-        # Receives clean from the filter_third function and then saves only the useful columns.
+        df, bins_intervals = dilmar_bins(shows_minimum, votes_minimum, data, resamples)
         print(df)
-
-        df['networks'] = df['networks'].str.split(',')
-        df = df.explode('networks')
-        # Divide the lines that have more than one network into distinct identical lines, each with a distinct network
-
-        lower_bound = df['vote_average'].min() - 0.1
-        upper_bound = df['vote_average'].max() + 0.1
-        number_bins = int(np.ceil(np.log2((upper_bound-lower_bound)*10) + 1))
-        # Find the upper bound, lower bound and the number of bins,
-        # the lower_bound and upper_bound are subtracted and added to 0.1
-        # so that no series is on the edge of the interval and does not fall into any.
-        # Sturges' rule was used to calculate the amount of bins based in the tenths between lower and upper bound.
-
-        bins = range(number_bins)*(upper_bound -lower_bound)/(number_bins - 1) + lower_bound
-        bins_intervals = [f"[{round(bins[i], 2)} - {round(bins[i+1], 2)}]" for i in range(len(bins) - 1)]
-        # Calculate the bins by dividing the range from lowest to highest note into equal intervals.
-        # Then make an array of strings that name each interval.
-
-        df['labels'] = pd.cut(df['vote_average'], bins = bins, labels = bins_intervals, right = True)
-        df = df.groupby(['labels', 'networks'], observed = True)['popularity'].mean().reset_index()
-        df = df.sort_values(by = ['popularity'], ascending=[True])
-        # Label each row with its proper range, then merge the rows with the same label
-        # and network by averaging the popularity column, then sorting in ascending order.
-
-        for i in bins_intervals:
-            df_filtrado = df[df['labels'] == i]
-            sns.barplot(x='networks', y='popularity', data = df_filtrado)
-            plt.xticks(rotation=45, ha='right', fontsize = 10)
-            plt.title(f"Vote average bin: {i}", fontsize=16)
-            plt.savefig(f'./output/graph{bins_intervals.index(i)}.png')
-            fig_legend = plt.figure(figsize=(25, 10))
-        # Make a graph for each interval
+        plot_bins(df, bins_intervals, output_dir)
     except OverflowError:
         print("Error: the filter is removing all the lines. Change the parameters.")
@@ -0,0 +1,167 @@
+import contextlib
+import os
+import threading
+import numpy as np
+import pandas as pd
+
+class PandasEngine:
+    """
+    The operations on the text columns that the filters and aggregations are built on, done with
+    pandas and Python strings. The default engine.
+
+    Every engine returns the same numpy arrays and frames, so the functions on top of them give the
+    same results whatever the engine.
+    """
+    name = 'pandas'
+
+    def factorize(self, values) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Returns the code of every value, its position in the distinct values in order of appearance
+        (-1 for missing ones), and the distinct values.
+        """
+        codes, uniques = pd.factorize(pd.Series(values, dtype=object))
+        return codes, np.asarray(uniques, dtype=object)
+
+    def split(self, values, separator : str) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Splits every (non-missing) string of values by separator, returning the number of items of
+        every value and all the items, value after value.
+        """
+        items = [str(value).split(separator) for value in values]
+        return (np.array([len(value) for value in items], dtype=np.int64),
+                np.array([item for value in items for item in value], dtype=object))
+
+    def years(self, dates) -> np.ndarray:
+        """
+        Returns the year of every (non-missing) date written as "year-month-day".
+        """
+        return np.array([int(date.split('-')[0]) for date in dates], dtype=int)
+
+    def valid(self, values : pd.Series) -> np.ndarray:
+        """
+        Marks the values that are neither missing nor 0.
+        """
+        return values.notna().to_numpy() & (values.to_numpy() != 0)
+
+    def group_sum(self, frame : pd.DataFrame, keys : list[str], columns : list[str]) -> pd.DataFrame:
+        """
+        Sums columns per distinct combination of keys, returning a frame with the keys and the sums,
+        in no particular order.
+        """
+        return frame.groupby(keys, sort=False)[columns].sum().reset_index()
+
+class ArrowEngine(PandasEngine):
+    """
+    The operations of PandasEngine done with the kernels of pyarrow.compute, which split, parse and
+    hash the strings in native code, the group-bys in many threads.
+
+    Raises
+    ------
+    ImportError:
+        When pyarrow isn't installed.
+    """
+    name = 'arrow'
+
+    def __init__(self):
+        import pyarrow
+        import pyarrow.compute
+        self.pa = pyarrow
+        self.pc = pyarrow.compute
+
+    def _strings(self, values):
+        return self.pa.array(np.asarray(values, dtype=object), type=self.pa.string(), from_pandas=True)
+
+    def factorize(self, values) -> tuple[np.ndarray, np.ndarray]:
+        encoded = self.pc.dictionary_encode(self._strings(values))
+        codes = encoded.indices.fill_null(-1).to_numpy(zero_copy_only=False).astype(np.int64)
+        return codes, encoded.dictionary.to_numpy(zero_copy_only=False).astype(object)
+
+    def split(self, values, separator : str) -> tuple[np.ndarray, np.ndarray]:
+        lists = self.pc.split_pattern(self._strings(values), separator)
+        return (self.pc.list_value_length(lists).to_numpy(zero_copy_only=False).astype(np.int64),
+                self.pc.list_flatten(lists).to_numpy(zero_copy_only=False).astype(object))
+
+    def years(self, dates) -> np.ndarray:
+        parts = self.pc.split_pattern(self._strings(dates), '-', max_splits=1)
+        years = self.pc.cast(self.pc.list_element(parts, 0), self.pa.int64())
+        return years.to_numpy(zero_copy_only=False).astype(int)
+
+    def valid(self, values : pd.Series) -> np.ndarray:
+        if values.dtype == object:
+            # text isn't compared with 0, as in pandas
+            array = self._strings(values)
+            return self.pc.is_valid(array).to_numpy(zero_copy_only=False)
+        array = self.pa.array(values.to_numpy(), from_pandas=True)
+        valid = self.pc.and_(self.pc.is_valid(array), self.pc.not_equal(array, 0))
+        return valid.fill_null(False).to_numpy(zero_copy_only=False)
+
+    def group_sum(self, frame : pd.DataFrame, keys : list[str], columns : list[str]) -> pd.DataFrame:
+        table = self.pa.Table.from_pandas(frame[keys + columns], preserve_index=False)
+        summed = table.group_by(keys, use_threads=True).aggregate([(column, 'sum') for column in columns])
+        summed = summed.rename_columns([name[:-len('_sum')] if name.endswith('_sum') else name
+                                        for name in summed.column_names])
+        return summed.to_pandas()[keys + columns]
+
+# engine name -> its class
+ENGINES = {'pandas': PandasEngine, 'arrow': ArrowEngine}
+
+# the engine used when the program starts, 'pandas' when the variable isn't set
+ENGINE_VAR = 'TMDB_ENGINE'
+
+_engine = None
+# the engines of the using blocks open in each thread, innermost last
+_using = threading.local()
+
+def _create(name : str) -> PandasEngine:
+    if name not in ENGINES:
+        raise ValueError(f"engine must be one of {list(ENGINES)}")
+    return ENGINES[name]()
+
+def set_engine(name : str) -> PandasEngine:
+    """
+    Makes name ('pandas' or 'arrow') the engine of every filter and aggregation, in every thread,
+    and returns it. Inside a using block, that block's engine is still used by its thread.
+
+    Raises
+    ------
+    ValueError:
+        When the engine is unknown.
+    ImportError:
+        When the engine needs a package that isn't installed.
+    """
+    global _engine
+    _engine = _create(name)
+    return _engine
+
+def get_engine() -> PandasEngine:
+    """
+    Returns the engine in use: the one of the innermost using block of this thread, if any, and
+    otherwise the one named by the variable TMDB_ENGINE (pandas by default) until set_engine is called.
+    """
+    engines = getattr(_using, 'engines', None)
+    if engines:
+        return engines[-1]
+    if _engine is None:
+        set_engine(os.environ.get(ENGINE_VAR) or 'pandas')
+    return _engine
+
+@contextlib.contextmanager
+def using(name : str):
+    """
+    Uses the engine name inside a with block, in the current thread only, restoring the previous
+    engine after it. Other threads keep their engines.
+
+    Examples
+    --------
+    >>> with using('arrow'):
+    ...     table = filter_second(100, [2022, 2023])
+    """
+    engine = _create(name)
+    engines = getattr(_using, 'engines', None)
+    if engines is None:
+        engines = _using.engines = []
+    engines.append(engine)
+    try:
+        yield engine
+    finally:
+        engines.pop()
@@ -2,12 +2,131 @@ import pandas as pd
 import numpy as np
 import os
 import sys
+import threading
+import warnings
+import weakref
+
+from tracing import span, traced
+from memory import track
+from dictionary import DICTIONARY, split_codes
+from ingest import read_tables
+from join import id_index
+from trigram import drop_name_index
+from sketches import NetworkSketch
+from engine import get_engine
+
+# columns whose rows the filters need non-null and non-zero
+VALIDITY_COLUMNS = ['name', 'vote_count', 'vote_average', 'number_of_episodes', 'popularity', 'genres', 'networks', 'first_air_date']
+
+# id of a table -> (weak reference to it, packed validity bits of its columns)
+_validity = {}
+
+def _kept_bits(data : pd.DataFrame, bits : dict=None) -> dict:
+    # the packed validity bits kept for data, column -> bits, starting with bits when there are none
+    key = id(data)
+    entry = _validity.get(key)
+    if entry is None or entry[0]() is not data:
+        entry = (weakref.ref(data, lambda _: _validity.pop(key, None)), {} if bits is None else bits)
+        _validity[key] = entry
+    return entry[1]
+
+def valid_rows(data : pd.DataFrame, columns : list[str]) -> np.ndarray:
+    """
+    Marks the rows of data where every one of columns is non-null and non-zero, the rows that
+    replace(to_replace=0, value=np.nan).dropna() would keep.
+
+    The marks of each column are computed once per table, packed 8 rows per byte, and kept while
+    the table exists, so every filter just ANDs the packed masks of its columns. When rows of the
+    table are changed in place afterwards, rows_changed must be called, as delta.apply_delta does.
+
+    Examples
+    --------
+    >>> raw_file[valid_rows(raw_file, ['name', 'vote_count'])]
+    """
+    bits = _kept_bits(data)
+    for column in columns:
+        if column not in bits:
+            values = data[column]
+            bits[column] = np.packbits(get_engine().valid(values))
+    packed = np.bitwise_and.reduce([bits[column] for column in columns])
+    return np.unpackbits(packed, count=len(data)).view(bool)
+
+def rows_changed(data : pd.DataFrame, positions, previous : pd.DataFrame=None) -> None:
+    """
+    Brings the indexes kept for data up to date after the rows at positions were changed in place:
+    the validity bits of just those rows are computed again, and the name index (see
+    trigram.name_index) is dropped, to be built again when it's next used. Their ids must stay the same.
+
+    When data is previous with rows appended, positions being those rows, the bits kept for
+    previous are carried over to data first, so the ones of the other rows aren't computed again.
+
+    Examples
+    --------
+    >>> raw_file.iloc[[3, 8], raw_file.columns.get_loc('genres')] = "Drama"
+    >>> rows_changed(raw_file, [3, 8])
+    """
+    drop_name_index(data)
+    kept = _validity.get(id(previous)) if previous is not None else None
+    if kept is not None and kept[0]() is previous:
+        # the bits past the end of previous are 0, as np.packbits pads them
+        size = (len(data) + 7) // 8
+        _kept_bits(data, {column: np.concatenate([bits, np.zeros(size - len(bits), dtype=np.uint8)])
+                          for column, bits in kept[1].items()})
+    entry = _validity.get(id(data))
+    if entry is None or entry[0]() is not data:
+        return
+    positions = np.asarray(positions, dtype=np.int64)
+    # the bit of every row, from the most significant one of its byte, as np.packbits puts them
+    byte, bit = np.divmod(positions, 8)
+    flags = (0x80 >> bit).astype(np.uint8)
+    for column, bits in entry[1].items():
+        valid = get_engine().valid(data[column].iloc[positions])
+        # .at, as many of the rows can share a byte
+        np.bitwise_and.at(bits, byte, ~flags)
+        np.bitwise_or.at(bits, byte[valid], flags[valid])
+
+def _id_mask(data : pd.DataFrame, ids) -> np.ndarray:
+    # marks the rows of data with the given ids (every row when ids is None), through its id index
+    if ids is None:
+        return np.ones(len(data), dtype=bool)
+    positions = id_index(data).positions(np.asarray(ids, dtype=data['id'].dtype))
+    mask = np.zeros(len(data), dtype=bool)
+    mask[positions[positions >= 0]] = True
+    return mask
 
 #global variables
 file_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'data/TMDB_tv_dataset_v3.csv'))
-raw_file = pd.read_csv(file_path, delimiter=",")
+# when this variable holds paths or glob patterns (separated by os.pathsep), the dataset is read from
+# those files instead, see ingest.read_tables
+DATA_VAR = 'TMDB_DATA'
+_loading = threading.Lock()
+
+def dataset() -> pd.DataFrame:
+    """
+    Returns raw_file, the dataset of the data folder (or of the files in TMDB_DATA), read the first
+    time it's used, so importing this module reads nothing. Assigning raw_file replaces it.
+    """
+    global raw_file
+    if 'raw_file' not in globals():
+        with _loading:
+            if 'raw_file' not in globals():
+                data = read_tables(os.environ[DATA_VAR].split(os.pathsep) if os.environ.get(DATA_VAR) else file_path)
+                # the validity masks and the id index of the dataset are built once, at load; the
+                # name index when it's first used, as just the searches by name need it
+                with span("indexes"):
+                    valid_rows(data, VALIDITY_COLUMNS)
+                    id_index(data)
+                raw_file = data
+    return raw_file
+
+def __getattr__(name : str):
+    # raw_file, until it's read or assigned, see dataset
+    if name == 'raw_file':
+        return dataset()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-def filter_first(votes_minimum: int = 0) -> pd.DataFrame:
+@traced
+def filter_first(votes_minimum: int = 0, data: pd.DataFrame = None, ids = None) -> pd.DataFrame:
     """
     Filters the TMDB TV Shows database by applying some initial criteria based on the number of votes
     and episodes, and ensures that shows with episodes but no seasons are assigned at least one season.
@@ -16,6 +135,14 @@ def filter_first(votes_minimum: int = 0) -> pd.DataFrame:
     ----------
     votes_minimum : int, default 0
         The minimum number of votes that a show must have to be included in the filtered dataset.
+    data : pandas.DataFrame, default None
+        The table to be filtered, with the columns of the TMDB dataset. When None, the dataset
+        of the data folder (raw_file) is used. It isn't changed; the seasons are fixed in the result.
+        When it has the column 'avg_ep_per_season' (such as the real mean of the season export,
+        attached with join.attach), it's used instead of episodes / seasons for the shows that have it.
+    ids : array-like, default None
+        Keeps just the shows with these ids, such as the ids found by trigram.name_index(data).
+        When None, every show.
 
     Returns
     -------
@@ -61,26 +188,83 @@ def filter_first(votes_minimum: int = 0) -> pd.DataFrame:
 
     [55661 rows x 6 columns]
     """
-    # Ensure that shows with episodes but no seasons are assigned at least one season
-    raw_file.loc[(raw_file['number_of_episodes'] > 0) & (raw_file['number_of_seasons'] == 0), 'number_of_seasons'] = 1
+    if data is None:
+        data = dataset()
 
+    # Filter series that do not have the minimum number of required evaluations, nor a valid name, votes and episodes
+    valid = valid_rows(data, ['name', 'vote_count', 'vote_average', 'number_of_episodes'])
+    df_filtered = data.loc[valid & _id_mask(data, ids) & (data['vote_count'] >= votes_minimum) & (data['number_of_episodes'] > 0),
+                           ['name', 'number_of_episodes', 'number_of_seasons', 'vote_average', 'popularity']]
+    track("filter_first.valid", df_filtered)
 
-    # Filter series that do not have the minimum number of required evaluations
-    df_filtered = raw_file[(raw_file['vote_count'] >= votes_minimum) & (raw_file['number_of_episodes'] > 0)].copy()
+    # Ensure that shows with episodes but no seasons are assigned at least one season, in the
+    # selected rows (which all have episodes) rather than in data, which other versions may share
+    seasons = df_filtered['number_of_seasons']
+    df_filtered['number_of_seasons'] = seasons.mask(seasons == 0, 1)
     
-    df_index = df_filtered[['name', 'vote_count', 'vote_average', 'number_of_episodes']].replace(to_replace=0, value=np.nan).dropna().index
-    df_filtered = df_filtered.loc[df_index].copy()
-    df_filtered = df_filtered[['name', 'number_of_episodes', 'number_of_seasons', 'vote_average', 'popularity']]
-    
-    # Calculate the average number of episodes per season
+    # Calculate the average number of episodes per season, unless it's attached to the shows
     df_filtered['avg_ep_per_season'] = np.floor(df_filtered['number_of_episodes'] / df_filtered['number_of_seasons'])
+    if 'avg_ep_per_season' in data.columns:
+        attached = data.loc[df_filtered.index, 'avg_ep_per_season']
+        df_filtered['avg_ep_per_season'] = attached.fillna(df_filtered['avg_ep_per_season'])
     
     # Drop rows with NaN values in 'vote_average'
     df_filtered = df_filtered.dropna(subset=['vote_average'])
+    track("filter_first.result", df_filtered)
     
     return df_filtered
 
-def filter_second(shows_minimum : int, date_interval : list[int]=[0, 9999]) -> pd.DataFrame:
+def _explode_second(data : pd.DataFrame, date_interval : list[int], ids=None) -> pd.DataFrame:
+    # the part of filter_second that looks at each row alone, so it can be applied to any subset of rows
+    # drop nan or nulled rows
+    with span("filter_second.valid_rows", len(data)) as stage:
+        rows = np.flatnonzero(valid_rows(data, ['name', 'vote_count', 'vote_average', 'popularity', 'genres', 'networks', 'first_air_date'])
+                              & _id_mask(data, ids))
+        # drop rows that aren't in the range of the years passed, parsing every distinct date once
+        dates, uniques = get_engine().factorize(data['first_air_date'].to_numpy()[rows])
+        years = get_engine().years(uniques)[dates]
+        flt_data = data.iloc[rows[(years >= date_interval[0]) & (years <= date_interval[1])]]
+        track("filter_second.in_years", flt_data)
+        stage.rows_out = len(flt_data)
+    # taking every row with more than 1 value per field and creating new rows for each value encontered,
+    # every genre of a row paired with every network of the row, as exploding genres and then networks
+    with span("filter_second.explode", len(flt_data)) as stage:
+        genre_counts, genre_codes = split_codes(flt_data['genres'])
+        network_counts, network_codes = split_codes(flt_data['networks'])
+        genre_rows = np.repeat(np.arange(len(flt_data)), genre_counts)
+        pairs = network_counts[genre_rows]
+        rows = np.repeat(genre_rows, pairs)
+        within = np.arange(len(rows)) - np.repeat(np.cumsum(pairs) - pairs, pairs)
+        network_starts = np.cumsum(network_counts) - network_counts
+        # the strings are decoded from the dictionary, so the exploded rows share them
+        flt_data = flt_data.iloc[rows].assign(genres=DICTIONARY.decode(np.repeat(genre_codes, pairs)),
+                                              networks=DICTIONARY.decode(network_codes[network_starts[rows] + within]))
+        track("filter_second.exploded", flt_data)
+        stage.rows_out = len(flt_data)
+    return flt_data
+
+def _networks_kept(networks : pd.Series, genres : pd.Series, shows_minimum : int) -> np.ndarray:
+    # marks the rows of the networks with more than shows_minimum rows with a genre, counted over the
+    # dictionary codes of the networks instead of grouping their strings
+    codes = DICTIONARY.encode(networks)
+    counts = np.bincount(codes[codes >= 0], weights=genres.notna().to_numpy()[codes >= 0], minlength=len(DICTIONARY))
+    kept = (codes >= 0) & (counts[codes] > shows_minimum)
+    if len(kept) and not kept.any():
+        warnings.warn(f"no network has more than {shows_minimum} shows, every row was filtered out")
+    return kept
+
+def _check_second(shows_minimum : int, date_interval : list[int]) -> None:
+    # the argument checks of filter_second and filter_second_stream
+    if not isinstance(shows_minimum, int) or not isinstance(date_interval[0], int) or len(date_interval) != 2:
+        raise TypeError("check the argument types")
+    if not isinstance(date_interval[1], int):
+        raise TypeError("check the argument types")
+    if date_interval[0] > date_interval[1]:
+        raise ValueError("the first element of date_interval must be less or equal the second")
+
+@traced
+def filter_second(shows_minimum : int, date_interval : list[int]=[0, 9999], data : pd.DataFrame=None,
+                  ids=None) -> pd.DataFrame:
     """
     Filters the TMDB TV Shows database presented in the data folder, accordingly with the needs 
     of the 2nd hypotheses (aka. hipotheses_silvio).
@@ -93,6 +277,12 @@ def filter_second(shows_minimum : int, date_interval : list[int]=[0, 9999]) -> p
     date_interval : list[int], default [0, 9999]
         A list with two elements, which represents the interval of time (in years) in which the 
         shows needs to have been aired in order to be kept in the dataset.
+    data : pandas.DataFrame, default None
+        The table to be filtered, with the columns of the TMDB dataset. When None, the dataset
+        of the data folder (raw_file) is used.
+    ids : array-like, default None
+        Keeps just the shows with these ids, such as the ids found by trigram.name_index(data),
+        before the shows of the networks are counted. When None, every show.
 
     Returns
     -------
@@ -141,29 +331,17 @@ def filter_second(shows_minimum : int, date_interval : list[int]=[0, 9999]) -> p
         [1057 rows x 29 columns]
         
     """
-    if not isinstance(shows_minimum, int) or not isinstance(date_interval[0], int) or len(date_interval) != 2:
-        raise TypeError("check the argument types")
-    if not isinstance(date_interval[1], int):
-        raise TypeError("check the argument types")
-    if date_interval[0] > date_interval[1]:
-        raise ValueError("the first element of date_interval must be less or equal the second")
-    
-    # drop nan or nulled rows
-    raw_data = raw_file[['name', 'vote_count', 'vote_average', 'popularity', 'genres', 'networks', 'first_air_date']].replace(to_replace=0, value=np.nan).dropna()
-    # drop rows that aren't in the range of the years passed
-    data_index = raw_data[[int(item[0]) >= date_interval[0] and int(item[0]) <= date_interval[1] for item in raw_data['first_air_date'].str.split('-')[:].tolist()]].index
-    flt_data = (raw_file.loc[data_index]).copy()
-    # taking every row with more than 1 value per field and creating new rows for each value encontered
-    flt_data['genres'] = flt_data['genres'].str.split(", ")
-    flt_data['networks'] = flt_data['networks'].str.split(", ")
-    flt_data = flt_data.explode('genres').explode('networks')
-    spl_data = flt_data[['networks', 'genres']].copy()
+    _check_second(shows_minimum, date_interval)
+    flt_data = _explode_second(dataset() if data is None else data, date_interval, ids)
     # mantaining just the networks with a minimum count of shows
-    net_list = (spl_data.groupby('networks').count() > shows_minimum).replace(to_replace=False, value=np.nan).dropna().reset_index()['networks'].tolist()
-    flt_data = flt_data[flt_data['networks'].isin(net_list)]
-    return flt_data.copy()
+    with span("filter_second.network_count", len(flt_data)):
+        kept = _networks_kept(flt_data['networks'], flt_data['genres'], shows_minimum)
+    flt_data = flt_data[kept].copy()
+    track("filter_second.result", flt_data, copied=True)
+    return flt_data
 
-def filter_third(shows_minimum : int, votes_minimum : int=1) -> pd.DataFrame:
+@traced
+def filter_third(shows_minimum : int, votes_minimum : int=1, data : pd.DataFrame=None, ids=None) -> pd.DataFrame:
     """
     Filters the TMDB TV Shows database presented in the data folder, accordingly with the needs 
     of the 3rd hypotheses (aka. hipotheses_dilmar).
@@ -175,6 +353,12 @@ def filter_third(shows_minimum : int, votes_minimum : int=1) -> pd.DataFrame:
         in the dataset.
     votes_minimum : int, default 1
         Minimum number of votes a series needs to have in order to continue in the dataset.
+    data : pandas.DataFrame, default None
+        The table to be filtered, with the columns of the TMDB dataset. When None, the dataset
+        of the data folder (raw_file) is used.
+    ids : array-like, default None
+        Keeps just the shows with these ids, such as the ids found by trigram.name_index(data),
+        before the shows of the networks are counted. When None, every show.
 
     Returns
     -------
@@ -226,11 +410,133 @@ def filter_third(shows_minimum : int, votes_minimum : int=1) -> pd.DataFrame:
     if not isinstance(shows_minimum, int) or not isinstance(votes_minimum, int): 
         raise TypeError("check the argument types")
     
+    if data is None:
+        data = dataset()
+
     # drop nan or nulled rows
-    data_idx = raw_file[['name', 'vote_count', 'vote_average', 'popularity', 'networks']].replace(to_replace=0, value=np.nan).dropna().index
-    raw_data = raw_file.loc[data_idx]
-    flt_data = (raw_data[raw_data['vote_count'] >= votes_minimum]).copy()
-    sub_data = flt_data[['networks', 'genres']].copy()
+    valid = valid_rows(data, ['name', 'vote_count', 'vote_average', 'popularity', 'networks'])
+    flt_data = data[valid & _id_mask(data, ids) & (data['vote_count'] >= votes_minimum)].copy()
+    track("filter_third.votes", flt_data, copied=True)
     # filter by minimum number of shows per network
-    net_list = (sub_data.groupby('networks').count() > shows_minimum).replace(to_replace=False, value=np.nan).dropna().reset_index()['networks'].tolist()
-    return flt_data[flt_data['networks'].isin(net_list)].copy()
\ No newline at end of file
+    with span("filter_third.network_count", len(flt_data)):
+        kept = _networks_kept(flt_data['networks'], flt_data['genres'], shows_minimum)
+    flt_data = flt_data[kept].copy()
+    track("filter_third.result", flt_data, copied=True)
+    return flt_data
+
+def _networks_kept_sketched(flt_data : pd.DataFrame, sketch : NetworkSketch, shows_minimum : int,
+                            warn : bool=True) -> np.ndarray:
+    # marks the rows of the networks whose sketched count is surely above shows_minimum, and of the
+    # networks near it whose exact count, over their rows only, is above it
+    bounds = sketch.bounds()
+    near = bounds.index[(bounds['lower'] <= shows_minimum) & (bounds['upper'] > shows_minimum)]
+    networks = flt_data['networks']
+    kept = networks.isin(bounds.index[bounds['lower'] > shows_minimum]).to_numpy()
+    near_rows = networks.isin(near).to_numpy()
+    with span("network_recheck", int(near_rows.sum())):
+        codes = DICTIONARY.encode(networks[near_rows])
+        counts = np.bincount(codes, weights=flt_data['genres'][near_rows].notna().to_numpy(), minlength=len(DICTIONARY))
+        kept[near_rows] = counts[codes] > shows_minimum
+    if warn and len(kept) and not kept.any():
+        warnings.warn(f"no network has more than {shows_minimum} shows, every row was filtered out")
+    return kept
+
+@traced
+def filter_second_stream(chunks, shows_minimum : int, date_interval : list[int]=[0, 9999]) -> pd.DataFrame:
+    """
+    filter_second over a table read in chunks, such as pd.read_csv(path, chunksize=100000), in a
+    single pass: the rows of every chunk are exploded and filtered as they arrive, while a
+    NetworkSketch counts the shows of the networks.
+
+    The rows of a network are kept as soon as its sketched count is surely above shows_minimum;
+    just the rows of the other networks are held until the end, when the ones near shows_minimum
+    are counted again exactly, over their rows, and the rest dropped. So the result is the same as
+    filter_second's over the whole table, with high probability, in the same order.
+
+    Parameters
+    ----------
+    chunks : iterable of pandas.DataFrame
+        The parts of the table, with the columns of the TMDB dataset.
+    shows_minimum : int
+        As in filter_second.
+    date_interval : list[int], default [0, 9999]
+        As in filter_second.
+
+    Returns
+    -------
+    pandas.Dataframe
+        The filtered rows of all the chunks, an empty table when there are no chunks.
+
+    Raises
+    ------
+    TypeError, ValueError:
+        As filter_second.
+
+    Examples
+    --------
+    >>> filter_second_stream(pd.read_csv(path, chunksize=100000), 100, [2022, 2023])
+    """
+    _check_second(shows_minimum, date_interval)
+    sketch = NetworkSketch(exploded=True)
+    # the networks surely above shows_minimum; as their counts only grow, they stay so
+    sure = set()
+    # (rows, their positions in the stream) kept, and held until their networks are known
+    kept, held = [], []
+    seen = 0
+    for chunk in chunks:
+        rows = _explode_second(chunk, date_interval)
+        sketch.update(rows)
+        positions = np.arange(seen, seen + len(rows))
+        seen += len(rows)
+        bounds = sketch.bounds()
+        surer = set(bounds.index[bounds['lower'] > shows_minimum]) - sure
+        sure |= surer
+        surely = rows['networks'].isin(sure).to_numpy()
+        kept.append((rows[surely], positions[surely]))
+        held.append((rows[~surely], positions[~surely]))
+        if surer:
+            # the held rows of the networks that just got above shows_minimum are kept, the rest held in one piece
+            rows = pd.concat([rows for rows, _ in held])
+            positions = np.concatenate([positions for _, positions in held])
+            surely = rows['networks'].isin(surer).to_numpy()
+            kept.append((rows[surely], positions[surely]))
+            held = [(rows[~surely], positions[~surely])]
+    if not kept:
+        return pd.DataFrame()
+
+    rows = pd.concat([rows for rows, _ in held])
+    near = _networks_kept_sketched(rows, sketch, shows_minimum, warn=False)
+    kept.append((rows[near], np.concatenate([positions for _, positions in held])[near]))
+    positions = np.concatenate([positions for _, positions in kept])
+    # back in the order of the stream
+    flt_data = pd.concat([rows for rows, _ in kept]).iloc[np.argsort(positions, kind='stable')].copy()
+    if seen and flt_data.empty:
+        warnings.warn(f"no network has more than {shows_minimum} shows, every row was filtered out")
+    track("filter_second_stream.result", flt_data, copied=True)
+    return flt_data
+
+@traced
+def filter_third_stream(chunks, shows_minimum : int, votes_minimum : int=1) -> pd.DataFrame:
+    """
+    filter_third over a table read in chunks, in a single pass, as filter_second_stream does. The
+    shows of every network are counted once even when they are in many chunks.
+
+    Examples
+    --------
+    >>> filter_third_stream(pd.read_csv(path, chunksize=100000), 100, 100)
+    """
+    if not isinstance(shows_minimum, int) or not isinstance(votes_minimum, int):
+        raise TypeError("check the argument types")
+    sketch = NetworkSketch(exploded=False)
+    kept = []
+    for chunk in chunks:
+        valid = valid_rows(chunk, ['name', 'vote_count', 'vote_average', 'popularity', 'networks'])
+        rows = chunk[valid & (chunk['vote_count'] >= votes_minimum)]
+        sketch.update(rows)
+        kept.append(rows)
+    if not kept:
+        return pd.DataFrame()
+    flt_data = pd.concat(kept)
+    flt_data = flt_data[_networks_kept_sketched(flt_data, sketch, shows_minimum)].copy()
+    track("filter_third_stream.result", flt_data, copied=True)
+    return flt_data
@@ -0,0 +1,162 @@
+import concurrent.futures
+import glob
+import os
+import numpy as np
+import pandas as pd
+
+from tracing import span
+
+# the columns of the TMDB dataset and their types; text columns are kept as Python strings
+SCHEMA = {
+    'id': 'int64',
+    'name': 'object',
+    'number_of_seasons': 'int64',
+    'number_of_episodes': 'int64',
+    'original_language': 'object',
+    'vote_count': 'int64',
+    'vote_average': 'float64',
+    'overview': 'object',
+    'adult': 'bool',
+    'backdrop_path': 'object',
+    'first_air_date': 'object',
+    'last_air_date': 'object',
+    'homepage': 'object',
+    'in_production': 'bool',
+    'original_name': 'object',
+    'popularity': 'float64',
+    'poster_path': 'object',
+    'type': 'object',
+    'status': 'object',
+    'tagline': 'object',
+    'genres': 'object',
+    'created_by': 'object',
+    'languages': 'object',
+    'networks': 'object',
+    'origin_country': 'object',
+    'spoken_languages': 'object',
+    'production_companies': 'object',
+    'production_countries': 'object',
+    'episode_run_time': 'int64',
+}
+
+def expand(paths) -> list[str]:
+    """
+    Expands a path, a glob pattern or a list of them into the list of files they name. The files
+    of each pattern are sorted by name; the order of the list is kept.
+
+    Raises
+    ------
+    FileNotFoundError:
+        When a path or pattern doesn't name any file.
+    """
+    if isinstance(paths, str):
+        paths = [paths]
+    files = []
+    for path in paths:
+        found = sorted(glob.glob(path)) if glob.has_magic(path) else [path] if os.path.exists(path) else []
+        if not found:
+            raise FileNotFoundError(f"no file matches {path!r}")
+        files.extend(found)
+    return files
+
+def _arrow_types(schema : dict) -> dict:
+    # the pyarrow types of the schema
+    import pyarrow as pa
+    types = {'int64': pa.int64(), 'float64': pa.float64(), 'bool': pa.bool_(), 'object': pa.string()}
+    return {column: types[dtype] for column, dtype in schema.items()}
+
+def read_table(path : str, schema : dict=SCHEMA, engine : str=None) -> pd.DataFrame:
+    """
+    Reads one CSV file, parsing the columns of schema with their types. Columns of the file outside
+    the schema have their types inferred; columns of the schema missing from the file are left out.
+
+    Parameters
+    ----------
+    path : str
+        The CSV file.
+    schema : dict, default SCHEMA
+        Column name -> 'int64', 'float64', 'bool' or 'object'.
+    engine : str, default None
+        'pyarrow', the multithreaded reader of pyarrow, or 'pandas'. When None, pyarrow when it's
+        installed and pandas otherwise.
+
+    Raises
+    ------
+    ImportError:
+        When engine is 'pyarrow' and pyarrow isn't installed.
+    ValueError:
+        When a value can't be parsed with the type of its column, or the engine is unknown.
+    """
+    if engine is None:
+        try:
+            import pyarrow.csv # noqa: F401
+            engine = 'pyarrow'
+        except ImportError:
+            engine = 'pandas'
+    with span("read_csv") as stage:
+        if engine == 'pyarrow':
+            import pyarrow.csv
+            # empty text is missing, as for pandas, instead of ""
+            convert = pyarrow.csv.ConvertOptions(column_types=_arrow_types(schema), strings_can_be_null=True)
+            table = pyarrow.csv.read_csv(path, convert_options=convert).to_pandas()
+            # the missing text is NaN, as pandas reads it, instead of None
+            text = table.columns[table.dtypes == object]
+            table[text] = table[text].where(table[text].notna(), np.nan)
+        elif engine == 'pandas':
+            columns = pd.read_csv(path, nrows=0).columns
+            table = pd.read_csv(path, dtype={column: dtype for column, dtype in schema.items() if column in columns})
+        else:
+            raise ValueError("engine must be 'pyarrow' or 'pandas'")
+        stage.rows_out = len(table)
+    return table
+
+def read_tables(paths, workers : int=4, schema : dict=SCHEMA, engine : str=None) -> pd.DataFrame:
+    """
+    Reads many CSV files of the TMDB dataset, such as monthly snapshots or regional extracts, into
+    one table, parsing the files in parallel threads.
+
+    Shows are identified by their 'id'. When a show is in more than one file, the row of the last
+    file is kept, so the snapshots must be given from the oldest to the newest (as the names of
+    dated files, such as tmdb-2024-05.csv, sort).
+
+    Parameters
+    ----------
+    paths : str or list[str]
+        Paths or glob patterns of the files, see expand.
+    workers : int, default 4
+        Number of files parsed at the same time.
+    schema : dict, default SCHEMA
+        The types of the columns, see read_table.
+    engine : str, default None
+        The CSV reader, see read_table.
+
+    Returns
+    -------
+    pandas.DataFrame
+        One row per show, in the order of the files, indexed from 0. Columns missing from some of
+        the files are empty in their rows.
+
+    Raises
+    ------
+    FileNotFoundError:
+        When a path or pattern doesn't name any file.
+    ValueError:
+        When a file has values of the wrong type.
+
+    Examples
+    --------
+    >>> read_tables("data/snapshots/tmdb-*.csv")
+               id                 name  ...
+    0        1399      Game of Thrones  ...
+    ...
+    """
+    files = expand(paths)
+    with concurrent.futures.ThreadPoolExecutor(max(1, min(workers, len(files)))) as pool:
+        tables = list(pool.map(lambda path: read_table(path, schema, engine), files))
+    with span("deduplicate", sum(len(table) for table in tables)) as stage:
+        table = tables[0] if len(tables) == 1 else pd.concat(tables, ignore_index=True)
+        if not table['id'].is_unique:
+            table = table.drop_duplicates('id', keep='last')
+        table = table.reset_index(drop=True)
+        stage.rows_out = len(table)
+    return table
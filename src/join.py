@@ -0,0 +1,154 @@
+import weakref
+import numpy as np
+import pandas as pd
+
+class IdIndex:
+    """
+    Sorted index of the column 'id' of a table: the ids in ascending order and the position of
+    each of them in the table, so ids are found by binary search instead of a merge.
+
+    Parameters
+    ----------
+    ids : array-like
+        The ids, in the order of the rows of the table.
+
+    Attributes
+    ----------
+    unique : bool
+        Whether no id is repeated, as in a primary key.
+
+    Examples
+    --------
+    >>> index = IdIndex([30, 10, 20])
+    >>> index.positions([20, 40, 30])
+    array([ 2, -1,  0])
+    """
+    def __init__(self, ids):
+        ids = np.asarray(ids)
+        self.size = len(ids)
+        self.order = np.argsort(ids, kind='stable')
+        self.sorted = ids[self.order]
+        self.unique = bool((self.sorted[1:] != self.sorted[:-1]).all())
+
+    def appended(self, ids) -> 'IdIndex':
+        """
+        Returns the IdIndex of the table with rows of ids appended, merging them into the sorted ids
+        instead of sorting all of them again.
+        """
+        ids = np.asarray(ids)
+        order = np.argsort(ids, kind='stable')
+        # after the equal ids already there, as a stable sort of all the rows would put them
+        where = np.searchsorted(self.sorted, ids[order], side='right')
+        index = IdIndex.__new__(IdIndex)
+        index.size = self.size + len(ids)
+        index.order = np.insert(self.order, where, order + self.size)
+        index.sorted = np.insert(self.sorted, where, ids[order])
+        index.unique = bool((index.sorted[1:] != index.sorted[:-1]).all())
+        return index
+
+    def positions(self, ids) -> np.ndarray:
+        """
+        Returns the position in the table of the (first) row of every id, or -1 when it's missing.
+        """
+        ids = np.asarray(ids)
+        if self.size == 0:
+            return np.full(len(ids), -1)
+        found = np.minimum(np.searchsorted(self.sorted, ids), self.size - 1)
+        return np.where(self.sorted[found] == ids, self.order[found], -1)
+
+# id of a table -> (weak reference to it, its IdIndex)
+_indexes = {}
+
+def id_index(data : pd.DataFrame, previous : pd.DataFrame=None) -> IdIndex:
+    """
+    Returns the IdIndex of the column 'id' of data, built the first time and kept while the table
+    exists. It's rebuilt when the number of rows changes; a table whose ids are changed in place
+    must be passed as a new frame.
+
+    When data is previous with rows appended, as delta.apply_delta grows the dataset, the index kept
+    for previous is extended with the new rows instead.
+    """
+    key = id(data)
+    entry = _indexes.get(key)
+    if entry is None or entry[0]() is not data or entry[1].size != len(data):
+        kept = _indexes.get(id(previous)) if previous is not None else None
+        if kept is not None and kept[0]() is previous and kept[1].size == len(previous) <= len(data):
+            index = kept[1].appended(data['id'].to_numpy()[len(previous):])
+        else:
+            index = IdIndex(data['id'].to_numpy())
+        entry = (weakref.ref(data, lambda _: _indexes.pop(key, None)), index)
+        _indexes[key] = entry
+    return entry[1]
+
+def rows(data : pd.DataFrame, ids) -> pd.DataFrame:
+    """
+    Returns the rows of data with the given ids, in the order of ids, through its IdIndex.
+
+    Raises
+    ------
+    KeyError:
+        When an id isn't in data.
+
+    Examples
+    --------
+    >>> rows(raw_file, [1399, 66732])[['id', 'name']]
+          id             name
+    0   1399  Game of Thrones
+    2  66732  Stranger Things
+    """
+    positions = id_index(data).positions(ids)
+    if (positions < 0).any():
+        raise KeyError(f"ids not found: {list(np.asarray(ids)[positions < 0][:10])}")
+    return data.iloc[positions]
+
+def attach(data : pd.DataFrame, table : pd.DataFrame, columns : list[str]=None, inplace : bool=False) -> pd.DataFrame:
+    """
+    Attaches the columns of an auxiliary table, with one row per show, to the rows of data with the
+    same 'id', probing the IdIndex of table, so neither table is sorted or merged.
+
+    Tables with many rows per show, such as the season or episode exports, are reduced to one row
+    per show first, e.g. seasons.groupby('id').agg(avg_ep_per_season=('episode_count', 'mean')).
+
+    Parameters
+    ----------
+    data : pandas.DataFrame
+        The shows, with the column 'id'.
+    table : pandas.DataFrame
+        The auxiliary table, with the column 'id' and at most one row per id.
+    columns : list[str], default None
+        The columns of table attached. When None, all but 'id'. Columns of data with the same
+        names are replaced.
+    inplace : bool, default False
+        Whether the columns are added to data itself instead of to a new frame.
+
+    Returns
+    -------
+    pandas.DataFrame
+        data (or a new frame) with the columns, empty in the rows of shows missing from table.
+
+    Raises
+    ------
+    ValueError:
+        When an id is repeated in table.
+    KeyError:
+        When a column isn't in table.
+
+    Examples
+    --------
+    >>> seasons = pd.read_csv("tmdb_seasons.csv")
+    >>> per_show = seasons.groupby('id', as_index=False).agg(avg_ep_per_season=('episode_count', 'mean'))
+    >>> attach(raw_file, per_show, inplace=True)
+    >>> filter_first(10)['avg_ep_per_season']
+    """
+    index = id_index(table)
+    if not index.unique:
+        raise ValueError("table has many rows per id, reduce them to one first (see the docstring)")
+    columns = [column for column in table.columns if column != 'id'] if columns is None else columns
+    positions = index.positions(data['id'].to_numpy())
+    # reindexing by position leaves the missing shows empty, changing the type of the column if needed
+    values = {column: table[column].reset_index(drop=True).reindex(positions).to_numpy() for column in columns}
+    if not inplace:
+        return data.assign(**values)
+    for column, column_values in values.items():
+        data[column] = column_values
+    return data
@@ -1,11 +1,17 @@
 import pandas as pd
 import numpy as np
 import seaborn as sns
+import matplotlib
 import matplotlib.pyplot as plt
 from filter import filter_first
+from tracing import traced
+from bootstrap import bootstrap_means
+from density import count_grid, binned_kde
+from sinks import save_figure
 # from src.filter import filter_first
 
 # Function to adjust bins based on IQR
+@traced
 def bins_IQR(df: pd.DataFrame) -> list:
     """
     Adjusts the number of bins based on the Interquartile Range (IQR).
@@ -106,6 +112,7 @@ def bins_IQR(df: pd.DataFrame) -> list:
         raise ValueError(f"Mismatch between number of bins ({len(bin_edges)}) and labels ({len(labels)}).")
     return bin_edges, labels
 
+@traced
 def bins_with_outliers(df: pd.DataFrame, num_bins: int) -> list:
     """
     Adjusts the number of bins, taking into account outlier values.
@@ -198,13 +205,14 @@ def bins_with_outliers(df: pd.DataFrame, num_bins: int) -> list:
     return bin_edges, labels
 
 # Function to display analysis and calculate metrics
-def display_analysis(df: pd.DataFrame) -> None:
+@traced
+def display_analysis(df: pd.DataFrame) -> pd.DataFrame:
     """
     Display and save an analysis of TV show data by sorting, filtering, and generating bin-based statistics.
 
     This function filters and sorts the DataFrame containing TV show data based on the average number of episodes 
     per season. It also provides summary statistics on the number of shows within specific bin intervals 
-    (IQR and outliers), saves the sorted DataFrame to a CSV file.
+    (IQR and outliers), and returns the sorted DataFrame, which run_jobs saves to the results store.
 
     Parameters
     ----------
@@ -222,7 +230,8 @@ def display_analysis(df: pd.DataFrame) -> None:
 
     Returns
     -------
-    None
+    pd.DataFrame
+        The shows sorted by 'avg_ep_per_season', in descending order, with the columns shown.
 
     Example
     -------
@@ -274,8 +283,59 @@ def display_analysis(df: pd.DataFrame) -> None:
 
     shows_per_bin_outliers = df_filtered_final['category_bin_outliers'].value_counts().sort_index()
 
+    print(shows_per_bin_iqr)
+    print(shows_per_bin_outliers)
+    print(f"Number of shows in the DataFrame: {len(df_filtered_final)}")
+    return df_filtered_final
+
+# Function to average the ratings per bin, with their confidence intervals
+def mean_per_bin(df: pd.DataFrame, category: str, resamples: int = 0) -> pd.DataFrame:
+    """
+    Computes the mean rating (vote_average) of every bin, with a 95% bootstrap confidence interval.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        DataFrame containing the columns 'vote_average' and category.
+    category : str
+        The column of the bins, 'category_bin_iqr' or 'category_bin_outliers'.
+    resamples : int
+        Number of bootstrap resamples, the default is 0: the bounds are left empty.
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per bin, in order, with the columns category, 'vote_average', 'low' and 'high'.
+
+    Example
+    -------
+    >>> mean_per_bin(df, 'category_bin_iqr', 1000)
+      category_bin_iqr  vote_average       low      high
+    0              0-4      6.943124  6.905311  6.980502
+    ...
+    """
+    mean_per_bin = df.groupby(category, observed=False)['vote_average'].mean().reset_index()
+    if resamples > 0:
+        interval = bootstrap_means(df['vote_average'], df[category], resamples)
+        mean_per_bin['low'] = interval['low'].reindex(mean_per_bin[category]).to_numpy()
+        mean_per_bin['high'] = interval['high'].reindex(mean_per_bin[category]).to_numpy()
+    else:
+        mean_per_bin['low'] = mean_per_bin['high'] = np.nan
+    return mean_per_bin
+
+# Function to draw the confidence intervals over the bars of a bar chart
+def _error_bars(mean_per_bin: pd.DataFrame) -> None:
+    plt.errorbar(range(len(mean_per_bin)), mean_per_bin['vote_average'],
+                 yerr=[mean_per_bin['vote_average'] - mean_per_bin['low'], mean_per_bin['high'] - mean_per_bin['vote_average']],
+                 fmt='none', ecolor='black', capsize=4)
+
+# above this number of shows, the scatter plot is drawn as an image of the point counts
+DENSITY_ROWS = 5000
+
 # Function to plot bar charts with the average ratings per bin and distribution
-def plot_charts(df: pd.DataFrame) -> None:
+@traced
+def plot_charts(df: pd.DataFrame, output_dir: str = "./output", resamples: int = 0,
+                density_rows: int = DENSITY_ROWS) -> None:
     """ 
     Creates the graphs needed for analysis: bar graph, scatter plot and histogram.
 
@@ -283,12 +343,21 @@ def plot_charts(df: pd.DataFrame) -> None:
     ----------
     df : pd.DataFrame
         DataFrame containing the data.
+    output_dir : str or sinks.Sink
+        The folder, or the sink, where the charts are saved, the default is ./output.
+    resamples : int
+        Number of bootstrap resamples of the error bars of the bar charts, the default is 0:
+        no error bars are drawn.
+    density_rows : int
+        Above this number of shows, the scatter plot is drawn as an image of the number of shows
+        in every cell of a grid, instead of a point per show. The default is DENSITY_ROWS.
 
     Raises
     ------
     ValueError
         If the DataFrame is empty.
         If 'vote_average' column is missing or contains NaN values.
+        If 'avg_ep_per_season' column is missing.
         If 'vote_average' contains non-numeric values.
     TypeError
         if type(df) is not pd.DataFrame
@@ -323,66 +392,85 @@ def plot_charts(df: pd.DataFrame) -> None:
     
     if 'vote_average' not in df.columns or df['vote_average'].isnull().any():
         raise ValueError("DataFrame does not contain the 'vote_average' column.")
-    
+
+    if 'avg_ep_per_season' not in df.columns:
+        raise ValueError("DataFrame does not contain the 'avg_ep_per_season' column.")
     
     # Bar chart showing the average rating per category (IQR)
     plt.figure(figsize=(12, 6))
     plt_title = "Average Rating per Category (IQR)"
-    mean_per_bin_iqr = df.groupby('category_bin_iqr', observed=False)['vote_average'].mean().reset_index()
+    mean_per_bin_iqr = mean_per_bin(df, 'category_bin_iqr', resamples)
     
     sns.barplot(x='category_bin_iqr', y='vote_average', hue='category_bin_iqr', data=mean_per_bin_iqr, palette='Set2', legend=False)
+    _error_bars(mean_per_bin_iqr)
     plt.title(plt_title)
     plt.ylabel("Average Rating (Vote Average)")
     plt.xlabel("Episode Number Category (Bins)")
     plt.ylim(0, 10)  # Setting the y-axis from 0 to 10
     plt.xticks(rotation=45)
-    plt.savefig(f"./output/{plt_title}.png", dpi=100)  # Saving the chart
+    save_figure(output_dir, f"{plt_title}.png", dpi=100)  # Saving the chart
 
     # Bar chart showing the average rating per category, including outliers
     plt.figure(figsize=(12, 6))
     plt_title = "Average Rating with outliers"
-    mean_per_bin_outliers = df.groupby('category_bin_outliers', observed=False)['vote_average'].mean().reset_index()
+    mean_per_bin_outliers = mean_per_bin(df, 'category_bin_outliers', resamples)
     sns.barplot(x='category_bin_outliers', y='vote_average', hue='category_bin_outliers', data=mean_per_bin_outliers, palette='Set1', legend=False)
+    _error_bars(mean_per_bin_outliers)
     plt.title(plt_title)
     plt.ylabel("Average Rating (Vote Average)")
     plt.xlabel("Episode Number Category (Bins)")
     plt.ylim(0, 10)  # Setting the y-axis from 0 to 10
     plt.xticks(rotation=45)
-    plt.savefig(f"./output/{plt_title}.png", dpi=100)  # Saving the chart
+    save_figure(output_dir, f"{plt_title}.png", dpi=100)  # Saving the chart
     
     # Distribution chart of ratings (vote_average)
     plt.figure(figsize=(12, 6))
     plt_title = "Rating Distribution (Vote Average)"
-    sns.histplot(df['vote_average'], bins=20, kde=True, color='blue')
+    counts, edges = np.histogram(df['vote_average'], bins=20)
+    plt.bar(edges[:-1], counts, width=np.diff(edges), align='edge', color='blue', alpha=0.4, edgecolor='black')
+    grid, density = binned_kde(df['vote_average'], limits=(edges[0], edges[-1]))
+    plt.plot(grid, density * len(df) * (edges[1] - edges[0]), color='blue')  # KDE scaled to the counts
     plt.title(plt_title)
     plt.xlabel("Rating (Vote Average)")
     plt.ylabel("Frequency")
-    plt.savefig(f"./output/{plt_title}.png", dpi=100)  # Saving the chart
+    save_figure(output_dir, f"{plt_title}.png", dpi=100)  # Saving the chart
 
     # Scatter plot with IQR categories on the X-axis and ratings on the Y-axis
     plt.figure(figsize=(12, 6))
     plt_title = "Scatter Plot of Ratings by Average Episodes per Season"
-    sns.scatterplot(x='avg_ep_per_season', y='vote_average', data=df, hue='avg_ep_per_season', palette='viridis', legend=False)
+    if len(df) > density_rows:
+        counts, extent = count_grid(df['avg_ep_per_season'], df['vote_average'], y_limits=(0, 10))
+        plt.imshow(np.ma.masked_equal(counts, 0), origin='lower', extent=extent, aspect='auto',
+                   cmap='viridis', norm=matplotlib.colors.LogNorm(), interpolation='nearest')
+        plt.colorbar(label="Number of shows")
+    else:
+        sns.scatterplot(x='avg_ep_per_season', y='vote_average', data=df, hue='avg_ep_per_season', palette='viridis', legend=False)
     plt.title(plt_title)
     plt.ylabel("Rating (Vote Average)")
     plt.xlabel("Average Episodes per Season")
     plt.ylim(0, 10)  # Setting the y-axis from 0 to 10
     plt.xlim(df['avg_ep_per_season'].min(), df['avg_ep_per_season'].max())  # Set the X-axis limits
     plt.xticks(rotation=45)
-    plt.savefig(f"./output/{plt_title}.png", dpi=100)  # Saving the chart
+    save_figure(output_dir, f"{plt_title}.png", dpi=100)  # Saving the chart
     
     plt.close()
     
     
-# Function to run the analysis
-def analysis(num_bins: int = 5, votes_minimum: int = 0) -> None:
+# Function to compute the bins of the analysis
+@traced
+def analysis_bins(num_bins: int = 5, votes_minimum: int = 0, data: pd.DataFrame = None) -> pd.DataFrame:
     """ 
-    Runs the analysis.
+    Computes the data of the analysis: the filtered shows with their IQR and outlier categories.
 
     Parameters
     ----------
     num_bins : int
         The number of bins to use in the analysis, the default is 5.
+    votes_minimum : int
+        The minimum number of votes of a show, the default is 0.
+    data : pd.DataFrame
+        The table to be analysed, with the columns of the TMDB dataset. When None (the default),
+        the dataset of the data folder is used.
 
     Raises
     ------
@@ -392,27 +480,17 @@ def analysis(num_bins: int = 5, votes_minimum: int = 0) -> None:
 
     Returns
     -------
-    None
+    pd.DataFrame
+        The output of `filter_first()` with the columns 'category_bin_iqr' and 'category_bin_outliers'.
 
     Example
     -------
-    In this example, the analysis function performs a series of operations, including filtering data, 
-    creating bins based on IQR, managing outliers, and displaying the results and generating graphs.
-
-    >>> df = pd.DataFrame({
-            'name': ['Serie A', 'Serie B', 'Serie C', 'Serie D', 'Serie E'],
-            'number_of_episodes': [50, 100, 200, 250, 300],
-            'number_of_seasons': [2, 5, 10, 12, 15],
-            'avg_ep_per_season': [25.0, 20.0, 20.0, 20.8, 25.0],
-            'vote_average': [7.5, 8.0, 7.9, 7.4, 7.8],
-            'popularity': [150, 250, 300, 350, 400]
-        })
-    >>> analysis()
+    >>> analysis_bins(20)[['name', 'avg_ep_per_season', 'category_bin_iqr', 'category_bin_outliers']]
     """
     if num_bins < 1:
         raise ValueError("The number of bins must be greater than 1.")
     
-    df_filtered = filter_first(votes_minimum)
+    df_filtered = filter_first(votes_minimum, data)
 
     if df_filtered.empty:
         raise ValueError("The filtered DataFrame is empty.")
@@ -433,6 +511,52 @@ def analysis(num_bins: int = 5, votes_minimum: int = 0) -> None:
     # Create the category column with pd.cut
     df_filtered['category_bin_iqr'] = pd.cut(df_filtered['avg_ep_per_season'], bins=limit_bins_IQR, labels=labels_bins_IQR)
     df_filtered['category_bin_outliers'] = pd.cut(df_filtered['avg_ep_per_season'], bins=limit_outliers, labels=labels_outliers, duplicates='drop')
+    return df_filtered
+
+# Function to run the analysis
+@traced
+def analysis(num_bins: int = 5, votes_minimum: int = 0, output_dir: str = "./output", data: pd.DataFrame = None) -> None:
+    """ 
+    Runs the analysis.
+
+    Parameters
+    ----------
+    num_bins : int
+        The number of bins to use in the analysis, the default is 5.
+    votes_minimum : int
+        The minimum number of votes of a show, the default is 0.
+    output_dir : str or sinks.Sink
+        The folder, or the sink, where the charts are saved, the default is ./output.
+    data : pd.DataFrame
+        The table to be analysed, with the columns of the TMDB dataset. When None (the default),
+        the dataset of the data folder is used.
+
+    Raises
+    ------
+    ValueError
+        If the number of bins and labels does not match.
+        If the DataFrame returned by `filter_first()` is empty.
+
+    Returns
+    -------
+    None
+
+    Example
+    -------
+    In this example, the analysis function performs a series of operations, including filtering data, 
+    creating bins based on IQR, managing outliers, and displaying the results and generating graphs.
+
+    >>> df = pd.DataFrame({
+            'name': ['Serie A', 'Serie B', 'Serie C', 'Serie D', 'Serie E'],
+            'number_of_episodes': [50, 100, 200, 250, 300],
+            'number_of_seasons': [2, 5, 10, 12, 15],
+            'avg_ep_per_season': [25.0, 20.0, 20.0, 20.8, 25.0],
+            'vote_average': [7.5, 8.0, 7.9, 7.4, 7.8],
+            'popularity': [150, 250, 300, 350, 400]
+        })
+    >>> analysis()
+    """
+    df_filtered = analysis_bins(num_bins, votes_minimum, data)
 
     display_analysis(df_filtered)
-    plot_charts(df_filtered)
\ No newline at end of file
+    plot_charts(df_filtered, output_dir)
@@ -1,22 +1,96 @@
-import leonardo_hypothesis as ln
-import dilmar_hypothesis as dm
-import silvio_hypothesis as sv
+import argparse
+import sys
 
-# First Hypothesis
-ln.analysis(20, 0)
+import batch
+import filter as flt
+import dedupe
+import engine
+import ingest
+from tracing import span
 
-# Second Hypothesis
-sv.most_frequent_genre(10, 100)
-sv.most_popular_genre(10, 100)
-sv.most_voted_genre(10, 100)
+def _options(parser : argparse.ArgumentParser, defaults : bool) -> None:
+    # the options are accepted before and after the command; only the main parser sets the defaults
+    default = lambda value: value if defaults else argparse.SUPPRESS
+    parser.add_argument('--output', default=default("./output"),
+                        help="folder where the charts are written, or a .pdf, .zip or .tar file holding all of them")
+    parser.add_argument('--workers', type=int, default=default(4), help="threads computing independent jobs")
+    parser.add_argument('--data', action='append', default=default(None), metavar='CSV',
+                        help="CSV file or glob pattern of the dataset, repeated for many, from the oldest snapshot "
+                             "to the newest; by default, the dataset of the data folder")
+    parser.add_argument('--results', default=default(None), metavar='FOLDER',
+                        help="also write the result table of every analysis to this results store")
+    parser.add_argument('--dedupe', default=default(None), metavar='REPORT',
+                        help="drop the near-duplicate shows of the dataset before the analyses, writing what was "
+                             "merged to this CSV file")
+    parser.add_argument('--engine', choices=list(engine.ENGINES), default=default(None),
+                        help="engine of the filters and aggregations; by default, the one named by the variable "
+                             f"{engine.ENGINE_VAR}, or pandas")
+    parser.add_argument('--dry-run', action='store_true', default=default(False),
+                        help="print the planned stages and their estimated cost")
 
-sv.most_frequent_genre(10, 100, [2022,2023])
-sv.most_popular_genre(10, 100, [2022,2023])
-sv.most_voted_genre(10, 100, [2022,2023])
-sv.most_frequent_genre(10, 100, [2023,2024])
-sv.most_popular_genre(10, 100, [2023,2024])
-sv.most_voted_genre(10, 100, [2023,2024])
+def _parser() -> argparse.ArgumentParser:
+    common = argparse.ArgumentParser(add_help=False)
+    _options(common, defaults=False)
 
-# Third Hypothesis
-dm.dilmar_hypothesis(10, 100)
+    parser = argparse.ArgumentParser(description="Runs the lp-tmdb hypotheses. Without a command, runs all "
+                                                 "the default analyses.")
+    _options(parser, defaults=True)
+    commands = parser.add_subparsers(dest='command')
 
+    leonardo = commands.add_parser('leonardo', parents=[common], help="1st hypothesis: rating by episodes per season")
+    leonardo.add_argument('--num-bins', type=int, default=5)
+    leonardo.add_argument('--votes-minimum', type=int, default=0)
+    leonardo.add_argument('--resamples', type=int, default=0, help="bootstrap resamples of the error bars, none by default")
+
+    for metric in ['frequent', 'popular', 'voted']:
+        genre = commands.add_parser(metric, parents=[common], help=f"2nd hypothesis: most {metric} genres by network")
+        genre.add_argument('top_n', type=int)
+        genre.add_argument('--shows-minimum', type=int, default=0)
+        genre.add_argument('--years', type=int, nargs=2, default=[0, 9999], metavar=('FIRST', 'LAST'))
+
+    dilmar = commands.add_parser('dilmar', parents=[common], help="3rd hypothesis: popularity by vote average bins")
+    dilmar.add_argument('shows_minimum', type=int)
+    dilmar.add_argument('votes_minimum', type=int)
+    dilmar.add_argument('--resamples', type=int, default=0, help="bootstrap resamples of the error bars, none by default")
+
+    jobs = commands.add_parser('batch', parents=[common], help="runs the jobs of a JSON or YAML file")
+    jobs.add_argument('jobs', help="path of the job file")
+
+    commands.add_parser('all', parents=[common], help="runs the default analyses")
+    return parser
+
+def _jobs(args : argparse.Namespace) -> list[dict]:
+    if args.command in [None, 'all']:
+        return batch.DEFAULT_JOBS
+    if args.command == 'batch':
+        return batch.read_jobs(args.jobs)
+    parameters = {key: value for key, value in vars(args).items()
+                  if key in batch.JOBS[args.command]}
+    return [dict(hypothesis=args.command, **parameters)]
+
+def main(argv : list[str]=None) -> int:
+    args = _parser().parse_args(argv)
+    jobs = _jobs(args)
+    if args.engine is not None:
+        engine.set_engine(args.engine)
+    data = None if args.data is None else ingest.read_tables(args.data, args.workers)
+    if args.dedupe is not None:
+        data, report = dedupe.collapse_duplicates(flt.raw_file if data is None else data)
+        # a dry run plans on the smaller table but writes nothing
+        if args.dry_run:
+            print(f"would drop {len(report)} near-duplicate shows")
+        else:
+            report.to_csv(args.dedupe, index=False)
+            print(f"dropped {len(report)} near-duplicate shows, see {args.dedupe}")
+
+    if args.dry_run:
+        stages = batch.plan(jobs, data)
+        print(stages.to_string(index=False))
+        print(f"estimated total: {stages['estimated_seconds'].sum():.2f}s")
+        return 0
+    with span("batch"):
+        batch.run_jobs(jobs, args.output, args.workers, data, args.results)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
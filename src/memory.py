@@ -0,0 +1,175 @@
+import json
+import os
+import tracemalloc
+import weakref
+import pandas as pd
+
+import tracing
+
+_active = None
+_source_dir = os.path.dirname(os.path.abspath(__file__))
+
+def _fingerprint(frame : pd.DataFrame) -> tuple:
+    # changes when the frame is reshaped or a column is replaced, as pandas does on assignment
+    pointers = tuple(frame[column].to_numpy().__array_interface__['data'][0] for column in frame.columns)
+    return frame.shape, tuple(frame.columns), pointers
+
+def _project_line(traceback : tracemalloc.Traceback) -> str:
+    # the most recent frame of the traceback inside this project, or the most recent one at all
+    for frame in reversed(traceback):
+        if frame.filename.startswith(_source_dir):
+            return f"{os.path.basename(frame.filename)}:{frame.lineno}"
+    return f"{traceback[-1].filename}:{traceback[-1].lineno}"
+
+class _Accounting:
+    # listener of tracing spans that collects the memory report
+    def __init__(self, top_sites : int):
+        self.top_sites = top_sites
+        self.stages = []
+        self.frames = []
+        self.copies = []
+
+    def enter(self, stage):
+        stage.memory_start = tracemalloc.get_traced_memory()[0]
+        stage.snapshot = tracemalloc.take_snapshot()
+
+    def exit(self, stage):
+        self.check_copies()
+        retained = tracemalloc.get_traced_memory()[0] - stage.memory_start
+        sites = {}
+        for stat in tracemalloc.take_snapshot().compare_to(stage.snapshot, 'traceback'):
+            line = _project_line(stat.traceback)
+            sites[line] = sites.get(line, 0) + stat.size_diff
+        top_sites = sorted(sites.items(), key=lambda site: -site[1])[:self.top_sites]
+        self.stages.append({
+            'stage': stage.name,
+            'peak_bytes': stage.peak,
+            'retained_bytes': retained,
+            'top_sites': [{'site': line, 'retained_bytes': size} for line, size in top_sites if size > 0],
+        })
+        del stage.snapshot
+
+    def check_copies(self):
+        # a copy counts as used once it is seen modified while still alive
+        for entry, reference, fingerprint in self.copies:
+            frame = reference()
+            if frame is not None and not entry['modified'] and _fingerprint(frame) != fingerprint:
+                entry['modified'] = True
+
+    def report(self) -> dict:
+        self.check_copies()
+        frames = [{key: value for key, value in entry.items() if key != 'modified'} for entry in self.frames]
+        for frame, entry in zip(frames, self.frames):
+            frame['unused_copy'] = entry['copied'] and not entry['modified']
+        return {'stages': self.stages, 'frames': frames}
+
+def track(name : str, frame : pd.DataFrame, copied : bool=False) -> None:
+    """
+    Records the size of an intermediate frame, when memory accounting is on. Does nothing otherwise.
+
+    Parameters
+    ----------
+    name : str
+        Name of the intermediate, as shown in the report.
+    frame : pandas.DataFrame
+        The intermediate frame. Its memory_usage(deep=True) is measured immediately.
+    copied : bool, default False
+        Whether the frame was made by .copy(). Copies that are never seen modified afterwards
+        (a column replaced or the shape changed) are flagged as unused in the report, since a
+        view or the original frame would have done.
+
+    Examples
+    --------
+    >>> df_filtered = raw_file[raw_file['vote_count'] >= votes_minimum].copy()
+    >>> track("filter_first.votes", df_filtered, copied=True)
+    """
+    if _active is None:
+        return
+    _active.check_copies()
+    stages = getattr(tracing._stack, 'spans', None)
+    entry = {
+        'stage': stages[-1].name if stages else None,
+        'frame': name,
+        'rows': len(frame),
+        'bytes': int(frame.memory_usage(deep=True).sum()),
+        'copied': copied,
+        'modified': False,
+    }
+    _active.frames.append(entry)
+    if copied:
+        _active.copies.append((entry, weakref.ref(frame), _fingerprint(frame)))
+
+class accounting:
+    """
+    Context manager that turns on the memory accounting mode (and tracing) inside its block.
+
+    At every span boundary a tracemalloc snapshot is taken, to report the peak and the retained
+    bytes of each stage and the source lines that retained the most memory. Frames registered
+    with track are measured with memory_usage(deep=True). This mode is slow; it's meant for
+    profiling runs, not for production.
+
+    Parameters
+    ----------
+    path : str, default None
+        When given, the report is written there as JSON at the end of the block.
+    top_sites : int, default 3
+        Number of source lines reported per stage.
+    frames : int, default 1
+        Frames kept by tracemalloc per allocation. With 1, memory is attributed to the line that
+        allocated it (usually inside pandas); with more, to the innermost line of this project in
+        the call stack, at a much higher cost.
+
+    Examples
+    --------
+    >>> with accounting("memory.json") as memory:
+    ...     filter_second(100)
+    >>> memory.report()['frames'][0]
+    {'stage': 'filter_second.valid_rows', 'frame': 'filter_second.in_years', 'rows': 51244,
+     'bytes': 121145380, 'copied': False, 'unused_copy': False}
+    """
+    def __init__(self, path : str=None, top_sites : int=3, frames : int=1):
+        self.path = path
+        self.frames = frames
+        self.listener = _Accounting(top_sites)
+
+    def __enter__(self):
+        global _active
+        self.started = not tracemalloc.is_tracing()
+        if self.started:
+            tracemalloc.start(self.frames)
+        tracing.enable()
+        tracing._listeners.append(self.listener)
+        _active = self.listener
+        return self
+
+    def __exit__(self, *exc):
+        global _active
+        _active = None
+        tracing._listeners.remove(self.listener)
+        tracing.disable()
+        if self.started:
+            tracemalloc.stop()
+        if self.path is not None:
+            write_report(self.report(), self.path)
+        return False
+
+    def report(self) -> dict:
+        """
+        Returns the report: {'stages': [...], 'frames': [...]}, with one entry per finished span
+        and one per tracked frame.
+        """
+        return self.listener.report()
+
+def write_report(report : dict, path : str) -> None:
+    """
+    Writes a memory report as JSON.
+
+    Parameters
+    ----------
+    report : dict
+        As returned by accounting.report.
+    path : str
+        Destination file.
+    """
+    with open(path, 'w') as file:
+        json.dump(report, file, indent=2)
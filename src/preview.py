@@ -0,0 +1,289 @@
+import statistics
+import numpy as np
+import pandas as pd
+
+import filter as flt
+from filter import filter_third
+from dilmar_hypothesis import vote_bins
+from aggregates import METRICS
+
+def stratified_sample(rate : float, minimum : int=2, seed : int=0, data : pd.DataFrame=None) -> pd.DataFrame:
+    """
+    Samples the shows of the dataset stratified by their networks, so small networks are kept.
+
+    The shows are grouped in strata by the first network they list (missing ones included), and
+    from each stratum max(minimum, ceil(rate * size)) shows are drawn without replacement, or all
+    of them when the stratum is smaller.
+
+    Parameters
+    ----------
+    rate : float
+        Fraction of the shows of each stratum to be drawn, between 0 (exclusive) and 1.
+    minimum : int, default 2
+        Least number of shows drawn from each stratum; at least 2 are needed to estimate its variance.
+    seed : int, default 0
+        Seed of the random generator.
+    data : pandas.DataFrame, default None
+        The table to be sampled, with the columns of the TMDB dataset. When None, the dataset of
+        the data folder is used.
+
+    Returns
+    -------
+    pandas.DataFrame
+        The sampled rows, in their original order, with the columns 'stratum' (code of the
+        stratum), 'stratum_size' and 'sample_size' (shows of the stratum in the dataset and in
+        the sample) added.
+
+    Raises
+    ------
+    TypeError:
+        When rate isn't a number or minimum and seed aren't instances of int.
+    ValueError:
+        When rate isn't in (0, 1] or minimum is lesser than 1.
+
+    Examples
+    --------
+    >>> stratified_sample(0.1)[['name', 'networks', 'stratum_size', 'sample_size']]
+                         name  networks  stratum_size  sample_size
+    0         Game of Thrones       HBO           830           83
+    ...
+    """
+    if not isinstance(rate, (int, float)) or not isinstance(minimum, int) or not isinstance(seed, int):
+        raise TypeError("check the argument types")
+    if not 0 < rate <= 1 or minimum < 1:
+        raise ValueError("rate must be in (0, 1] and minimum greater than 0")
+    if data is None:
+        data = flt.raw_file
+
+    codes, _ = pd.factorize(data['networks'].str.split(", ").str[0], use_na_sentinel=False)
+    sizes = np.bincount(codes)
+    sample_sizes = np.minimum(sizes, np.maximum(minimum, np.ceil(rate * sizes))).astype(int)
+    # a random order inside each stratum; the first sample_size shows of each one are kept
+    order = np.lexsort((np.random.default_rng(seed).random(len(codes)), codes))
+    position = np.empty(len(codes), dtype=int)
+    position[order] = np.arange(len(codes)) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+    keep = position < sample_sizes[codes]
+
+    sample = data[keep].copy()
+    sample['stratum'] = codes[keep]
+    sample['stratum_size'] = sizes[codes[keep]]
+    sample['sample_size'] = sample_sizes[codes[keep]]
+    return sample
+
+def _ratio_estimates(rows : pd.DataFrame, keys : list[str], y : str, x : str, z : float) -> pd.DataFrame:
+    # estimates of sum(y) / sum(x) per group of keys, from sampled rows that may be repeated
+    # (exploded), with the half width of their confidence interval from the variance of the
+    # stratified ratio estimator, linearized: sum over strata of N² (1 - n / N) s² / n; the half
+    # width is infinite when it can't be estimated
+    weight = rows['stratum_size'] / rows['sample_size']
+    totals = pd.DataFrame({'y': rows[y] * weight, 'x': rows[x] * weight})
+    totals = totals.groupby([rows[key] for key in keys]).sum()
+    ratio = totals['y'] / totals['x']
+
+    group = pd.MultiIndex.from_frame(rows[keys]) if len(keys) > 1 else pd.Index(rows[keys[0]])
+    residual = rows[y].to_numpy() - ratio.reindex(group).to_numpy() * rows[x].to_numpy()
+    # the residuals of the same show in the same group are summed, as it was sampled once
+    per_show = pd.DataFrame({'residual': residual, 'stratum': rows['stratum'].to_numpy(),
+                             'show': rows.index.to_numpy(), 'N': rows['stratum_size'].to_numpy(),
+                             'n': rows['sample_size'].to_numpy()})
+    for key in keys:
+        per_show[key] = rows[key].to_numpy()
+    per_show = per_show.groupby(keys + ['stratum', 'show', 'N', 'n'])['residual'].sum().reset_index()
+    per_show['squared'] = per_show['residual'] ** 2
+    strata = per_show.groupby(keys + ['stratum', 'N', 'n'])[['residual', 'squared']].sum().reset_index()
+    n, size = strata['n'].to_numpy(), strata['N'].to_numpy()
+    # the shows of the stratum outside the group count as zeros in the variance
+    spread = (strata['squared'] - strata['residual'] ** 2 / n) / np.maximum(n - 1, 1)
+    strata['variance'] = np.where(n < size, size ** 2 * (1 - n / size) * spread / n, 0)
+    variance = strata.groupby(keys)['variance'].sum().reindex(ratio.index)
+    # with a single sampled show the variance can't be estimated, unless its strata were drawn whole
+    shows = per_show.groupby(keys).size().reindex(ratio.index)
+    whole = (strata['n'] == strata['N']).groupby([strata[key] for key in keys]).all().reindex(ratio.index)
+    variance[(shows < 2) & ~whole] = np.inf
+
+    return pd.DataFrame({'estimate': ratio, 'half_width': z * np.sqrt(variance) / totals['x']})
+
+def _z(confidence : float) -> float:
+    if not 0 < confidence < 1:
+        raise ValueError("confidence must be between 0 and 1")
+    return statistics.NormalDist().inv_cdf((1 + confidence) / 2)
+
+def _genre_preview(sample : pd.DataFrame, metric : str, shows_minimum : int, years_interval : list[int],
+                   z : float) -> pd.DataFrame:
+    # every network with its estimated best genre, metric and confidence interval
+    exploded = flt._explode_second(sample, years_interval)
+    weight = exploded['stratum_size'] / exploded['sample_size']
+    shows = weight.groupby(exploded['networks']).sum()
+    exploded = exploded[exploded['networks'].isin(shows[shows > shows_minimum].index)]
+    if exploded.empty:
+        return pd.DataFrame(columns=['networks', 'genres', METRICS[metric][0], 'low', 'high'])
+
+    exploded = exploded.assign(one=1.0, average=exploded['vote_count'] * exploded['vote_average'])
+    if metric == 'popular':
+        estimates = _ratio_estimates(exploded, ['genres', 'networks'], 'popularity', 'one', z)
+        low = np.log(np.maximum(estimates['estimate'] - estimates['half_width'], 1e-12))
+        high = np.log(estimates['estimate'] + estimates['half_width'])
+        value = np.log(estimates['estimate'])
+    else:
+        estimates = _ratio_estimates(exploded, ['genres', 'networks'], 'average', 'vote_count', z)
+        value = estimates['estimate']
+        low, high = value - estimates['half_width'], value + estimates['half_width']
+
+    column = METRICS[metric][0]
+    table = pd.DataFrame({column: value, 'low': low, 'high': high}).reset_index()
+    # sorting like best_genres, so ties are broken the same way
+    table = table.sort_values(['genres', 'networks']).reset_index(drop=True)
+    return table.loc[table.groupby('networks')[column].idxmax()]
+
+def preview_genre_table(metric : str, top_n : int, shows_minimum : int=0, years_interval : list[int]=[0,9999],
+                        rate : float=0.1, error : float=None, confidence : float=0.95, seed : int=0,
+                        data : pd.DataFrame=None) -> tuple[pd.DataFrame, bool]:
+    """
+    Approximates the table of popular_genre_table or voted_genre_table from a stratified sample.
+
+    The best genre of each network and its metric are estimated from a sample drawn by
+    stratified_sample, weighting every show by the inverse of its chance of being drawn, and
+    the number of shows of each network, compared to shows_minimum, is estimated the same way.
+
+    Parameters
+    ----------
+    metric : str
+        'popular' or 'voted'.
+    top_n : int
+        Keeps just the first top_n networks and genres.
+    shows_minimum : int, default 0
+        Keeps just networks whose estimated number of shows is greater than this.
+    years_interval : list[int], default [0,9999]
+        Keeps just the series aired between the first and second element (in years) of the list.
+    rate : float, default 0.1
+        Fraction of each network's shows to be sampled.
+    error : float, default None
+        When given, the rate is doubled (up to 1) until the half width of the confidence interval of
+        every row is at most this fraction of its value.
+    confidence : float, default 0.95
+        Confidence level of the intervals.
+    seed : int, default 0
+        Seed of the sample.
+    data : pandas.DataFrame, default None
+        The table to be analysed, with the columns of the TMDB dataset. When None, the dataset of the data folder is used.
+
+    Returns
+    -------
+    tuple[pandas.DataFrame, bool]
+        The table indexed by "network: (genre)", with the metric column, the bounds 'low' and 'high'
+        of its confidence interval and 'rank_stable' (whether the interval is clear of the ones of
+        the rows right above and below, the first network left out included), in descending order;
+        and whether the top_n networks are stable: the interval of each one is above the interval
+        of every network left out. The rate used is in the attribute 'rate' of the table.
+
+    Raises
+    ------
+    TypeError:
+        When top_n and shows_minimum aren't instances of int, or years_interval isn't a list of two integers.
+    ValueError:
+        When metric isn't 'popular' or 'voted', or no network has more than shows_minimum shows.
+
+    Examples
+    --------
+    >>> table, stable = preview_genre_table('voted', 10, 100, rate=0.1)
+    >>> table
+                                      final_average       low      high  rank_stable
+    for_plot
+    Disney Channel: (Action & Adventure)   8.563214  8.310522  8.815906        False
+    ...
+    """
+    if metric not in ['popular', 'voted']:
+        raise ValueError("metric must be 'popular' or 'voted'")
+    if not isinstance(top_n, int) or not isinstance(shows_minimum, int) or not isinstance(years_interval, list) \
+            or len(years_interval) != 2 or not all(isinstance(year, int) for year in years_interval):
+        raise TypeError("check the argument types")
+    if years_interval[0] > years_interval[1]:
+        raise ValueError("the first element of years_interval must be less or equal the second")
+    z = _z(confidence)
+    column = METRICS[metric][0]
+
+    while True:
+        best = _genre_preview(stratified_sample(rate, seed=seed, data=data), metric, shows_minimum, years_interval, z)
+        if best.empty:
+            raise ValueError("shows_minimum can't be greater then the highest count of shows per network")
+        best = best.sort_values(column, ascending=False)
+        top = best.head(top_n)
+        relative = ((top['high'] - top['low']) / 2 / top[column].abs()).max()
+        if error is None or relative <= error or rate >= 1:
+            break
+        rate = min(1, rate * 2)
+
+    # the first network left out is kept until the rows are compared
+    ranked = best.head(top_n + 1).reset_index(drop=True)
+    above = ranked['low'].shift(1, fill_value=np.inf) > ranked['high']
+    below = ranked['high'].shift(-1, fill_value=-np.inf) < ranked['low']
+    ranked['rank_stable'] = above & below
+    stable = len(best) <= top_n or bool(top['low'].min() > best['high'].iloc[top_n:].max())
+
+    table = ranked.head(top_n)
+    table.index = table['networks'] + ": (" + table['genres'] + ")"
+    table = table[[column, 'low', 'high', 'rank_stable']].rename_axis('for_plot')
+    table.attrs['rate'] = rate
+    return table, stable
+
+def preview_dilmar_bins(shows_minimum : int, votes_minimum : int, rate : float=0.1, confidence : float=0.95,
+                        seed : int=0, data : pd.DataFrame=None) -> tuple[pd.DataFrame, list[str]]:
+    """
+    Approximates dilmar_bins from a stratified sample, with confidence intervals.
+
+    The intervals of vote_average come from the sample, so its extremes may differ slightly from
+    the ones of dilmar_bins.
+
+    Parameters
+    ----------
+    shows_minimum : int
+        The minimum amount o tv shows a network need, compared to its estimated number of shows.
+    votes_minimum : int
+        The minimum amount of "vote_count" a tv show need.
+    rate : float, default 0.1
+        Fraction of each network's shows to be sampled.
+    confidence : float, default 0.95
+        Confidence level of the intervals.
+    seed : int, default 0
+        Seed of the sample.
+    data : pandas.DataFrame, default None
+        The table to be analysed, with the columns of the TMDB dataset. When None, the dataset of the data folder is used.
+
+    Returns
+    -------
+    tuple[pandas.DataFrame, list[str]]
+        The table with the columns 'labels', 'networks', 'popularity' (estimated mean) and the bounds
+        'low' and 'high' of its confidence interval, sorted by popularity, and the names of the
+        intervals in ascending order.
+
+    Raises
+    ------
+    TypeError:
+        When shows_minimum or votes_minimum aren't instances of int.
+
+    Examples
+    --------
+    >>> df, bins_intervals = preview_dilmar_bins(10, 150, rate=0.2)
+    """
+    if not isinstance(shows_minimum, int) or not isinstance(votes_minimum, int):
+        raise TypeError("check the argument types")
+    z = _z(confidence)
+
+    df = filter_third(-1, votes_minimum, stratified_sample(rate, seed=seed, data=data))
+    # filter_third counts the shows with genres of each network
+    weight = df['stratum_size'] / df['sample_size']
+    shows = (weight * df['genres'].notna()).groupby(df['networks']).sum()
+    df = df[df['networks'].isin(shows[shows > shows_minimum].index)]
+
+    df = df[['popularity', 'vote_average', 'networks', 'stratum', 'stratum_size', 'sample_size']].copy()
+    df['networks'] = df['networks'].str.split(',')
+    df = df.explode('networks')
+    bins, bins_intervals = vote_bins(df['vote_average'])
+    df['labels'] = pd.cut(df['vote_average'], bins=bins, labels=bins_intervals, right=True).astype(str)
+    df['one'] = 1.0
+
+    estimates = _ratio_estimates(df, ['labels', 'networks'], 'popularity', 'one', z)
+    table = pd.DataFrame({'popularity': estimates['estimate'], 'low': estimates['estimate'] - estimates['half_width'],
+                          'high': estimates['estimate'] + estimates['half_width']}).reset_index()
+    table['labels'] = pd.Categorical(table['labels'], categories=bins_intervals, ordered=True)
+    return table.sort_values('popularity').reset_index(drop=True), bins_intervals
@@ -0,0 +1,211 @@
+import datetime
+import hashlib
+import json
+import os
+import numpy as np
+import pandas as pd
+
+# version of the layout of the store, written in the metadata of every result
+LAYOUT = 1
+
+def fingerprint(data : pd.DataFrame) -> str:
+    """
+    Returns a hash of the columns and values of a table, the same for equal tables whatever their
+    index, so a result can be matched with the dataset it was computed from.
+
+    Examples
+    --------
+    >>> store.find('voted', fingerprint=fingerprint(raw_file))
+    """
+    digest = hashlib.sha256(json.dumps([str(column) for column in data.columns]).encode())
+    digest.update(pd.util.hash_pandas_object(data, index=False).to_numpy().tobytes())
+    return digest.hexdigest()[:16]
+
+def _arrow():
+    # pyarrow when it's installed, None otherwise
+    try:
+        import pyarrow
+        import pyarrow.ipc # noqa: F401
+        return pyarrow
+    except ImportError:
+        return None
+
+def _write_npy(folder : str, table : pd.DataFrame) -> dict:
+    # every column as an uncompressed .npy file, which is memory-mapped when read; text as fixed width
+    # unicode with a mask of the missing values, categories as their codes
+    columns = {}
+    for position, column in enumerate(table.columns):
+        values = table[column]
+        entry = {'name': str(column), 'dtype': str(values.dtype)}
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            entry['categories'] = [str(category) for category in values.cat.categories]
+            entry['ordered'] = bool(values.cat.ordered)
+            array = values.cat.codes.to_numpy()
+        elif values.dtype == object:
+            missing = values.isna().to_numpy()
+            entry['missing'] = f"{position}.missing.npy"
+            np.save(os.path.join(folder, entry['missing']), missing)
+            array = np.where(missing, "", values.astype(str).to_numpy()).astype(str)
+        else:
+            array = values.to_numpy()
+        entry['file'] = f"{position}.npy"
+        np.save(os.path.join(folder, entry['file']), array)
+        columns[position] = entry
+    return columns
+
+def _read_npy(folder : str, meta : dict) -> pd.DataFrame:
+    columns = {}
+    for entry in meta['columns'].values():
+        # a plain array over the memory map, so the columns behave as any other
+        array = np.load(os.path.join(folder, entry['file']), mmap_mode='r').view(np.ndarray)
+        if 'categories' in entry:
+            dtype = pd.CategoricalDtype(entry['categories'], ordered=entry['ordered'])
+            columns[entry['name']] = pd.Categorical.from_codes(array, dtype=dtype)
+        elif 'missing' in entry:
+            missing = np.load(os.path.join(folder, entry['missing']))
+            values = array.astype(object)
+            values[missing] = np.nan
+            columns[entry['name']] = values
+        else:
+            columns[entry['name']] = array
+    return pd.DataFrame(columns, copy=False)
+
+class ResultsStore:
+    """
+    Folder of the result tables of the analyses, so dashboards and notebooks read them instead of
+    running the analyses again.
+
+    Every table written gets a new version, root/<name>/<version>/, holding its columns and a
+    meta.json with its parameters, the fingerprint of the dataset it came from and when it was
+    written. With pyarrow, a table is one compressed Arrow IPC file, read through a memory map;
+    without it, one uncompressed .npy file per column, memory-mapped by numpy, so the numeric
+    columns aren't copied when read.
+
+    Parameters
+    ----------
+    root : str
+        The folder, created when missing.
+    compression : str, default 'zstd'
+        Compression of the Arrow files, 'zstd', 'lz4' or None. Compressed columns are decompressed
+        into memory when read; uncompressed ones are read without copies.
+
+    Examples
+    --------
+    >>> store = ResultsStore("output/results")
+    >>> store.write('dilmar', table, {'shows_minimum': 10, 'votes_minimum': 100}, fingerprint(raw_file))
+    1
+    >>> store.read('dilmar', params={'shows_minimum': 10, 'votes_minimum': 100})
+    """
+    def __init__(self, root : str, compression : str='zstd'):
+        self.root = root
+        self.compression = compression
+        os.makedirs(root, exist_ok=True)
+
+    def _folder(self, name : str, version : int) -> str:
+        return os.path.join(self.root, name, f"{version:06d}")
+
+    def write(self, name : str, table : pd.DataFrame, params : dict=None, fingerprint : str=None) -> int:
+        """
+        Writes a table as the next version of name and returns the version. The named levels of
+        the index of table are restored when it's read.
+        """
+        os.makedirs(os.path.join(self.root, name), exist_ok=True)
+        version = max(self.versions(name), default=0) + 1
+        # claiming the folder of the version is atomic, so concurrent writers get different versions
+        while True:
+            try:
+                os.makedirs(self._folder(name, version))
+                break
+            except FileExistsError:
+                version += 1
+        folder = self._folder(name, version)
+
+        # the named levels of the index are kept as columns, the unnamed ones (such as row numbers) dropped
+        index = [level for level in table.index.names if level is not None]
+        flat = (table.reset_index(level=index) if index else table).reset_index(drop=True)
+        meta = {
+            'layout': LAYOUT,
+            'name': name,
+            'version': version,
+            'params': params or {},
+            'fingerprint': fingerprint,
+            'written': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            'rows': len(flat),
+            'index': index,
+        }
+        arrow = _arrow()
+        if arrow is not None:
+            meta['format'] = 'arrow'
+            arrow_table = arrow.Table.from_pandas(flat, preserve_index=False)
+            options = arrow.ipc.IpcWriteOptions(compression=self.compression)
+            with arrow.OSFile(os.path.join(folder, "table.arrow"), 'wb') as sink:
+                with arrow.ipc.new_file(sink, arrow_table.schema, options=options) as writer:
+                    writer.write_table(arrow_table)
+        else:
+            meta['format'] = 'npy'
+            meta['columns'] = _write_npy(folder, flat)
+        # the metadata is written last, so a version without it is still being written
+        with open(os.path.join(folder, "meta.json"), 'w') as file:
+            json.dump(meta, file, indent=2, default=str)
+        return version
+
+    def versions(self, name : str) -> list[int]:
+        """
+        Returns the versions of name written completely, in ascending order.
+        """
+        folder = os.path.join(self.root, name)
+        if not os.path.isdir(folder):
+            return []
+        return sorted(int(entry) for entry in os.listdir(folder)
+                      if entry.isdigit() and os.path.exists(os.path.join(folder, entry, "meta.json")))
+
+    def meta(self, name : str, version : int) -> dict:
+        """
+        Returns the metadata of a version of name.
+        """
+        with open(os.path.join(self._folder(name, version), "meta.json")) as file:
+            return json.load(file)
+
+    def find(self, name : str, params : dict=None, fingerprint : str=None) -> int:
+        """
+        Returns the latest version of name with these params (compared as JSON) and dataset
+        fingerprint, or None when there's none. A None argument matches anything.
+        """
+        for version in reversed(self.versions(name)):
+            meta = self.meta(name, version)
+            if params is not None and json.dumps(meta['params'], sort_keys=True, default=str) != \
+                    json.dumps(params, sort_keys=True, default=str):
+                continue
+            if fingerprint is not None and meta['fingerprint'] != fingerprint:
+                continue
+            return version
+        return None
+
+    def read(self, name : str, version : int=None, params : dict=None, fingerprint : str=None) -> pd.DataFrame:
+        """
+        Reads a version of name, by default the latest one matching params and fingerprint (see find).
+
+        Raises
+        ------
+        KeyError:
+            When no version matches.
+        ImportError:
+            When the version was written with pyarrow and it isn't installed.
+        """
+        if version is None:
+            version = self.find(name, params, fingerprint)
+        if version is None or version not in self.versions(name):
+            raise KeyError(f"no result {name!r} matches")
+        folder = self._folder(name, version)
+        meta = self.meta(name, version)
+        if meta['format'] == 'arrow':
+            import pyarrow
+            import pyarrow.ipc
+            with pyarrow.memory_map(os.path.join(folder, "table.arrow")) as source:
+                table = pyarrow.ipc.open_file(source).read_all().to_pandas()
+            # the missing text is NaN, as it was written, instead of None
+            text = table.columns[table.dtypes == object]
+            table[text] = table[text].where(table[text].notna(), np.nan)
+        else:
+            table = _read_npy(folder, meta)
+        return table.set_index(meta['index']) if meta['index'] else table
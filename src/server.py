@@ -0,0 +1,201 @@
+import argparse
+import asyncio
+import collections
+import concurrent.futures
+import json
+import sys
+import urllib.parse
+
+from warm import Warm
+
+# query name -> integer parameters it takes (with their defaults, None meaning required)
+QUERIES = {
+    'frequent': {'top_n': None, 'shows_minimum': 0},
+    'popular': {'top_n': None, 'shows_minimum': 0},
+    'voted': {'top_n': None, 'shows_minimum': 0},
+    'dilmar': {'shows_minimum': None, 'votes_minimum': None},
+}
+
+STATUS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed"}
+
+def parse_query(target : str) -> tuple:
+    """
+    Parses the path and query string of a request into a hashable query.
+
+    Parameters
+    ----------
+    target : str
+        As in the request line, e.g. "/voted?top_n=10&shows_minimum=100&years=2022-2023&format=png".
+        The genre queries ('frequent', 'popular' and 'voted') take top_n, shows_minimum and years;
+        'dilmar' takes shows_minimum and votes_minimum. Every query takes format, 'json' or 'png'.
+
+    Returns
+    -------
+    tuple
+        (name, parameters, years, format), where parameters is a tuple of (name, value) pairs in
+        the order of QUERIES[name] and years a tuple of two integers, (0, 9999) when not given.
+
+    Raises
+    ------
+    KeyError:
+        When the query is unknown.
+    ValueError:
+        When a parameter is unknown, missing or isn't an integer, or the format is invalid.
+
+    Examples
+    --------
+    >>> parse_query("/voted?top_n=10&shows_minimum=100&years=2022-2023")
+    ('voted', (('top_n', 10), ('shows_minimum', 100)), (2022, 2023), 'json')
+    """
+    url = urllib.parse.urlsplit(target)
+    name = url.path.strip('/')
+    if name not in QUERIES:
+        raise KeyError(f"unknown query {name!r}, expected one of {list(QUERIES)}")
+    arguments = dict(urllib.parse.parse_qsl(url.query))
+
+    output = arguments.pop('format', 'json')
+    if output not in ['json', 'png'] or (output == 'png' and name == 'dilmar'):
+        raise ValueError(f"invalid format {output!r} for {name}")
+    years = (0, 9999)
+    if name != 'dilmar' and 'years' in arguments:
+        first, _, last = arguments.pop('years').partition('-')
+        years = (int(first), int(last or first))
+        if years[0] > years[1]:
+            raise ValueError("the first year must be less or equal the second")
+
+    parameters = []
+    for parameter, default in QUERIES[name].items():
+        value = arguments.pop(parameter, default)
+        if value is None:
+            raise ValueError(f"missing parameter {parameter}")
+        parameters.append((parameter, int(value)))
+    if arguments:
+        raise ValueError(f"unknown parameters {sorted(arguments)}")
+    return name, tuple(parameters), years, output
+
+class Server:
+    """
+    Serves the hypothesis queries of a warm dataset over HTTP, on TCP or on a Unix socket.
+
+    Requests are handled by asyncio; the tables are computed in a pool of threads, which share the
+    loaded dataset. Identical queries arriving while one is being computed wait for the same
+    result instead of computing it again, and the last cache_size answers are kept.
+
+    Parameters
+    ----------
+    warm : Warm, default None
+        The loaded dataset. When None, it is built from filter.raw_file.
+    workers : int, default 4
+        Number of threads computing the queries.
+    cache_size : int, default 256
+        Number of answers kept.
+
+    Examples
+    --------
+    >>> asyncio.run(Server().serve(port=8765))
+    $ curl "localhost:8765/voted?top_n=10&shows_minimum=100&years=2022-2023"
+    {"columns":["final_average"],"index":["Disney+: (Comedy)",...],"data":[[8.12],...]}
+    """
+    def __init__(self, warm : Warm=None, workers : int=4, cache_size : int=256):
+        self.warm = Warm() if warm is None else warm
+        self.pool = concurrent.futures.ThreadPoolExecutor(workers)
+        self.cache_size = cache_size
+        self.cache = collections.OrderedDict()
+        self.pending = {}
+        self.computed = 0
+
+    async def query(self, query : tuple) -> tuple[str, bytes]:
+        """
+        Returns the answer of a query as returned by parse_query, computing it at most once.
+        """
+        if query in self.cache:
+            self.cache.move_to_end(query)
+            return self.cache[query]
+        if query not in self.pending:
+            self.pending[query] = asyncio.get_running_loop().run_in_executor(self.pool, self.warm.run, query)
+            self.computed += 1
+        future = self.pending[query]
+        try:
+            answer = await asyncio.shield(future)
+        finally:
+            if future.done():
+                self.pending.pop(query, None)
+        self.cache[query] = answer
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return answer
+
+    async def respond(self, method : str, target : str) -> tuple[int, str, bytes]:
+        # (status, content type, body) of one request
+        if method != 'GET':
+            return 405, 'application/json', json.dumps({'error': "only GET is supported"}).encode()
+        try:
+            return (200,) + await self.query(parse_query(target))
+        except KeyError as error:
+            return 404, 'application/json', json.dumps({'error': error.args[0]}).encode()
+        except (TypeError, ValueError, OverflowError) as error:
+            return 400, 'application/json', json.dumps({'error': str(error)}).encode()
+
+    async def handle(self, reader : asyncio.StreamReader, writer : asyncio.StreamWriter) -> None:
+        # one connection, kept open between requests unless the client asks otherwise
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                headers = {}
+                while (line := await reader.readline()).strip():
+                    key, _, value = line.decode('latin-1').partition(':')
+                    headers[key.strip().lower()] = value.strip()
+                method, target, version = request_line.decode('latin-1').split()
+
+                status, content_type, body = await self.respond(method, target)
+                close = headers.get('connection', '').lower() == 'close' or version == 'HTTP/1.0'
+                writer.write(f"HTTP/1.1 {status} {STATUS[status]}\r\nContent-Type: {content_type}\r\n"
+                             f"Content-Length: {len(body)}\r\nConnection: {'close' if close else 'keep-alive'}"
+                             f"\r\n\r\n".encode('latin-1') + body)
+                await writer.drain()
+                if close:
+                    break
+        except (ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host : str="127.0.0.1", port : int=8765, path : str=None, ready : asyncio.Event=None) -> None:
+        """
+        Serves forever on host:port, or on the Unix socket at path when given.
+
+        Parameters
+        ----------
+        ready : asyncio.Event, default None
+            Set once the server is listening.
+        """
+        if path is None:
+            server = await asyncio.start_server(self.handle, host, port)
+        else:
+            server = await asyncio.start_unix_server(self.handle, path)
+        self.sockets = server.sockets
+        if ready is not None:
+            ready.set()
+        async with server:
+            await server.serve_forever()
+
+def main(argv : list[str]=None) -> int:
+    parser = argparse.ArgumentParser(description="Serves the lp-tmdb hypotheses over a warm dataset.")
+    parser.add_argument('--host', default="127.0.0.1")
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--socket', help="path of a Unix socket to listen on, instead of host and port")
+    parser.add_argument('--workers', type=int, default=4, help="threads computing the queries")
+    args = parser.parse_args(argv)
+
+    server = Server(workers=args.workers)
+    print(f"serving on {args.socket or f'{args.host}:{args.port}'}")
+    try:
+        asyncio.run(server.serve(args.host, args.port, args.socket))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
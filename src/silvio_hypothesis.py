@@ -1,40 +1,42 @@
 import numpy as np
 import pandas as pd
 import matplotlib
-matplotlib.use('TkAgg') 
+matplotlib.use('Agg')
 import matplotlib.pyplot as plt
 
 from filter import filter_second
+from tracing import span, traced
+from aggregates import yearly_aggregates, top_genres, METRICS, STATS
+from sinks import Sink, FolderSink
 
-def most_frequent_genre(top_n : int, shows_minimum : int=0, years_interval : list[int]=[0,9999]) -> None:
+@traced
+def frequent_genre_table(top_n : int, shows_minimum : int=0, years_interval : list[int]=[0,9999],
+                         data : pd.DataFrame=None) -> pd.DataFrame:
     """
-    Generates a graph showing the genres of the most producted shows by networks.
+    Computes the table plotted by most_frequent_genre: the genres of the most producted shows by networks.
 
     Parameters
     ----------
     top_n : int
-        Plots just the first top_n networks and genres
-    series_minimum : int, default 0
-        Plots just networks that have at least this number os shows
+        Keeps just the first top_n networks and genres.
+    shows_minimum : int, default 0
+        Keeps just networks that have at least this number os shows.
     years_interval : list[int], default [0,9999]
-        Plots just the series aired between the first and second element (in years) of the list 
+        Keeps just the series aired between the first and second element (in years) of the list.
+    data : pandas.DataFrame, default None
+        The table to be analysed, with the columns of the TMDB dataset. When None, the dataset of the data folder is used.
+
+    Returns
+    -------
+    pandas.DataFrame
+        Indexed by "network: (genre)", with the column 'count' (absolute count of frequency), in descending order.
 
     Raises
     ------
     TypeError:
         When top_n and shows_minimum aren't instances of int, or years_interval isn't a list of two integers.
     ValueError:
-        When shows_minimum is greater then the highest value of series per network.  
-    
-    Examples
-    -------
-    >>> most_frequent_genre(60)
-    >>> most_frequent_genre(1000, 100, [2023,2024])
-
-    Notes
-    -----
-    The function won't return anything, but plots a pyplot bar graph.
-    Expects a bar graph with networks:(series) as x_labels and absolute count of frequency as y_label
+        When shows_minimum is greater then the highest value of series per network.
     """
     if not isinstance(top_n, int) or not isinstance(shows_minimum, int) or not isinstance(years_interval[0], int) \
             or not isinstance(years_interval, list) or len(years_interval) != 2:
@@ -45,7 +47,7 @@ def most_frequent_genre(top_n : int, shows_minimum : int=0, years_interval : lis
         raise ValueError("the first element of years_interval must be less or equal the second")
     
     #counting frequency of shows per network
-    raw_data = filter_second(shows_minimum, years_interval).groupby(['genres', 'networks'])['networks'].value_counts().reset_index()
+    raw_data = filter_second(shows_minimum, years_interval, data).groupby(['genres', 'networks'])['networks'].value_counts().reset_index()
     data_idx = raw_data.groupby('networks')['count'].idxmax()
     top_data = raw_data.loc[data_idx].copy()
 
@@ -55,12 +57,13 @@ def most_frequent_genre(top_n : int, shows_minimum : int=0, years_interval : lis
     
     if top_data.empty:
         raise ValueError("shows_minimum can't be greater then the highest count of shows per network")
-    plot_bar(top_data.set_index('for_plot'), "Most frequent genres by network", "Network and genre", "Average frequency", years_interval)
-    return
+    return top_data[['for_plot', 'count']].set_index('for_plot')
 
-def most_voted_genre(top_n : int, shows_minimum : int=0, years_interval : list[int]=[0,9999]) -> None:
+@traced
+def most_frequent_genre(top_n : int, shows_minimum : int=0, years_interval : list[int]=[0,9999],
+                  data : pd.DataFrame=None) -> None:
     """
-    Generates a graph showing the genres of the shows with highest average of votes by networks.
+    Generates a graph showing the genres of the most producted shows by networks.
 
     Parameters
     ----------
@@ -70,6 +73,8 @@ def most_voted_genre(top_n : int, shows_minimum : int=0, years_interval : list[i
         Plots just networks that have at least this number os shows
     years_interval : list[int], default [0,9999]
         Plots just the series aired between the first and second element (in years) of the list 
+    data : pandas.DataFrame, default None
+        The table to be analysed, with the columns of the TMDB dataset. When None, the dataset of the data folder is used.
 
     Raises
     ------
@@ -77,7 +82,7 @@ def most_voted_genre(top_n : int, shows_minimum : int=0, years_interval : list[i
         When top_n and shows_minimum aren't instances of int, or years_interval isn't a list of two integers.
     ValueError:
         When shows_minimum is greater then the highest value of series per network.  
-        
+    
     Examples
     -------
     >>> most_frequent_genre(60)
@@ -86,7 +91,40 @@ def most_voted_genre(top_n : int, shows_minimum : int=0, years_interval : list[i
     Notes
     -----
     The function won't return anything, but plots a pyplot bar graph.
-    Expects a bar graph with networks:(series) as x_labels and vote average of genre as y_label
+    Expects a bar graph with networks:(series) as x_labels and absolute count of frequency as y_label
+    """
+    top_data = frequent_genre_table(top_n, shows_minimum, years_interval, data)
+    plot_bar(top_data, "Most frequent genres by network", "Network and genre", "Average frequency", years_interval)
+    return
+
+@traced
+def voted_genre_table(top_n : int, shows_minimum : int=0, years_interval : list[int]=[0,9999],
+                      data : pd.DataFrame=None) -> pd.DataFrame:
+    """
+    Computes the table plotted by most_voted_genre: the genres of the shows with highest average of votes by networks.
+
+    Parameters
+    ----------
+    top_n : int
+        Keeps just the first top_n networks and genres.
+    shows_minimum : int, default 0
+        Keeps just networks that have at least this number os shows.
+    years_interval : list[int], default [0,9999]
+        Keeps just the series aired between the first and second element (in years) of the list.
+    data : pandas.DataFrame, default None
+        The table to be analysed, with the columns of the TMDB dataset. When None, the dataset of the data folder is used.
+
+    Returns
+    -------
+    pandas.DataFrame
+        Indexed by "network: (genre)", with the column 'final_average' (vote average of the genre), in descending order.
+
+    Raises
+    ------
+    TypeError:
+        When top_n and shows_minimum aren't instances of int, or years_interval isn't a list of two integers.
+    ValueError:
+        When shows_minimum is greater then the highest value of series per network.
     """
     if not isinstance(top_n, int) or not isinstance(shows_minimum, int) or not isinstance(years_interval[0], int) \
             or not isinstance(years_interval, list) or len(years_interval) != 2:
@@ -96,7 +134,7 @@ def most_voted_genre(top_n : int, shows_minimum : int=0, years_interval : list[i
     if years_interval[0] > years_interval[1]:
         raise ValueError("the first element of years_interval must be less or equal the second")
     
-    raw_data = filter_second(shows_minimum, years_interval)
+    raw_data = filter_second(shows_minimum, years_interval, data)
     #creating a column that'll be used to create the final vote average (the final average is calculated
     # by the sum of these averages divided by the sum ov vote_count, grouping by "series by networks")
     raw_data['average'] = raw_data['vote_count']*raw_data['vote_average']
@@ -110,29 +148,32 @@ def most_voted_genre(top_n : int, shows_minimum : int=0, years_interval : list[i
 
     if top_data.empty:
         raise ValueError("shows_minimum can't be greater then the highest count of shows per network")
-    plot_bar(top_data.set_index('for_plot'), "Most voted genres by network", "Networks and genres", "Vote average", years_interval)
-    return
+    return top_data.set_index('for_plot')
 
-def most_popular_genre(top_n : int, shows_minimum : int=0, years_interval : list[int]=[0,9999]) -> None:
+@traced
+def most_voted_genre(top_n : int, shows_minimum : int=0, years_interval : list[int]=[0,9999],
+               data : pd.DataFrame=None) -> None:
     """
-    Generates a graph showing the genres of the most popular shows by networks.
+    Generates a graph showing the genres of the shows with highest average of votes by networks.
 
     Parameters
     ----------
     top_n : int
-        Plots just the first top_n networks and genres.
+        Plots just the first top_n networks and genres
     series_minimum : int, default 0
-        Plots just networks that have at least this number os shows.
+        Plots just networks that have at least this number os shows
     years_interval : list[int], default [0,9999]
-        Plots just the series aired between the first and second element (in years) of the list. 
+        Plots just the series aired between the first and second element (in years) of the list 
+    data : pandas.DataFrame, default None
+        The table to be analysed, with the columns of the TMDB dataset. When None, the dataset of the data folder is used.
 
     Raises
     ------
     TypeError:
         When top_n and shows_minimum aren't instances of int, or years_interval isn't a list of two integers.
     ValueError:
-        When shows_minimum is greater then the highest value of series per network.      
-
+        When shows_minimum is greater then the highest value of series per network.  
+        
     Examples
     -------
     >>> most_frequent_genre(60)
@@ -141,10 +182,40 @@ def most_popular_genre(top_n : int, shows_minimum : int=0, years_interval : list
     Notes
     -----
     The function won't return anything, but plots a pyplot bar graph.
-    Expects a bar graph with networks:(series) as x_labels and popularity average as y_label.
-    Popularity is a measure based on the current rate of votes, favorites and other 
-    metrics in a daily basis, along with aired date and some other information.
-    To know more, consult https://developer.themoviedb.org/docs/popularity-and-trending
+    Expects a bar graph with networks:(series) as x_labels and vote average of genre as y_label
+    """
+    top_data = voted_genre_table(top_n, shows_minimum, years_interval, data)
+    plot_bar(top_data, "Most voted genres by network", "Networks and genres", "Vote average", years_interval)
+    return
+
+@traced
+def popular_genre_table(top_n : int, shows_minimum : int=0, years_interval : list[int]=[0,9999],
+                        data : pd.DataFrame=None) -> pd.DataFrame:
+    """
+    Computes the table plotted by most_popular_genre: the genres of the most popular shows by networks.
+
+    Parameters
+    ----------
+    top_n : int
+        Keeps just the first top_n networks and genres.
+    shows_minimum : int, default 0
+        Keeps just networks that have at least this number os shows.
+    years_interval : list[int], default [0,9999]
+        Keeps just the series aired between the first and second element (in years) of the list.
+    data : pandas.DataFrame, default None
+        The table to be analysed, with the columns of the TMDB dataset. When None, the dataset of the data folder is used.
+
+    Returns
+    -------
+    pandas.DataFrame
+        Indexed by "network: (genre)", with the column 'popularity_log' (log of the average popularity of the genre), in descending order.
+
+    Raises
+    ------
+    TypeError:
+        When top_n and shows_minimum aren't instances of int, or years_interval isn't a list of two integers.
+    ValueError:
+        When shows_minimum is greater then the highest value of series per network.
     """
     if not isinstance(top_n, int) or not isinstance(shows_minimum, int) or not isinstance(years_interval[0], int) \
             or not isinstance(years_interval, list) or len(years_interval) != 2:       
@@ -155,7 +226,7 @@ def most_popular_genre(top_n : int, shows_minimum : int=0, years_interval : list
         raise ValueError("the first element of years_interval must be less or equal the second")
     
     #taking the average popularity by "genres by network" and using it's log instead the real value for plot (a way to normalize the data)
-    raw_data = filter_second(shows_minimum, years_interval).groupby(['genres', 'networks']).mean('popularity').reset_index()[['networks', 'genres', 'popularity']]
+    raw_data = filter_second(shows_minimum, years_interval, data).groupby(['genres', 'networks']).mean('popularity').reset_index()[['networks', 'genres', 'popularity']]
     raw_data['popularity_log'] = np.log(raw_data['popularity'])
     data_idx = raw_data.groupby('networks')['popularity_log'].idxmax()
     #creating the data to plot
@@ -165,10 +236,52 @@ def most_popular_genre(top_n : int, shows_minimum : int=0, years_interval : list
 
     if top_data.empty:
         raise ValueError("shows_minimum can't be greater then the highest count of shows per network")
-    plot_bar(top_data.set_index('for_plot'), "Most popular genres by network", "Networks and genres", "Popularity", years_interval)
+    return top_data.set_index('for_plot')
+
+@traced
+def most_popular_genre(top_n : int, shows_minimum : int=0, years_interval : list[int]=[0,9999],
+                 data : pd.DataFrame=None) -> None:
+    """
+    Generates a graph showing the genres of the most popular shows by networks.
+
+    Parameters
+    ----------
+    top_n : int
+        Plots just the first top_n networks and genres.
+    series_minimum : int, default 0
+        Plots just networks that have at least this number os shows.
+    years_interval : list[int], default [0,9999]
+        Plots just the series aired between the first and second element (in years) of the list. 
+    data : pandas.DataFrame, default None
+        The table to be analysed, with the columns of the TMDB dataset. When None, the dataset of the data folder is used.
+
+    Raises
+    ------
+    TypeError:
+        When top_n and shows_minimum aren't instances of int, or years_interval isn't a list of two integers.
+    ValueError:
+        When shows_minimum is greater then the highest value of series per network.      
+
+    Examples
+    -------
+    >>> most_frequent_genre(60)
+    >>> most_frequent_genre(1000, 100, [2023,2024])
+
+    Notes
+    -----
+    The function won't return anything, but plots a pyplot bar graph.
+    Expects a bar graph with networks:(series) as x_labels and popularity average as y_label.
+    Popularity is a measure based on the current rate of votes, favorites and other 
+    metrics in a daily basis, along with aired date and some other information.
+    To know more, consult https://developer.themoviedb.org/docs/popularity-and-trending
+    """
+    top_data = popular_genre_table(top_n, shows_minimum, years_interval, data)
+    plot_bar(top_data, "Most popular genres by network", "Networks and genres", "Popularity", years_interval)
     return
 
-def plot_bar(dataframe : pd.DataFrame, plt_title : str="plot", x_axis : str="x", y_axis : str="y", years : list[int]=[0,9999]) -> None:
+@traced
+def plot_bar(dataframe : pd.DataFrame, plt_title : str="plot", x_axis : str="x", y_axis : str="y", years : list[int]=[0,9999],
+             file=None) -> None:
     """
     Auxiliar function for the other three functions. Should not be called individually.
     Plots a bar graph of a dataframe, saving it to output folder.
@@ -186,6 +299,9 @@ def plot_bar(dataframe : pd.DataFrame, plt_title : str="plot", x_axis : str="x",
         The label of the y_axis
     years : list[int], default [0,9999]
         Interval of years in which the information of the graph is restricted to.
+    file : str, file-like or sinks.Sink, default None
+        Where the png is written. When None, it is saved to the output folder as "<title>.png", and
+        in a sink it's saved as "<title>.png" too.
 
     Examples
     --------
@@ -217,7 +333,141 @@ def plot_bar(dataframe : pd.DataFrame, plt_title : str="plot", x_axis : str="x",
     plt.subplots_adjust(bottom=0.5)
     plt.rcParams.update({'font.size': 20})
     
-    plt.savefig(f"./output/{plt_title}.png", dpi=100)
+    if isinstance(file, Sink):
+        file.save(f"{plt_title}.png", dpi=100, format='png')
+    else:
+        with span("savefig"):
+            plt.savefig(f"./output/{plt_title}.png" if file is None else file, dpi=100, format='png')
     plt.close()
     print("plot saved")
     return
+
+
+@traced
+def genre_windows(metric : str, top_n : int, shows_minimum : int=0, window_size : int=2, stride : int=1,
+                  years_interval : list[int]=[1950,2024], yearly : pd.DataFrame=None) -> dict[tuple[int, int], pd.DataFrame]:
+    """
+    Computes the table of most_frequent_genre, most_popular_genre or most_voted_genre for every
+    rolling window of years, in a single pass over the year-sorted data.
+
+    The dataset is filtered and exploded just once. The sums of each window are obtained from the
+    previous one, adding the years that enter the window and subtracting the ones that leave it.
+
+    Parameters
+    ----------
+    metric : str
+        'frequent', 'popular' or 'voted', choosing which of the three tables is computed.
+    top_n : int
+        Keeps just the first top_n networks and genres of every window.
+    shows_minimum : int, default 0
+        Keeps just networks that have more than this number of shows inside the window.
+    window_size : int, default 2
+        Number of years of each window, so 2 gives the windows [y, y+1].
+    stride : int, default 1
+        Number of years between the start of two consecutive windows.
+    years_interval : list[int], default [1950,2024]
+        The first window starts at the first element, the last one ends at or before the second.
+    yearly : pandas.DataFrame, default None
+        Precomputed aggregates, as returned by aggregates.yearly_aggregates or delta.apply_delta.
+        When None, they are computed from the dataset.
+
+    Returns
+    -------
+    dict[tuple[int, int], pandas.DataFrame]
+        Maps every (first year, last year) window to the table the corresponding most_*_genre
+        function would plot. Windows where no network is left are not included.
+
+    Raises
+    ------
+    TypeError:
+        When top_n, shows_minimum, window_size or stride aren't instances of int, or years_interval
+        isn't a list of two integers.
+    ValueError:
+        When metric is unknown, window_size or stride are lesser than 1, or the first element of
+        years_interval is greater than the second.
+
+    Examples
+    --------
+    >>> genre_windows('voted', 10, 100, 2)[(2022, 2023)]
+                                   final_average
+    for_plot
+    Netflix: (Documentary)              8.113210
+    ...
+    """
+    if not isinstance(top_n, int) or not isinstance(shows_minimum, int) or not isinstance(window_size, int) \
+            or not isinstance(stride, int) or not isinstance(years_interval, list) or len(years_interval) != 2:
+        raise TypeError("check the argument types")
+    if not isinstance(years_interval[0], int) or not isinstance(years_interval[1], int):
+        raise TypeError("check the argument types")
+    if years_interval[0] > years_interval[1]:
+        raise ValueError("the first element of years_interval must be less or equal the second")
+    if window_size < 1 or stride < 1:
+        raise ValueError("window_size and stride must be greater than 0")
+    if metric not in METRICS:
+        raise ValueError(f"metric must be one of {list(METRICS)}")
+
+    first_year, last_year = years_interval
+    if yearly is None:
+        yearly = yearly_aggregates()
+    yearly = yearly[(yearly['year'] >= first_year) & (yearly['year'] <= last_year)]
+
+    # dense (year, pair) array of the sums, with zeros for the years without shows
+    pairs = yearly[['genres', 'networks']].drop_duplicates().sort_values(['genres', 'networks']).reset_index(drop=True)
+    pair_idx = pd.MultiIndex.from_frame(pairs).get_indexer(pd.MultiIndex.from_frame(yearly[['genres', 'networks']]))
+    stats = np.zeros((last_year - first_year + 1, len(pairs), len(STATS)))
+    stats[yearly['year'].to_numpy() - first_year, pair_idx] = yearly[STATS].to_numpy()
+
+    windows = {}
+    start, window = None, None
+    for begin in range(first_year, last_year - window_size + 2, stride):
+        lo = begin - first_year
+        if window is None or begin - start >= window_size:
+            window = stats[lo:lo + window_size].sum(axis=0)
+        else:
+            # slide: add the years entering the window, subtract the ones leaving it
+            window += stats[start - first_year + window_size:lo + window_size].sum(axis=0)
+            window -= stats[start - first_year:lo].sum(axis=0)
+        start = begin
+
+        summed = pairs.copy()
+        summed[STATS] = window
+        top_data = top_genres(summed, metric, top_n, shows_minimum)
+        if not top_data.empty:
+            windows[(begin, begin + window_size - 1)] = top_data
+    return windows
+
+@traced
+def plot_genre_windows(windows : dict[tuple[int, int], pd.DataFrame], metric : str, output=None) -> None:
+    """
+    Plots, in one batch, every table returned by genre_windows, saving them to output folder.
+
+    Parameters
+    ----------
+    windows : dict[tuple[int, int], pandas.DataFrame]
+        The output of genre_windows.
+    metric : str
+        The metric used to compute windows, which sets the titles and labels of the graphs.
+    output : str or sinks.Sink, default None
+        The folder, or the sink, where the graphs are saved. When None, the output folder. A sweep
+        over many windows is better written to a single file, see sinks.open_sink.
+
+    Raises
+    ------
+    ValueError:
+        When metric is unknown.
+
+    Examples
+    --------
+    >>> plot_genre_windows(genre_windows('frequent', 10, 100, 5, 5), 'frequent')
+    Most frequent genres by network, from 1950 to 1954
+    plot saved
+    ...
+    """
+    if metric not in METRICS:
+        raise ValueError(f"metric must be one of {list(METRICS)}")
+    _, plt_title, x_axis, y_axis = METRICS[metric]
+    if isinstance(output, str):
+        output = FolderSink(output)
+    for years, top_data in windows.items():
+        plot_bar(top_data, plt_title, x_axis, y_axis, list(years), output)
+    return
@@ -0,0 +1,216 @@
+import abc
+import io
+import json
+import os
+import tarfile
+import zipfile
+import matplotlib.pyplot as plt
+
+from tracing import span
+
+# bytes of rendered charts kept in memory before they are written to an archive
+FLUSH_BYTES = 32 * 2 ** 20
+
+class Sink(abc.ABC):
+    """
+    Where the charts are written. Every chart is saved under a name, such as "graph0.png", which
+    may hold subfolders separated by "/".
+
+    The sinks are context managers, closed on exit. Their attribute entries lists what was saved,
+    in order, as dictionaries with at least the key 'name'. Subclasses implement _write.
+    """
+    def __init__(self):
+        self.entries = []
+        self.closed = False
+
+    def save(self, name : str, figure=None, **options) -> None:
+        """
+        Saves a matplotlib figure (the current one when None) under name. The options are passed
+        to savefig, such as dpi.
+
+        Raises
+        ------
+        ValueError:
+            When the sink is closed.
+        """
+        if self.closed:
+            raise ValueError("the sink is closed")
+        figure = plt.gcf() if figure is None else figure
+        with span("savefig"):
+            self._write(name, figure, options)
+
+    @abc.abstractmethod
+    def _write(self, name : str, figure, options : dict) -> None:
+        # writes the figure under name and appends its entry
+        ...
+
+    def subfolder(self, name : str) -> 'Sink':
+        """
+        Returns a view of the sink that saves every chart inside the subfolder name.
+        """
+        return _Subfolder(self, name) if name else self
+
+    def close(self) -> None:
+        self.closed = True
+
+    def __enter__(self) -> 'Sink':
+        return self
+
+    def __exit__(self, *exception) -> None:
+        self.close()
+
+class _Subfolder(Sink):
+    # saves into the sink it came from, with a prefix
+    def __init__(self, sink : Sink, prefix : str):
+        self.sink = sink
+        self.prefix = prefix.strip('/')
+
+    @property
+    def entries(self) -> list[dict]:
+        return self.sink.entries
+
+    @property
+    def closed(self) -> bool:
+        return self.sink.closed
+
+    def _write(self, name : str, figure, options : dict) -> None:
+        self.sink._write(f"{self.prefix}/{name}", figure, options)
+
+    def subfolder(self, name : str) -> Sink:
+        return _Subfolder(self.sink, f"{self.prefix}/{name}") if name else self
+
+    def close(self) -> None:
+        pass
+
+class FolderSink(Sink):
+    """
+    Writes every chart to its own png file inside folder, as the charts have always been written.
+    The subfolders are created as needed.
+    """
+    def __init__(self, folder : str):
+        super().__init__()
+        self.folder = folder
+
+    def _write(self, name : str, figure, options : dict) -> None:
+        path = os.path.join(self.folder, *name.split('/'))
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        figure.savefig(path, **options)
+        self.entries.append({'name': name, 'path': path})
+
+class PdfSink(Sink):
+    """
+    Writes every chart as a page of a single PDF file, in the order they are saved. The names are
+    kept in entries, with the number of their page, starting at 1.
+
+    The file is written through a buffer of flush_bytes, so it's written in bulk.
+    """
+    def __init__(self, path : str, flush_bytes : int=FLUSH_BYTES):
+        from matplotlib.backends.backend_pdf import PdfPages
+        super().__init__()
+        self.file = open(path, 'wb', buffering=flush_bytes)
+        self.pages = PdfPages(self.file)
+
+    def _write(self, name : str, figure, options : dict) -> None:
+        options.pop('format', None)
+        self.pages.savefig(figure, **options)
+        self.entries.append({'name': name, 'page': len(self.entries) + 1})
+
+    def close(self) -> None:
+        if not self.closed:
+            self.pages.close()
+            self.file.close()
+        super().close()
+
+class ArchiveSink(Sink):
+    """
+    Writes every chart as a png inside a single zip or tar archive (.zip, .tar, .tar.gz or .tgz),
+    plus the file "manifest.json", which lists the charts in the order they were saved with their
+    size in bytes and, for uncompressed tar archives, the offset of their data in the file.
+
+    The charts are rendered into memory and written to the archive in bulk, whenever more than
+    flush_bytes are waiting and when the sink is closed.
+
+    Raises
+    ------
+    ValueError:
+        When the extension of path isn't one of an archive.
+    """
+    def __init__(self, path : str, flush_bytes : int=FLUSH_BYTES):
+        super().__init__()
+        self.flush_bytes = flush_bytes
+        self.pending = []
+        self.pending_bytes = 0
+        self.compressed = path.endswith(('.tar.gz', '.tgz'))
+        if path.endswith('.zip'):
+            # the pngs are already compressed
+            self.archive = zipfile.ZipFile(path, 'w', zipfile.ZIP_STORED)
+        elif path.endswith(('.tar', '.tar.gz', '.tgz')):
+            self.archive = tarfile.open(path, 'w:gz' if self.compressed else 'w')
+        else:
+            raise ValueError("the archive must be a .zip, .tar, .tar.gz or .tgz file")
+
+    def _write(self, name : str, figure, options : dict) -> None:
+        buffer = io.BytesIO()
+        figure.savefig(buffer, **{'format': 'png', **options})
+        self.pending.append((name, buffer.getvalue()))
+        self.pending_bytes += buffer.tell()
+        if self.pending_bytes >= self.flush_bytes:
+            self.flush()
+
+    def _add(self, name : str, content : bytes) -> dict:
+        # writes one file to the archive, returning its entry in the manifest
+        entry = {'name': name, 'bytes': len(content)}
+        if isinstance(self.archive, zipfile.ZipFile):
+            self.archive.writestr(name, content)
+        else:
+            info = tarfile.TarInfo(name)
+            info.size = len(content)
+            self.archive.addfile(info, io.BytesIO(content))
+            if not self.compressed:
+                # the data ends the member, padded to blocks of 512 bytes
+                entry['offset'] = self.archive.offset - -(-info.size // tarfile.BLOCKSIZE) * tarfile.BLOCKSIZE
+        return entry
+
+    def flush(self) -> None:
+        """
+        Writes the charts waiting in memory to the archive.
+        """
+        with span("flush"):
+            for name, content in self.pending:
+                self.entries.append(self._add(name, content))
+        self.pending = []
+        self.pending_bytes = 0
+
+    def close(self) -> None:
+        if not self.closed:
+            self.flush()
+            manifest = json.dumps({'charts': self.entries}, indent=1).encode()
+            self._add('manifest.json', manifest)
+            self.archive.close()
+        super().close()
+
+def open_sink(target : str, flush_bytes : int=FLUSH_BYTES) -> Sink:
+    """
+    Opens the sink fitting target: a PdfSink for a .pdf file, an ArchiveSink for a .zip, .tar,
+    .tar.gz or .tgz file, or else a FolderSink writing one png per chart in the folder target.
+
+    Examples
+    --------
+    >>> with open_sink("output/charts.zip") as sink:
+    ...     plot_bins(*dilmar_bins(10, 150), sink)
+    """
+    if target.endswith('.pdf'):
+        return PdfSink(target, flush_bytes)
+    if target.endswith(('.zip', '.tar', '.tar.gz', '.tgz')):
+        return ArchiveSink(target, flush_bytes)
+    return FolderSink(target)
+
+def save_figure(output, name : str, figure=None, **options) -> None:
+    """
+    Saves a matplotlib figure (the current one when None) under name in output, a Sink or the path
+    of a folder, as the plotting functions accept either.
+    """
+    if isinstance(output, Sink):
+        output.save(name, figure, **options)
+    else:
+        FolderSink(output).save(name, figure, **options)
@@ -0,0 +1,252 @@
+import numpy as np
+import pandas as pd
+
+from dedupe import _mix
+
+def _hash(values) -> np.ndarray:
+    # 64 bit hashes of the values, the same in every process (unlike the builtin hash of strings);
+    # the hashes of pandas are mixed again, as close integers get close leading bits
+    values = np.asarray(values)
+    return _mix(pd.util.hash_array(values if values.dtype.kind in 'iub' else values.astype(object)))
+
+def _bit_length(values : np.ndarray) -> np.ndarray:
+    # the number of bits of every uint64, through the exponent of floats holding 32 bits exactly
+    high = (values >> np.uint64(32)).astype(np.float64)
+    low = (values & np.uint64(0xFFFFFFFF)).astype(np.float64)
+    return np.where(high > 0, 32 + np.frexp(high)[1], np.frexp(low)[1])
+
+class HyperLogLog:
+    """
+    One HyperLogLog sketch per key, estimating the number of distinct items of every key, such as
+    the distinct shows of every network, in 2 ** precision bytes per key whatever the number of items.
+
+    Sketches are updated chunk by chunk and the sketches of other chunks or workers are merged into
+    them, counting an item seen by many of them once. The estimates have a relative standard error
+    of error = 1.04 / sqrt(2 ** precision).
+
+    Parameters
+    ----------
+    precision : int, default 12
+        Number of bits of the hashes choosing the register, between 4 and 16.
+
+    Raises
+    ------
+    ValueError:
+        When precision isn't between 4 and 16.
+
+    Examples
+    --------
+    >>> sketch = HyperLogLog()
+    >>> for chunk in pd.read_csv(path, chunksize=10000):
+    ...     sketch.update(chunk['networks'], chunk['id'])
+    >>> sketch.estimate()
+    """
+    def __init__(self, precision : int=12):
+        if not 4 <= precision <= 16:
+            raise ValueError("precision must be between 4 and 16")
+        self.precision = precision
+        self.error = 1.04 / np.sqrt(1 << precision)
+        self.labels = {}
+        self.registers = np.zeros((0, 1 << precision), dtype=np.uint8)
+
+    def _codes(self, keys) -> np.ndarray:
+        # the rows of the registers of keys, adding the new ones
+        local, uniques = pd.factorize(pd.Series(keys, dtype=object))
+        codes = np.array([self.labels.setdefault(key, len(self.labels)) for key in uniques], dtype=np.int64)
+        if len(self.labels) > len(self.registers):
+            self.registers = np.pad(self.registers, ((0, len(self.labels) - len(self.registers)), (0, 0)))
+        return codes[local]
+
+    def update(self, keys, items) -> None:
+        """
+        Adds the items to the sketches of their keys. Rows with a missing key are ignored.
+        """
+        keys = pd.Series(keys, dtype=object).reset_index(drop=True)
+        present = keys.notna().to_numpy()
+        hashes = _hash(np.asarray(items)[present])
+        codes = self._codes(keys[present])
+        # the first bits of the hash choose the register, which keeps the most leading zeros of the rest
+        rest_bits = 64 - self.precision
+        registers = (hashes >> np.uint64(rest_bits)).astype(np.int64)
+        rest = hashes & np.uint64((1 << rest_bits) - 1)
+        ranks = (rest_bits + 1 - _bit_length(rest)).astype(np.uint8)
+        np.maximum.at(self.registers, (codes, registers), ranks)
+
+    def merge(self, other : 'HyperLogLog') -> 'HyperLogLog':
+        """
+        Merges the sketches of other into these ones (keeping the largest of every register) and
+        returns self.
+
+        Raises
+        ------
+        ValueError:
+            When the precisions differ.
+        """
+        if other.precision != self.precision:
+            raise ValueError("can't merge sketches of different precisions")
+        codes = self._codes(list(other.labels))
+        self.registers[codes] = np.maximum(self.registers[codes], other.registers[:len(codes)])
+        return self
+
+    def estimate(self) -> pd.Series:
+        """
+        Returns the estimated number of distinct items of every key, indexed by the keys.
+        """
+        size = 1 << self.precision
+        alpha = 0.7213 / (1 + 1.079 / size)
+        raw = alpha * size ** 2 / np.exp2(-self.registers.astype(np.float64)).sum(axis=1)
+        # few items leave registers empty, and then counting the empty ones is more accurate
+        zeros = (self.registers == 0).sum(axis=1)
+        linear = size * np.log(size / np.maximum(zeros, 1))
+        estimate = np.where((raw <= 2.5 * size) & (zeros > 0), linear, raw)
+        return pd.Series(estimate, index=pd.Index(list(self.labels), dtype=object))
+
+class CountMinSketch:
+    """
+    Count-min sketch of the frequencies of items, such as the (genre, network) pairs, in a table of
+    depth x width counters whatever the number of items.
+
+    Every item adds its count to one counter per row, chosen by a hash of the row. The least of its
+    counters is never below the frequency of an item, and is above it by at most error (the total
+    count times e / width) with probability 1 - exp(-depth). Sketches with the same shape and seed
+    are merged by adding their counters.
+
+    Parameters
+    ----------
+    width : int, default 65536
+        Counters per row.
+    depth : int, default 4
+        Number of rows.
+    seed : int, default 0
+        Seed of the hashes of the rows.
+
+    Examples
+    --------
+    >>> sketch = CountMinSketch()
+    >>> sketch.update(["Drama", "Drama", "Comedy"])
+    >>> sketch.query(["Drama", "Crime"])
+    array([2, 0])
+    """
+    def __init__(self, width : int=65536, depth : int=4, seed : int=0):
+        self.width = width
+        self.depth = depth
+        self.seed = seed
+        self.seeds = _mix(np.arange(depth, dtype=np.uint64) + np.uint64(seed * depth))
+        self.table = np.zeros((depth, width), dtype=np.int64)
+        self.total = 0
+
+    @property
+    def error(self) -> float:
+        return np.e / self.width * self.total
+
+    def _columns(self, items) -> np.ndarray:
+        # the counter of every item in every row, of shape (depth, items)
+        hashes = _hash(items)
+        return np.stack([(_mix(hashes ^ seed) % np.uint64(self.width)).astype(np.int64) for seed in self.seeds])
+
+    def update(self, items, counts=None) -> None:
+        """
+        Adds counts (1 when None) to the frequencies of items.
+        """
+        counts = np.ones(len(items), dtype=np.int64) if counts is None else np.asarray(counts, dtype=np.int64)
+        for row, columns in enumerate(self._columns(items)):
+            self.table[row] += np.bincount(columns, weights=counts, minlength=self.width).astype(np.int64)
+        self.total += int(counts.sum())
+
+    def query(self, items) -> np.ndarray:
+        """
+        Returns the estimated frequencies of items.
+        """
+        columns = self._columns(items)
+        return self.table[np.arange(self.depth)[:, None], columns].min(axis=0)
+
+    def merge(self, other : 'CountMinSketch') -> 'CountMinSketch':
+        """
+        Adds the counters of other to these ones and returns self.
+
+        Raises
+        ------
+        ValueError:
+            When the widths, depths or seeds differ.
+        """
+        if (other.width, other.depth, other.seed) != (self.width, self.depth, self.seed):
+            raise ValueError("can't merge sketches of different shapes or seeds")
+        self.table += other.table
+        self.total += other.total
+        return self
+
+class NetworkSketch:
+    """
+    Sketches of the number of shows of every network that filter_second and filter_third compare to
+    shows_minimum, so the networks are counted in the same pass that filters the rows of a chunk.
+
+    For the rows of filter_third (one per show), a HyperLogLog per network counts its distinct shows
+    with a genre. For the exploded rows of filter_second, a count-min sketch counts every
+    (genre, network) pair and every network over all its genres.
+
+    Parameters
+    ----------
+    exploded : bool
+        Whether the rows are the exploded ones of filter_second.
+    margin : float, default 3
+        Width of the bounds of the HyperLogLog estimates, in standard errors.
+    precision : int, default 10
+        Precision of the HyperLogLog sketches, 2 ** precision bytes per network.
+    width, depth : int, default 65536, 4
+        Shape of the count-min sketch.
+    """
+    def __init__(self, exploded : bool, margin : float=3, precision : int=10, width : int=65536, depth : int=4):
+        self.exploded = exploded
+        self.margin = margin
+        self.shows = HyperLogLog(precision)
+        self.pairs = CountMinSketch(width, depth)
+        self.networks = {}
+
+    def update(self, rows : pd.DataFrame) -> None:
+        """
+        Adds a chunk of rows, already filtered row by row, with the columns 'id', 'genres' and 'networks'.
+        """
+        rows = rows[rows['genres'].notna() & rows['networks'].notna()]
+        self.networks.update(dict.fromkeys(rows['networks'].unique()))
+        if self.exploded:
+            networks = rows['networks'].astype(str)
+            self.pairs.update(pd.concat([rows['genres'].astype(str) + "\x1f" + networks, "\x1f" + networks]).to_numpy())
+        else:
+            self.shows.update(rows['networks'].to_numpy(), rows['id'].to_numpy())
+
+    def merge(self, other : 'NetworkSketch') -> 'NetworkSketch':
+        """
+        Merges the sketches of other, of another chunk or worker, into these ones and returns self.
+        """
+        self.networks.update(other.networks)
+        self.shows.merge(other.shows)
+        self.pairs.merge(other.pairs)
+        return self
+
+    def frequency(self, genres, networks) -> np.ndarray:
+        """
+        Returns the estimated number of exploded rows of every (genre, network) pair.
+        """
+        keys = pd.Series(genres, dtype=object).astype(str).to_numpy() + "\x1f" + pd.Series(networks, dtype=object).astype(str).to_numpy()
+        return self.pairs.query(keys)
+
+    def bounds(self) -> pd.DataFrame:
+        """
+        Returns the bounds of the number of shows of every network: the count is in
+        [lower, upper] with high probability.
+
+        Returns
+        -------
+        pandas.DataFrame
+            Indexed by network, with the columns 'estimate', 'lower' and 'upper'.
+        """
+        networks = pd.Index(list(self.networks), dtype=object)
+        if self.exploded:
+            estimate = pd.Series(self.pairs.query(("\x1f" + networks.astype(str)).to_numpy()), index=networks, dtype=float)
+            # the count-min sketch never counts less than there is
+            lower, upper = estimate - self.pairs.error, estimate
+        else:
+            estimate = self.shows.estimate().reindex(networks, fill_value=0)
+            lower = estimate * (1 - self.margin * self.shows.error)
+            upper = estimate * (1 + self.margin * self.shows.error)
+        return pd.DataFrame({'estimate': estimate, 'lower': lower, 'upper': upper})
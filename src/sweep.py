@@ -0,0 +1,136 @@
+import numpy as np
+import pandas as pd
+
+from filter import filter_third
+from aggregates import yearly_aggregates, best_genres, METRICS
+
+def _check_values(values : list[int]) -> None:
+    if not isinstance(values, list) or len(values) == 0 or not all(isinstance(value, int) for value in values):
+        raise TypeError("check the argument types")
+
+def sweep_shows_minimum(shows_values : list[int], metric : str, years_interval : list[int]=[0,9999],
+                        yearly : pd.DataFrame=None) -> pd.DataFrame:
+    """
+    Computes the best genre of every network of the 2nd hypothesis for many values of shows_minimum at once.
+
+    The dataset is filtered, exploded and aggregated just once. As shows_minimum only removes whole
+    networks, the best genre of each network doesn't depend on it, so every value is applied as a
+    mask over the precomputed network show counts.
+
+    Parameters
+    ----------
+    shows_values : list[int]
+        The values of shows_minimum to be evaluated.
+    metric : str
+        'frequent', 'popular' or 'voted', as in most_frequent_genre, most_popular_genre and most_voted_genre.
+    years_interval : list[int], default [0,9999]
+        Uses just the series aired between the first and second element (in years) of the list.
+    yearly : pandas.DataFrame, default None
+        Precomputed aggregates, as returned by aggregates.yearly_aggregates or delta.apply_delta.
+        When None, they are computed from the dataset.
+
+    Returns
+    -------
+    pandas.DataFrame
+        Stacked result indexed by (shows_minimum, networks), with the columns 'genres', the metric
+        column and 'shows'. A network appears under a value only if it has more shows than it.
+
+    Raises
+    ------
+    TypeError:
+        When shows_values isn't a non empty list of integers, or years_interval isn't a list of two integers.
+    ValueError:
+        When metric is unknown or the first element of years_interval is greater than the second.
+
+    Examples
+    --------
+    >>> sweep_shows_minimum([0, 100, 500], 'frequent')
+                                   genres  count  shows
+    shows_minimum networks
+    0             A&E         Documentary    186    402
+    ...
+    """
+    _check_values(shows_values)
+    if not isinstance(years_interval, list) or len(years_interval) != 2 \
+            or not isinstance(years_interval[0], int) or not isinstance(years_interval[1], int):
+        raise TypeError("check the argument types")
+    if years_interval[0] > years_interval[1]:
+        raise ValueError("the first element of years_interval must be less or equal the second")
+    if metric not in METRICS:
+        raise ValueError(f"metric must be one of {list(METRICS)}")
+
+    if yearly is None:
+        yearly = yearly_aggregates()
+    yearly = yearly[(yearly['year'] >= years_interval[0]) & (yearly['year'] <= years_interval[1])]
+    pairs = yearly.drop(columns='year').groupby(['genres', 'networks']).sum().reset_index()
+    best = best_genres(pairs, metric).set_index('networks')
+
+    shows = best['shows'].to_numpy()
+    stacked = {value: best[shows > value] for value in shows_values}
+    return pd.concat(stacked, names=['shows_minimum', 'networks'])
+
+def sweep_votes_minimum(votes_values : list[int], shows_minimum : int=0, data : pd.DataFrame=None) -> pd.DataFrame:
+    """
+    Computes the per network statistics of the 3rd hypothesis (aka. hipotheses_dilmar) for many
+    values of votes_minimum at once.
+
+    The valid shows are taken once from filter_third and their networks encoded as integers. Every
+    value of votes_minimum is then a boolean mask over vote_count, and the per network sums are
+    plain bincounts over the masked codes, instead of a new filter_third and group-by per value.
+
+    Parameters
+    ----------
+    votes_values : list[int]
+        The values of votes_minimum to be evaluated.
+    shows_minimum : int, default 0
+        Minimum number of shows that every network needs to have, as in filter_third.
+    data : pandas.DataFrame, default None
+        The table to be analysed, with the columns of the TMDB dataset. When None, the dataset of
+        the data folder is used.
+
+    Returns
+    -------
+    pandas.DataFrame
+        Stacked result indexed by (votes_minimum, networks), with the columns 'shows' (number of shows),
+        'popularity' (mean popularity) and 'vote_average' (mean vote average), for the networks that
+        filter_third(shows_minimum, votes_minimum) would keep.
+
+    Raises
+    ------
+    TypeError:
+        When votes_values isn't a non empty list of integers or shows_minimum isn't an int.
+
+    Examples
+    --------
+    >>> sweep_votes_minimum([1, 100, 1000], 100)
+                                       shows  popularity  vote_average
+    votes_minimum networks
+    1             ABC                    412   25.136165      7.020371
+    ...
+    """
+    _check_values(votes_values)
+    if not isinstance(shows_minimum, int):
+        raise TypeError("check the argument types")
+
+    # every valid show, whatever its number of votes or the size of its network
+    base = filter_third(-1, 0, data)
+    codes, networks = pd.factorize(base['networks'], sort=True)
+    vote_count = base['vote_count'].to_numpy()
+    # filter_third counts the (non null) genres of each network
+    has_genre = base['genres'].notna().to_numpy().astype(float)
+    popularity = base['popularity'].to_numpy()
+    vote_average = base['vote_average'].to_numpy()
+
+    stacked = {}
+    for value in votes_values:
+        mask = vote_count >= value
+        code = codes[mask]
+        counted = np.bincount(code, weights=has_genre[mask], minlength=len(networks))
+        shows = np.bincount(code, minlength=len(networks))
+        keep = (counted > shows_minimum) & (shows > 0)
+        stacked[value] = pd.DataFrame({
+            'shows': shows[keep],
+            'popularity': np.bincount(code, weights=popularity[mask], minlength=len(networks))[keep] / shows[keep],
+            'vote_average': np.bincount(code, weights=vote_average[mask], minlength=len(networks))[keep] / shows[keep],
+        }, index=pd.Index(networks[keep], name='networks'))
+    return pd.concat(stacked, names=['votes_minimum', 'networks'])
@@ -0,0 +1,187 @@
+import numpy as np
+import pandas as pd
+
+# the columns of data/TMDB_tv_dataset_v3.csv, in the same order
+COLUMNS = ['id', 'name', 'number_of_seasons', 'number_of_episodes', 'original_language', 'vote_count',
+           'vote_average', 'overview', 'adult', 'backdrop_path', 'first_air_date', 'last_air_date', 'homepage',
+           'in_production', 'original_name', 'popularity', 'poster_path', 'type', 'status', 'tagline', 'genres',
+           'created_by', 'languages', 'networks', 'origin_country', 'spoken_languages', 'production_companies',
+           'production_countries', 'episode_run_time']
+
+GENRES = ['Drama', 'Comedy', 'Documentary', 'Animation', 'Reality', 'Crime', 'Action & Adventure', 'Family',
+          'Sci-Fi & Fantasy', 'Mystery', 'Talk', 'Kids', 'News', 'Soap', 'War & Politics', 'Western']
+LANGUAGES = ['en', 'ja', 'ko', 'es', 'zh', 'fr', 'de', 'pt', 'it', 'tr']
+COUNTRIES = ['United States of America', 'Japan', 'South Korea', 'Spain', 'China', 'France', 'Germany',
+             'Brazil', 'Italy', 'Turkey']
+TYPES = ['Scripted', 'Reality', 'Documentary', 'Miniseries', 'Talk Show', 'News']
+STATUS = ['Ended', 'Returning Series', 'Canceled', 'In Production']
+
+def _zipf_choice(rng : np.random.Generator, pool_size : int, size : int, exponent : float=1.1) -> np.ndarray:
+    # indexes of pool items drawn with probability proportional to 1 / rank ** exponent
+    weights = 1 / np.arange(1, pool_size + 1) ** exponent
+    return rng.choice(pool_size, size=size, p=weights / weights.sum())
+
+def _multi_valued(rng : np.random.Generator, pool : list[str], size : int, max_values : int, missing : float) -> list:
+    # comma separated lists of distinct values, as the genres and networks fields of the dataset
+    values = _zipf_choice(rng, len(pool), (size, max_values))
+    lengths = rng.integers(1, max_values + 1, size)
+    joined = [", ".join(dict.fromkeys(pool[item] for item in row[:length])) for row, length in zip(values, lengths)]
+    return [np.nan if drop else item for item, drop in zip(joined, rng.random(size) < missing)]
+
+def generate(rows : int, seed : int=0, start_id : int=1, networks : int=2000) -> pd.DataFrame:
+    """
+    Generates a synthetic table with the columns and the shape of the TMDB TV shows dataset.
+
+    Popularity and vote_count are heavy tailed, genres and networks are multi valued with Zipfian
+    frequencies, and first air dates are spread from 1950 to 2024, with more shows in recent years.
+    About 5% of genres, networks and dates are missing, and some shows have no votes or episodes,
+    so the filters have something to drop.
+
+    Parameters
+    ----------
+    rows : int
+        Number of shows to generate.
+    seed : int, default 0
+        Seed of the random generator. The same seed always gives the same table.
+    start_id : int, default 1
+        The id of the first show; the following ones are consecutive.
+    networks : int, default 2000
+        Number of distinct networks.
+
+    Returns
+    -------
+    pandas.DataFrame
+        The synthetic table, with the columns in COLUMNS.
+
+    Raises
+    ------
+    TypeError:
+        When rows, seed, start_id or networks aren't instances of int.
+    ValueError:
+        When rows is negative or networks is lesser than 1.
+
+    Examples
+    --------
+    >>> generate(3)
+       id           name  number_of_seasons  ...  production_countries  episode_run_time
+    0   1  Show 00000001                  2  ...           South Korea                18
+    ...
+    """
+    if not all(isinstance(item, int) for item in [rows, seed, start_id, networks]):
+        raise TypeError("check the argument types")
+    if rows < 0 or networks < 1:
+        raise ValueError("rows can't be negative and networks must be greater than 0")
+
+    rng = np.random.default_rng(seed)
+    network_pool = np.array([f"Network {i}" for i in range(networks)], dtype=object)
+    ids = np.arange(start_id, start_id + rows)
+
+    seasons = np.minimum(rng.geometric(0.45, rows), 40)
+    episodes = np.where(rng.random(rows) < 0.03, 0, seasons * rng.integers(1, 30, rows))
+    vote_count = np.floor(rng.pareto(0.9, rows) * 3).astype(int)
+    vote_average = np.where(vote_count > 0, np.round(np.clip(rng.normal(6.8, 1.4, rows), 0.5, 10), 3), 0.0)
+    popularity = np.round(rng.lognormal(1.2, 1.3, rows), 3)
+
+    # more shows every decade, as the real dataset
+    years = 1950 + np.floor(75 * rng.random(rows) ** 0.4).astype(int)
+    dates = pd.to_datetime({'year': years, 'month': rng.integers(1, 13, rows), 'day': rng.integers(1, 29, rows)})
+    first_air_date = dates.dt.strftime('%Y-%m-%d').to_numpy(dtype=object)
+    first_air_date[rng.random(rows) < 0.05] = np.nan
+    last_air_date = (dates + pd.to_timedelta(seasons * rng.integers(30, 400, rows), unit='D')).dt.strftime('%Y-%m-%d')
+
+    language = rng.integers(0, len(LANGUAGES), rows)
+    names = np.array([f"Show {item:08d}" for item in ids], dtype=object)
+    status = rng.integers(0, len(STATUS), rows)
+
+    return pd.DataFrame({
+        'id': ids,
+        'name': names,
+        'number_of_seasons': np.where(rng.random(rows) < 0.02, 0, seasons),
+        'number_of_episodes': episodes,
+        'original_language': np.array(LANGUAGES, dtype=object)[language],
+        'vote_count': vote_count,
+        'vote_average': vote_average,
+        'overview': np.nan,
+        'adult': rng.random(rows) < 0.01,
+        'backdrop_path': np.nan,
+        'first_air_date': first_air_date,
+        'last_air_date': last_air_date,
+        'homepage': np.nan,
+        'in_production': status == 3,
+        'original_name': names,
+        'popularity': popularity,
+        'poster_path': np.nan,
+        'type': np.array(TYPES, dtype=object)[_zipf_choice(rng, len(TYPES), rows)],
+        'status': np.array(STATUS, dtype=object)[status],
+        'tagline': np.nan,
+        'genres': _multi_valued(rng, GENRES, rows, 3, 0.05),
+        'created_by': np.nan,
+        'languages': np.array(LANGUAGES, dtype=object)[language],
+        'networks': _multi_valued(rng, network_pool, rows, 2, 0.05),
+        'origin_country': np.nan,
+        'spoken_languages': np.nan,
+        'production_companies': np.nan,
+        'production_countries': np.array(COUNTRIES, dtype=object)[language],
+        'episode_run_time': np.where(rng.random(rows) < 0.4, 0, rng.integers(10, 70, rows)),
+    }, columns=COLUMNS)
+
+def write_synthetic(path : str, rows : int, seed : int=0, chunk_size : int=100000, networks : int=2000) -> None:
+    """
+    Writes a synthetic dataset in chunks, so it can be larger than the available memory.
+
+    Each chunk is generated with its own seed, derived from seed and the chunk number, so the
+    file only depends on seed and chunk_size.
+
+    Parameters
+    ----------
+    path : str
+        Destination file. A path ending in .parquet is written as Parquet (which needs pyarrow),
+        anything else as a csv readable by filter.py.
+    rows : int
+        Total number of shows.
+    seed : int, default 0
+        Seed of the random generator.
+    chunk_size : int, default 100000
+        Number of shows generated and written at a time.
+    networks : int, default 2000
+        Number of distinct networks.
+
+    Raises
+    ------
+    TypeError:
+        When the numeric arguments aren't instances of int.
+    ValueError:
+        When rows is negative or chunk_size is lesser than 1.
+    ImportError:
+        When a Parquet file is requested and pyarrow isn't installed.
+
+    Examples
+    --------
+    >>> write_synthetic("data/synthetic_10x.csv", 575000)
+    """
+    if not all(isinstance(item, int) for item in [rows, seed, chunk_size, networks]):
+        raise TypeError("check the argument types")
+    if rows < 0 or chunk_size < 1:
+        raise ValueError("rows can't be negative and chunk_size must be greater than 0")
+
+    parquet = path.endswith('.parquet')
+    if parquet:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        writer = None
+
+    seeds = np.random.SeedSequence(seed).generate_state(max(1, -(-rows // chunk_size)))
+    for number, start in enumerate(range(0, rows, chunk_size)):
+        chunk = generate(min(chunk_size, rows - start), int(seeds[number]), start + 1, networks)
+        if parquet:
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema)
+            writer.write_table(table)
+        else:
+            chunk.to_csv(path, mode='w' if start == 0 else 'a', header=start == 0, index=False)
+
+    if parquet and writer is not None:
+        writer.close()
+    elif rows == 0 and not parquet:
+        pd.DataFrame(columns=COLUMNS).to_csv(path, index=False)
@@ -0,0 +1,245 @@
+import atexit
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+import pandas as pd
+
+# when this variable holds a path, tracing starts at import and the trace is written there at exit
+ENV_VAR = 'TMDB_TRACE'
+
+_enabled = False
+_started_tracemalloc = False
+_events = []
+# objects with enter(span) and exit(span) methods, called at the boundaries of every recorded span
+_listeners = []
+_stack = threading.local()
+# the open spans of every thread, to tell which ones overlap a span of another thread
+_open = []
+_open_lock = threading.Lock()
+_origin = time.perf_counter()
+
+def _rows(value) -> int:
+    # number of rows of a table (or of the first table of a tuple), None for anything else
+    if isinstance(value, tuple) and value:
+        value = value[0]
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return len(value)
+    return None
+
+class span:
+    """
+    Context manager that records one stage of a run when tracing is enabled, and does nothing otherwise.
+
+    The wall time, CPU time, peak memory allocated inside the stage (from tracemalloc) and the
+    number of rows in and out are recorded. The rows are set by the caller through the attributes
+    rows_in and rows_out.
+
+    The peak of tracemalloc is process-wide, so it can't be told apart between threads: a span
+    that overlaps a span of another thread records no peak (None).
+
+    Parameters
+    ----------
+    name : str
+        Name of the stage, as shown in the trace and in the summary.
+    rows_in : int, default None
+        Number of rows the stage receives.
+
+    Examples
+    --------
+    >>> with span("explode") as stage:
+    ...     exploded = data.explode('genres')
+    ...     stage.rows_out = len(exploded)
+    """
+    def __init__(self, name : str, rows_in : int=None):
+        self.name = name
+        self.rows_in = rows_in
+        self.rows_out = None
+
+    def __enter__(self):
+        if not _enabled:
+            return self
+        parents = getattr(_stack, 'spans', None)
+        if parents is None:
+            parents = _stack.spans = []
+        if parents:
+            # the peak reached so far belongs to the enclosing span, as the counter is reset below
+            parents[-1].peak = max(parents[-1].peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.reset_peak()
+        self.peak = 0
+        self.thread = threading.get_ident()
+        self.shared = False
+        with _open_lock:
+            if any(other.thread != self.thread for other in _open):
+                self.shared = True
+                for other in _open:
+                    other.shared = True
+            _open.append(self)
+        parents.append(self)
+        for listener in _listeners:
+            listener.enter(self)
+        self.cpu = time.process_time()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        if not _enabled or not hasattr(self, 'start'):
+            return False
+        end = time.perf_counter()
+        cpu = time.process_time() - self.cpu
+        self.peak = max(self.peak, tracemalloc.get_traced_memory()[1])
+        with _open_lock:
+            _open.remove(self)
+        if self.shared:
+            # other threads allocated and reset the peak meanwhile
+            self.peak = None
+        for listener in _listeners:
+            listener.exit(self)
+        _stack.spans.pop()
+        if _stack.spans and self.peak is not None:
+            _stack.spans[-1].peak = max(_stack.spans[-1].peak, self.peak)
+        _events.append({
+            'name': self.name,
+            'start': self.start - _origin,
+            'wall': end - self.start,
+            'cpu': cpu,
+            'peak_bytes': self.peak,
+            'rows_in': self.rows_in,
+            'rows_out': self.rows_out,
+            'thread': self.thread,
+        })
+        return False
+
+def traced(function):
+    """
+    Decorator that runs the function inside a span named after it, taking the rows in from its
+    first table argument and the rows out from its result. When tracing is disabled the function
+    is called directly.
+    """
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        if not _enabled:
+            return function(*args, **kwargs)
+        rows_in = next((rows for rows in map(_rows, args) if rows is not None), None)
+        with span(function.__qualname__, rows_in) as stage:
+            result = function(*args, **kwargs)
+            stage.rows_out = _rows(result)
+        return result
+    return wrapper
+
+def enable() -> None:
+    """
+    Starts recording spans (and tracemalloc, if it isn't running yet), discarding previous ones.
+    """
+    global _enabled, _started_tracemalloc
+    _events.clear()
+    _stack.spans = []
+    with _open_lock:
+        _open.clear()
+    if not tracemalloc.is_tracing():
+        tracemalloc.start()
+        _started_tracemalloc = True
+    _enabled = True
+
+def disable() -> None:
+    """
+    Stops recording spans. The recorded ones are kept until the next enable.
+    """
+    global _enabled, _started_tracemalloc
+    _enabled = False
+    if _started_tracemalloc:
+        tracemalloc.stop()
+        _started_tracemalloc = False
+
+def write_chrome_trace(path : str) -> None:
+    """
+    Writes the recorded spans as a Chrome trace, which can be opened in chrome://tracing or Perfetto.
+
+    Parameters
+    ----------
+    path : str
+        Destination of the JSON file.
+    """
+    events = [{
+        'name': event['name'],
+        'ph': 'X',
+        'ts': event['start'] * 1e6,
+        'dur': event['wall'] * 1e6,
+        'pid': os.getpid(),
+        'tid': event['thread'],
+        'args': {key: event[key] for key in ['cpu', 'peak_bytes', 'rows_in', 'rows_out']
+                 if key != 'peak_bytes' or event[key] is not None},
+    } for event in _events]
+    with open(path, 'w') as file:
+        json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, file)
+
+def summary() -> pd.DataFrame:
+    """
+    Summarizes the recorded spans by name.
+
+    Returns
+    -------
+    pandas.DataFrame
+        Indexed by span name, with the number of calls, the total wall and CPU seconds, the highest
+        peak of memory (missing when every call overlapped another thread) and the total rows in
+        and out, sorted by wall time.
+
+    Examples
+    --------
+    >>> with tracing():
+    ...     filter_second(100)
+    >>> summary()
+                              calls      wall       cpu  peak_bytes  rows_in  rows_out
+    name
+    filter_second                 1  1.071321  1.060917   142265839     <NA>     90676
+    ...
+    """
+    columns = ['calls', 'wall', 'cpu', 'peak_bytes', 'rows_in', 'rows_out']
+    if not _events:
+        return pd.DataFrame(columns=columns).rename_axis('name')
+    events = pd.DataFrame(_events)
+    table = events.groupby('name').agg(calls=('wall', 'size'), wall=('wall', 'sum'), cpu=('cpu', 'sum'),
+                                       peak_bytes=('peak_bytes', 'max'),
+                                       rows_in=('rows_in', lambda rows: rows.sum(min_count=1)),
+                                       rows_out=('rows_out', lambda rows: rows.sum(min_count=1)))
+    table = table.astype({'peak_bytes': 'Int64', 'rows_in': 'Int64', 'rows_out': 'Int64'})
+    return table[columns].sort_values('wall', ascending=False)
+
+class tracing:
+    """
+    Context manager that enables tracing inside its block.
+
+    Parameters
+    ----------
+    path : str, default None
+        When given, the Chrome trace is written there at the end of the block.
+
+    Examples
+    --------
+    >>> with tracing("trace.json"):
+    ...     most_voted_genre(10, 100)
+    >>> print(summary())
+    """
+    def __init__(self, path : str=None):
+        self.path = path
+
+    def __enter__(self):
+        enable()
+        return self
+
+    def __exit__(self, *exc):
+        disable()
+        if self.path is not None:
+            write_chrome_trace(self.path)
+        return False
+
+def _write_at_exit(path : str) -> None:
+    disable()
+    write_chrome_trace(path)
+    print(summary().to_string())
+
+if os.environ.get(ENV_VAR):
+    enable()
+    atexit.register(_write_at_exit, os.environ[ENV_VAR])
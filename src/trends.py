@@ -0,0 +1,172 @@
+import numpy as np
+import pandas as pd
+
+import filter as flt
+from dictionary import DICTIONARY, split_codes
+from engine import get_engine
+from tracing import span, traced
+
+# metric -> (sum of the numerator, sum of the denominator) of its yearly value; the count has none
+METRICS = {
+    'count': ('count', None),
+    'popularity': ('popularity', 'count'),
+    'vote_average': ('weighted_votes', 'votes'),
+}
+
+def _ratio(numerator : np.ndarray, denominator : np.ndarray) -> np.ndarray:
+    # numerator / denominator, NaN where the denominator is 0
+    return np.divide(numerator, denominator, out=np.full(numerator.shape, np.nan), where=denominator > 0)
+
+class NetworkTrends:
+    """
+    Yearly series of every network, by first air year: the number of shows, their mean popularity
+    and their vote average weighted by vote_count. They're kept as dense (networks x years) arrays of
+    sums, so rolling means and year over year deltas are computed for every network at once.
+
+    Built by network_trends.
+
+    Attributes
+    ----------
+    networks : pandas.Index
+        The networks, in alphabetical order, one per row of the arrays.
+    years : numpy.ndarray
+        The years, one per column of the arrays, every year between the first and the last.
+    sums : dict[str, numpy.ndarray]
+        The (networks x years) sums of 'count', 'popularity', 'votes' (vote_count) and
+        'weighted_votes' (vote_count * vote_average).
+    """
+    def __init__(self, networks : pd.Index, years : np.ndarray, sums : dict):
+        self.networks = networks
+        self.years = years
+        self.sums = sums
+
+    def _frame(self, values : np.ndarray) -> pd.DataFrame:
+        return pd.DataFrame(values, index=self.networks, columns=pd.Index(self.years, name='year'))
+
+    def _check(self, metric : str) -> None:
+        if metric not in METRICS:
+            raise ValueError(f"metric must be one of {list(METRICS)}")
+
+    def series(self, metric : str) -> pd.DataFrame:
+        """
+        Returns the yearly values of metric ('count', 'popularity' or 'vote_average') of every network,
+        indexed by network with a column per year. Means of years without shows (or votes) are NaN.
+
+        Raises
+        ------
+        ValueError:
+            When metric isn't one of the keys of METRICS.
+        """
+        self._check(metric)
+        numerator, denominator = METRICS[metric]
+        if denominator is None:
+            return self._frame(self.sums[numerator])
+        return self._frame(_ratio(self.sums[numerator], self.sums[denominator]))
+
+    def rolling(self, metric : str, window : int) -> pd.DataFrame:
+        """
+        Returns the means of metric over the window years ending at every year, from cumulative sums:
+        the mean yearly count, or the popularity and vote average of all the shows of the window.
+        The first window - 1 years average the years there are.
+
+        Raises
+        ------
+        ValueError:
+            When metric isn't one of the keys of METRICS or window is less than 1.
+        """
+        self._check(metric)
+        if window < 1:
+            raise ValueError("window must be at least 1")
+
+        def windowed(values):
+            sums = np.cumsum(values, axis=1)
+            sums[:, window:] = sums[:, window:] - sums[:, :-window]
+            return sums
+
+        numerator, denominator = METRICS[metric]
+        if denominator is None:
+            years = np.minimum(np.arange(1, len(self.years) + 1), window)
+            return self._frame(windowed(self.sums[numerator]) / years)
+        return self._frame(_ratio(windowed(self.sums[numerator]), windowed(self.sums[denominator])))
+
+    def delta(self, metric : str, window : int=1) -> pd.DataFrame:
+        """
+        Returns the year over year change of metric, or of its rolling mean when window is greater
+        than 1. The first year is NaN.
+        """
+        values = (self.series(metric) if window == 1 else self.rolling(metric, window)).to_numpy()
+        deltas = np.full(values.shape, np.nan)
+        deltas[:, 1:] = values[:, 1:] - values[:, :-1]
+        return self._frame(deltas)
+
+@traced
+def network_trends(shows_minimum : int=0, data : pd.DataFrame=None) -> NetworkTrends:
+    """
+    Computes the yearly series of every network, the 4th analysis: how the number of shows, their
+    popularity and their ratings changed over the years on every network.
+
+    A show with many networks counts for each of them. Every (network, year) cell is summed at once
+    with bincount over the dictionary codes of the networks, with no loop over the networks.
+
+    Parameters
+    ----------
+    shows_minimum : int, default 0
+        Keeps just the networks with more than this number of shows over all the years.
+    data : pandas.DataFrame, default None
+        The table to be analysed, with the columns of the TMDB dataset. When None, the dataset of
+        the data folder is used. Shows without networks, first air date or popularity are left out.
+
+    Returns
+    -------
+    NetworkTrends
+        The series, see NetworkTrends.
+
+    Raises
+    ------
+    TypeError:
+        When shows_minimum isn't an instance of int.
+
+    Examples
+    --------
+    >>> trends = network_trends(100)
+    >>> trends.series('popularity').loc['HBO', 2015:2020]
+    >>> trends.delta('vote_average', window=3)
+    """
+    if not isinstance(shows_minimum, int):
+        raise TypeError("check the argument types")
+    if data is None:
+        data = flt.raw_file
+
+    with span("trends.codes", len(data)) as stage:
+        rows = np.flatnonzero(flt.valid_rows(data, ['networks', 'first_air_date']) & data['popularity'].notna().to_numpy())
+        dates, uniques = get_engine().factorize(data['first_air_date'].to_numpy()[rows])
+        years = get_engine().years(uniques)[dates]
+        counts, codes = split_codes(data['networks'].iloc[rows])
+        # one snapshot of the ranks, as other threads adding strings to the dictionary change them
+        ranks = DICTIONARY.ranks()
+        # one item per (show, network), with the network numbered in alphabetical order
+        used, networks = np.unique(ranks[codes], return_inverse=True)
+        stage.rows_out = len(codes)
+
+    with span("trends.bincount", len(codes)) as stage:
+        first = years.min() if len(years) else 0
+        n_years = years.max() - first + 1 if len(years) else 0
+        cells = networks * n_years + np.repeat(years - first, counts)
+        size = len(used) * n_years
+        vote_count = data['vote_count'].to_numpy()[rows].astype(float)
+        weights = {
+            'count': None,
+            'popularity': data['popularity'].to_numpy()[rows],
+            'votes': vote_count,
+            'weighted_votes': vote_count * np.nan_to_num(data['vote_average'].to_numpy()[rows].astype(float)),
+        }
+        sums = {name: np.bincount(cells, weights=None if values is None else np.repeat(values, counts),
+                                  minlength=size).reshape(len(used), n_years) for name, values in weights.items()}
+        kept = sums['count'].sum(axis=1) > shows_minimum
+        sums = {name: values[kept] for name, values in sums.items()}
+        stage.rows_out = int(kept.sum())
+
+    # the code of every rank, to decode the networks
+    order = np.argsort(ranks)
+    return NetworkTrends(pd.Index(DICTIONARY.decode(order[used[kept]]), name='networks'),
+                         np.arange(first, first + n_years), sums)
@@ -0,0 +1,123 @@
+import weakref
+import numpy as np
+import pandas as pd
+
+def _trigrams(text : str) -> set[str]:
+    # the distinct 3-character substrings of text
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+class TrigramIndex:
+    """
+    Inverted index of the trigrams (3-character substrings) of the names of a table: for every
+    trigram, the rows whose name holds it, in ascending order. Names are lowercased and padded with
+    a space on each side, so the trigrams of a name also mark where its words start and end.
+
+    A substring lookup intersects the rows of the trigrams of the pattern and checks just those
+    names, instead of scanning all of them; a fuzzy lookup counts the trigrams shared with every name.
+
+    Parameters
+    ----------
+    names : array-like
+        The names, in the order of the rows of the table. Missing names match nothing.
+    ids : array-like, default None
+        The ids returned for the rows. When None, the positions of the rows.
+
+    Examples
+    --------
+    >>> index = TrigramIndex(["Stranger Things", "Squid Game", "Sweet Home season 2"], ids=[66732, 93405, 96648])
+    >>> index.contains("season 2")
+    array([96648])
+    >>> index.fuzzy("stranger thngs")
+    array([66732])
+    """
+    def __init__(self, names, ids=None):
+        self.names = pd.Series(names, dtype=object).fillna('').astype(str).str.lower().to_numpy()
+        self.size = len(self.names)
+        self.ids = np.arange(self.size) if ids is None else np.asarray(ids)
+        grams, counts = [], []
+        for name in self.names:
+            found = _trigrams(f" {name} ") if name else set()
+            grams.extend(found)
+            counts.append(len(found))
+        self.counts = np.array(counts, dtype=np.int64)
+        codes, self.vocabulary = pd.factorize(pd.Series(grams, dtype=object))
+        # the rows of the trigram c are postings[offsets[c]:offsets[c + 1]], ascending as the rows were
+        # added in order and the sort is stable
+        self.postings = np.repeat(np.arange(self.size), self.counts)[np.argsort(codes, kind='stable')]
+        self.offsets = np.concatenate([[0], np.cumsum(np.bincount(codes, minlength=len(self.vocabulary)))])
+
+    def _rows(self, grams) -> list[np.ndarray]:
+        # the posting lists of the trigrams, None for the trigrams no name holds
+        codes = self.vocabulary.get_indexer(list(grams))
+        return [None if code < 0 else self.postings[self.offsets[code]:self.offsets[code + 1]] for code in codes]
+
+    def contains(self, pattern : str) -> np.ndarray:
+        """
+        Returns the ids of the rows whose name holds pattern, ignoring case, in the order of the rows.
+        Patterns shorter than 3 characters are looked up by scanning every name.
+        """
+        pattern = pattern.lower()
+        if len(pattern) < 3:
+            candidates = np.arange(self.size)
+        else:
+            postings = self._rows(_trigrams(pattern))
+            if any(rows is None for rows in postings):
+                return self.ids[:0]
+            postings.sort(key=len)
+            candidates = postings[0]
+            for rows in postings[1:]:
+                candidates = np.intersect1d(candidates, rows, assume_unique=True)
+        # the trigrams may be in the name without being next to each other
+        found = [row for row in candidates if pattern in self.names[row]]
+        return self.ids[np.array(found, dtype=np.int64)]
+
+    def similarity(self, query : str) -> np.ndarray:
+        """
+        Returns the Jaccard similarity of the trigrams of query and of the name of every row, between
+        0 (none shared) and 1 (the same trigrams).
+        """
+        grams = _trigrams(f" {query.lower()} ")
+        postings = [rows for rows in self._rows(grams) if rows is not None]
+        shared = np.bincount(np.concatenate(postings), minlength=self.size) if postings else np.zeros(self.size)
+        union = len(grams) + self.counts - shared
+        return np.divide(shared, union, out=np.zeros(self.size), where=union > 0)
+
+    def fuzzy(self, query : str, threshold : float=0.4, limit : int=None) -> np.ndarray:
+        """
+        Returns the ids of the rows whose name has at least threshold similarity (see similarity) with
+        query, such as misspelled or localized titles, from the most similar; at most limit of them.
+        """
+        similarity = self.similarity(query)
+        rows = np.flatnonzero(similarity >= threshold)
+        rows = rows[np.argsort(-similarity[rows], kind='stable')][:limit]
+        return self.ids[rows]
+
+# id of a table -> (weak reference to it, its TrigramIndex)
+_indexes = {}
+
+def name_index(data : pd.DataFrame) -> TrigramIndex:
+    """
+    Returns the TrigramIndex of the column 'name' of data, returning the values of its column 'id',
+    built the first time and kept while the table exists. It's rebuilt when the number of rows
+    changes, or when it was dropped by drop_name_index, as filter.rows_changed does after rows of
+    the table are changed in place.
+
+    The ids it returns select the same shows in the filters, through their parameter ids.
+
+    Examples
+    --------
+    >>> filter_third(10, data=raw_file, ids=name_index(raw_file).contains("star trek"))
+    """
+    key = id(data)
+    entry = _indexes.get(key)
+    if entry is None or entry[0]() is not data or entry[1].size != len(data):
+        index = TrigramIndex(data['name'].to_numpy(), data['id'].to_numpy())
+        entry = (weakref.ref(data, lambda _: _indexes.pop(key, None)), index)
+        _indexes[key] = entry
+    return entry[1]
+
+def drop_name_index(data : pd.DataFrame) -> None:
+    """
+    Drops the TrigramIndex kept for data, so it's built again the next time it's used.
+    """
+    _indexes.pop(id(data), None)
@@ -0,0 +1,76 @@
+import io
+import json
+import threading
+import pandas as pd
+
+import silvio_hypothesis as sv
+import dilmar_hypothesis as dm
+from filter import filter_second
+from aggregates import yearly_aggregates, top_genres, METRICS
+
+# pyplot keeps global state, so the threads render one chart at a time
+_plot_lock = threading.Lock()
+
+class Warm:
+    """
+    The dataset kept in memory by the server and by the batch runs, already reduced to what the
+    queries need.
+
+    The genre queries are answered from the per year aggregates of the 2nd hypothesis, built once,
+    so each one just sums the rows of its years; the bins of the 3rd hypothesis are computed from
+    the loaded dataset. Many versions of the dataset can be kept side by side, one per instance.
+
+    Parameters
+    ----------
+    yearly : pandas.DataFrame, default None
+        Aggregates as returned by aggregates.yearly_aggregates. When None, they are computed from data.
+    data : pandas.DataFrame, default None
+        The table served, with the columns of the TMDB dataset. When None, the dataset of the data
+        folder is used.
+    """
+    def __init__(self, yearly : pd.DataFrame=None, data : pd.DataFrame=None):
+        self.data = data
+        self.yearly = yearly_aggregates(filter_second(0, data=data)) if yearly is None else yearly
+        self.years = self.yearly['year'].to_numpy()
+
+    def genre_table(self, metric : str, top_n : int, shows_minimum : int=0, years : tuple=(0, 9999)) -> pd.DataFrame:
+        """
+        Returns the same table as the *_genre_table function of the metric in silvio_hypothesis.
+
+        Raises
+        ------
+        ValueError:
+            When shows_minimum is greater then the highest value of series per network.
+        """
+        yearly = self.yearly[(self.years >= years[0]) & (self.years <= years[1])]
+        pairs = yearly.drop(columns='year').groupby(['genres', 'networks']).sum().reset_index()
+        table = top_genres(pairs, metric, top_n, shows_minimum)
+        if table.empty:
+            raise ValueError("shows_minimum can't be greater then the highest count of shows per network")
+        return table[['count']] if metric == 'frequent' else table
+
+    def run(self, query : tuple) -> tuple[str, bytes]:
+        """
+        Answers a query as returned by parse_query.
+
+        Returns
+        -------
+        tuple[str, bytes]
+            The content type and the body of the response: the table as JSON (pandas 'split'
+            orientation, plus the intervals for 'dilmar') or the chart as png.
+        """
+        name, parameters, years, output = query
+        parameters = dict(parameters)
+        if name == 'dilmar':
+            df, bins_intervals = dm.dilmar_bins(parameters['shows_minimum'], parameters['votes_minimum'], self.data)
+            body = {'table': json.loads(df.to_json(orient='split', index=False)), 'bins': bins_intervals}
+            return 'application/json', json.dumps(body).encode()
+
+        table = self.genre_table(name, parameters['top_n'], parameters['shows_minimum'], years)
+        if output == 'json':
+            return 'application/json', table.to_json(orient='split').encode()
+        _, title, x_axis, y_axis = METRICS[name]
+        buffer = io.BytesIO()
+        with _plot_lock:
+            sv.plot_bar(table, title, x_axis, y_axis, list(years), buffer)
+        return 'image/png', buffer.getvalue()
@@ -0,0 +1,46 @@
+import unittest
+import numpy as np
+import pandas as pd
+
+from src.aggregates import yearly_aggregates, top_genres
+
+class TestAggregates(unittest.TestCase):
+
+    def setUp(self):
+        self.exploded = pd.DataFrame({
+            'first_air_date': ['2022-01-10', '2022-05-03', '2023-02-01', '2023-02-01', '2023-07-21'],
+            'genres': ['Drama', 'Comedy', 'Drama', 'Drama', 'Comedy'],
+            'networks': ['HBO', 'HBO', 'HBO', 'Netflix', 'Netflix'],
+            'popularity': [10.0, 20.0, 30.0, 30.0, 5.0],
+            'vote_count': [10, 30, 10, 10, 50],
+            'vote_average': [8.0, 6.0, 9.0, 9.0, 7.0],
+        })
+
+    def test_yearly_aggregates(self):
+        result = yearly_aggregates(self.exploded)
+        self.assertEqual(len(result), 5)
+        row = result[(result['year'] == 2023) & (result['networks'] == 'HBO')].iloc[0]
+        self.assertEqual(row['count'], 1)
+        self.assertEqual(row['average'], 90.0)
+
+    def test_top_genres_metrics(self):
+        pairs = yearly_aggregates(self.exploded).groupby(['genres', 'networks']).sum().reset_index()
+        frequent = top_genres(pairs, 'frequent', 10)
+        self.assertEqual(frequent.loc['HBO: (Drama)', 'count'], 2)
+        voted = top_genres(pairs, 'voted', 10)
+        self.assertEqual(list(voted.index), ['Netflix: (Drama)', 'HBO: (Drama)'])
+        self.assertAlmostEqual(voted.loc['HBO: (Drama)', 'final_average'], 8.5)
+        popular = top_genres(pairs, 'popular', 1)
+        np.testing.assert_allclose(popular['popularity_log'], [np.log(30.0)])
+
+    def test_top_genres_shows_minimum(self):
+        pairs = yearly_aggregates(self.exploded).groupby(['genres', 'networks']).sum().reset_index()
+        self.assertEqual(list(top_genres(pairs, 'frequent', 10, 2).index), ['HBO: (Drama)'])
+        self.assertTrue(top_genres(pairs, 'frequent', 10, 3).empty)
+
+    def test_top_genres_invalid_metric(self):
+        with self.assertRaises(ValueError):
+            top_genres(pd.DataFrame(), 'banana', 10)
+
+if __name__ == '__main__':
+    unittest.main()
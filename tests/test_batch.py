@@ -0,0 +1,108 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+import zipfile
+from contextlib import redirect_stdout
+from io import StringIO
+
+import pandas as pd
+
+from src.batch import normalize, plan, read_jobs, run_jobs, DEFAULT_JOBS
+from src.main import main
+from src.results import ResultsStore
+from src.silvio_hypothesis import voted_genre_table
+
+class TestBatch(unittest.TestCase):
+
+    def test_normalize(self):
+        self.assertEqual(normalize({'hypothesis': 'voted', 'top_n': 10}),
+                         {'hypothesis': 'voted', 'output': '', 'top_n': 10, 'shows_minimum': 0, 'years': [0, 9999]})
+        self.assertEqual(normalize({'hypothesis': 'dilmar', 'shows_minimum': 10, 'votes_minimum': 100, 'resamples': 200}),
+                         {'hypothesis': 'dilmar', 'output': '', 'shows_minimum': 10, 'votes_minimum': 100, 'resamples': 200})
+        with self.assertRaises(ValueError):
+            normalize({'hypothesis': 'banana'})
+        with self.assertRaises(ValueError):
+            normalize({'hypothesis': 'dilmar', 'shows_minimum': 10})
+        with self.assertRaises(ValueError):
+            normalize({'hypothesis': 'voted', 'top_n': 10, 'colour': 'red'})
+        with self.assertRaises(TypeError):
+            normalize({'hypothesis': 'voted', 'top_n': 10, 'years': [2022]})
+
+    def test_no_server_imports(self):
+        # batch runs share the warm dataset without loading the HTTP server
+        code = "import sys; import batch; print('server' in sys.modules, 'asyncio' in sys.modules)"
+        found = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                               cwd=os.path.join(os.path.dirname(__file__), '..', 'src'))
+        self.assertEqual(found.stdout.split(), ['False', 'False'])
+
+    def test_plan_shares_stages(self):
+        stages = plan(DEFAULT_JOBS + DEFAULT_JOBS)
+        self.assertEqual((stages['stage'] == 'yearly_aggregates').sum(), 1)
+        self.assertEqual((stages['stage'] == 'genre_table').sum(), 9)
+        self.assertEqual((stages['stage'] == 'plot_bins').sum(), 1)
+        self.assertTrue((stages['estimated_seconds'] > 0).all())
+        with self.assertRaises(ValueError):
+            plan([{'hypothesis': 'dilmar', 'shows_minimum': 10, 'votes_minimum': 1},
+                  {'hypothesis': 'dilmar', 'shows_minimum': 10, 'votes_minimum': 2}])
+
+    def test_dry_run(self):
+        with tempfile.TemporaryDirectory() as folder:
+            arguments = ['--output', os.path.join(folder, "charts"), '--results', os.path.join(folder, "results"),
+                         '--dedupe', os.path.join(folder, "duplicates.csv"), '--dry-run']
+            with redirect_stdout(StringIO()) as printed:
+                self.assertEqual(main(arguments), 0)
+            self.assertEqual(os.listdir(folder), [])
+        self.assertIn("would drop", printed.getvalue())
+        self.assertIn("estimated total", printed.getvalue())
+
+    def test_read_jobs(self):
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, "jobs.json")
+            with open(path, 'w') as file:
+                json.dump({'jobs': DEFAULT_JOBS}, file)
+            self.assertEqual(read_jobs(path), DEFAULT_JOBS)
+            path = os.path.join(folder, "jobs.yaml")
+            with open(path, 'w') as file:
+                file.write("- {hypothesis: voted, top_n: 10, years: [2022, 2023]}\n")
+            try:
+                self.assertEqual(read_jobs(path), [{'hypothesis': 'voted', 'top_n': 10, 'years': [2022, 2023]}])
+            except ImportError:
+                pass
+
+    def test_run_jobs(self):
+        jobs = [{'hypothesis': 'voted', 'top_n': 5, 'shows_minimum': 10, 'years': [2020, 2023]},
+                {'hypothesis': 'voted', 'top_n': 5, 'shows_minimum': 10, 'years': [2020, 2023], 'output': 'copy'}]
+        with tempfile.TemporaryDirectory() as folder:
+            results = run_jobs(jobs, folder, 2)
+            title = "Most voted genres by network, from 2020 to 2023.png"
+            self.assertTrue(os.path.exists(os.path.join(folder, title)))
+            self.assertTrue(os.path.exists(os.path.join(folder, 'copy', title)))
+        pd.testing.assert_frame_equal(results[0], voted_genre_table(5, 10, [2020, 2023]), check_names=False)
+
+    def test_run_jobs_into_archive(self):
+        jobs = [{'hypothesis': 'voted', 'top_n': 5, 'shows_minimum': 10, 'years': [2020, 2023]},
+                {'hypothesis': 'frequent', 'top_n': 5, 'shows_minimum': 10, 'output': 'frequent'}]
+        with tempfile.TemporaryDirectory() as folder:
+            run_jobs(jobs, os.path.join(folder, "charts.zip"), 2)
+            self.assertEqual(os.listdir(folder), ["charts.zip"])
+            with zipfile.ZipFile(os.path.join(folder, "charts.zip")) as archive:
+                self.assertEqual(archive.namelist(), ["Most voted genres by network, from 2020 to 2023.png",
+                                                      "frequent/Most frequent genres by network.png", "manifest.json"])
+
+    def test_run_jobs_into_results(self):
+        jobs = [{'hypothesis': 'voted', 'top_n': 5, 'shows_minimum': 10, 'years': [2020, 2023]},
+                {'hypothesis': 'dilmar', 'shows_minimum': 10, 'votes_minimum': 100}]
+        with tempfile.TemporaryDirectory() as folder:
+            computed = run_jobs(jobs, os.path.join(folder, "charts"), 2, results=os.path.join(folder, "results"))
+            store = ResultsStore(os.path.join(folder, "results"))
+            voted = store.read('voted', params={'top_n': 5, 'shows_minimum': 10, 'years': [2020, 2023]})
+            pd.testing.assert_frame_equal(voted, computed[0])
+            dilmar = store.read('dilmar')
+            pd.testing.assert_frame_equal(dilmar, computed[1][0].reset_index(drop=True))
+            self.assertEqual(store.meta('dilmar', 1)['params'], {'shows_minimum': 10, 'votes_minimum': 100, 'resamples': 0})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,36 @@
+import unittest
+
+from src.benchmark import run_benchmarks, compare
+
+class TestBenchmark(unittest.TestCase):
+
+    def setUp(self):
+        self.baseline = {'results': {'1000': {'load': {'seconds': 1.0, 'peak_bytes': 10},
+                                              'filter_first': {'seconds': 2.0, 'peak_bytes': 10}}}}
+
+    def test_expected_run_benchmarks(self):
+        result = run_benchmarks([3000], 1)
+        stages = result['results']['3000']
+        self.assertIn('filter_second_years', stages)
+        self.assertIn('render', stages)
+        for measure in stages.values():
+            self.assertGreater(measure['seconds'], 0)
+            self.assertGreater(measure['peak_bytes'], 0)
+
+    def test_compare(self):
+        current = {'results': {'1000': {'load': {'seconds': 1.5, 'peak_bytes': 10},
+                                        'filter_first': {'seconds': 2.1, 'peak_bytes': 10},
+                                        'render': {'seconds': 9.0, 'peak_bytes': 10}}}}
+        regressions = compare(current, self.baseline, 0.2)
+        self.assertEqual(len(regressions), 1)
+        self.assertTrue(regressions[0].startswith("1000 load"))
+        self.assertEqual(compare(current, self.baseline, 0.6), [])
+
+    def test_invalid_arguments_run_benchmarks(self):
+        with self.assertRaises(TypeError):
+            run_benchmarks(1000)
+        with self.assertRaises(ValueError):
+            run_benchmarks([1000], 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import unittest
+import numpy as np
+import pandas as pd
+
+from src.bootstrap import bootstrap_means, StreamingBootstrap
+from src.leonardo_hypothesis import mean_per_bin
+from src.dilmar_hypothesis import dilmar_bins
+from src.synthetic import generate
+
+class TestBootstrap(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(1)
+        self.groups = rng.choice(['a', 'b', 'c'], 3000)
+        self.values = rng.normal(5, 2, 3000) + (self.groups == 'b')
+
+    def test_means_and_intervals(self):
+        expected = pd.Series(self.values).groupby(self.groups).mean()
+        for method in ['index', 'poisson']:
+            table = bootstrap_means(self.values, self.groups, 500, method=method)
+            self.assertEqual(list(table.index), ['a', 'b', 'c'])
+            np.testing.assert_allclose(table['mean'], expected)
+            self.assertTrue(((table['low'] < table['mean']) & (table['mean'] < table['high'])).all())
+            # the standard error of each mean is about 2 / sqrt(1000)
+            np.testing.assert_allclose(table['high'] - table['low'], 2 * 1.96 * 2 / np.sqrt(1000), rtol=0.25)
+
+    def test_blocks(self):
+        import src.bootstrap as bootstrap
+        whole = bootstrap_means(self.values, self.groups, 200)
+        cells, bootstrap.BLOCK_CELLS = bootstrap.BLOCK_CELLS, 10000
+        try:
+            blocks = bootstrap_means(self.values, self.groups, 200)
+        finally:
+            bootstrap.BLOCK_CELLS = cells
+        np.testing.assert_allclose(blocks['mean'], whole['mean'])
+        np.testing.assert_allclose(blocks['high'] - blocks['low'], whole['high'] - whole['low'], rtol=0.3)
+
+    def test_categories_without_rows(self):
+        groups = pd.Categorical(['x', 'x', 'z', None], categories=['x', 'y', 'z'])
+        table = bootstrap_means([1.0, 3.0, 5.0, 7.0], groups, 100)
+        self.assertEqual(list(table.index), ['x', 'y', 'z'])
+        self.assertEqual(table.loc['x', 'mean'], 2)
+        self.assertTrue(table.loc['y'].isna().all())
+        self.assertEqual(table.loc['z', 'low'], 5)
+        self.assertEqual(table.loc['z', 'high'], 5)
+
+    def test_streaming(self):
+        stream = StreamingBootstrap(500)
+        for first in range(0, 3000, 700):
+            stream.update(self.values[first:first + 700], self.groups[first:first + 700])
+        table = stream.result()
+        whole = bootstrap_means(self.values, self.groups, 500, method='poisson')
+        self.assertEqual(list(table.index), ['a', 'b', 'c'])
+        np.testing.assert_allclose(table['mean'], whole['mean'])
+        np.testing.assert_allclose(table['high'] - table['low'], whole['high'] - whole['low'], rtol=0.25)
+
+    def test_invalid_arguments(self):
+        self.assertRaises(TypeError, bootstrap_means, self.values, self.groups, 10.5)
+        self.assertRaises(ValueError, bootstrap_means, self.values, self.groups, 0)
+        self.assertRaises(ValueError, bootstrap_means, self.values, self.groups, 100, 1.5)
+        self.assertRaises(ValueError, bootstrap_means, self.values, self.groups, 100, method='jackknife')
+        self.assertRaises(ValueError, bootstrap_means, self.values[:10], self.groups, 100)
+
+    def test_hypotheses(self):
+        data = generate(3000, seed=5)
+        df, _ = dilmar_bins(10, 10, data, resamples=200)
+        self.assertTrue(((df['low'] <= df['popularity'] + 1e-9) & (df['popularity'] <= df['high'] + 1e-9)).all())
+        plain, _ = dilmar_bins(10, 10, data)
+        self.assertNotIn('low', plain.columns)
+
+        bins = pd.DataFrame({'vote_average': [6.0, 8.0, 7.0], 'bin': pd.Categorical(['0-1', '0-1', '2-3'])})
+        table = mean_per_bin(bins, 'bin', 100)
+        self.assertEqual(list(table['vote_average']), [7.0, 7.0])
+        self.assertTrue(mean_per_bin(bins, 'bin', 0)['low'].isna().all())
@@ -0,0 +1,70 @@
+import unittest
+from unittest import mock
+import numpy as np
+import pandas as pd
+
+import src.cooccurrence
+from src.cooccurrence import cooccurrence
+from src.synthetic import generate
+
+try:
+    import scipy.sparse # noqa: F401
+    SCIPY = True
+except ImportError:
+    SCIPY = False
+
+class TestCoOccurrence(unittest.TestCase):
+
+    def setUp(self):
+        self.data = pd.DataFrame({
+            'id': [1, 2, 3, 4, 5, 6],
+            'genres': ['Drama, Crime', 'Drama', 'Comedy', 'Comedy, Drama', 'Crime, Crime', np.nan],
+            'networks': ['HBO', 'HBO, AMC', 'NBC', 'NBC', 'AMC', 'HBO'],
+        })
+        self.matrices = cooccurrence(data=self.data)
+
+    def test_genre_pairs(self):
+        pairs = self.matrices.genre_pairs()
+        self.assertEqual(list(pairs.index), ['Comedy', 'Crime', 'Drama'])
+        self.assertEqual(pairs.loc['Drama', 'Crime'], 1)
+        self.assertEqual(pairs.loc['Comedy', 'Drama'], pairs.loc['Drama', 'Comedy'])
+        # the genres repeated in a show count once; the show without genres isn't counted
+        self.assertEqual(list(np.diag(pairs)), [2, 2, 3])
+
+    def test_genre_mix(self):
+        mix = self.matrices.genre_mix()
+        self.assertEqual(list(mix.index), ['AMC', 'HBO', 'NBC'])
+        self.assertEqual(mix.loc['HBO'].tolist(), [0, 1, 2])
+        self.assertEqual(mix.loc['AMC'].tolist(), [0, 1, 1])
+        self.assertEqual(list(cooccurrence(1, self.data).networks), ['AMC', 'HBO', 'NBC'])
+        self.assertEqual(list(cooccurrence(2, self.data).networks), [])
+        self.assertRaises(TypeError, cooccurrence, '1', self.data)
+
+    def test_similarity(self):
+        similarity = self.matrices.similarity()
+        self.assertTrue(np.allclose(np.diag(similarity), 1))
+        self.assertTrue(np.allclose(similarity, similarity.T))
+        self.assertAlmostEqual(similarity.loc['AMC', 'HBO'], 3 / np.sqrt(2 * 5))
+
+    def test_nearest(self):
+        nearest = self.matrices.nearest('AMC', 5)
+        self.assertEqual(list(nearest.index), ['HBO', 'NBC'])
+        self.assertTrue(nearest.is_monotonic_decreasing)
+        self.assertEqual(list(self.matrices.nearest('HBO', 1).index), ['AMC'])
+        self.assertRaises(KeyError, self.matrices.nearest, 'CBS')
+
+    @unittest.skipUnless(SCIPY, "scipy isn't installed")
+    def test_sparse_matches_dense(self):
+        data = generate(2000, seed=3)
+        sparse = cooccurrence(5, data)
+        with mock.patch.object(src.cooccurrence, '_sparse', return_value=None):
+            dense = cooccurrence(5, data)
+        self.assertTrue(hasattr(sparse.genre_incidence, 'toarray'))
+        self.assertIsInstance(dense.genre_incidence, np.ndarray)
+        self.assertEqual(sparse.network_incidence.shape, (sparse.genre_incidence.shape[0], len(sparse.networks)))
+        pd.testing.assert_frame_equal(sparse.genre_pairs(), dense.genre_pairs())
+        pd.testing.assert_frame_equal(sparse.genre_mix(), dense.genre_mix())
+        pd.testing.assert_series_equal(sparse.nearest(sparse.networks[0], 5), dense.nearest(dense.networks[0], 5))
+
+if __name__ == '__main__':
+    unittest.main()
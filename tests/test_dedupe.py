@@ -0,0 +1,51 @@
+import unittest
+import pandas as pd
+
+from src.dedupe import minhash, find_duplicates, collapse_duplicates
+from src.synthetic import generate
+
+class TestDedupe(unittest.TestCase):
+
+    def setUp(self):
+        self.data = generate(2000, seed=3)
+        self.data = self.data[self.data['first_air_date'].notna()].reset_index(drop=True)
+        # re-listings of 50 shows under other ids, with their names in other cases and punctuation
+        copies = self.data.iloc[:50].copy()
+        copies['id'] = copies['id'] + 10 ** 6
+        copies['name'] = copies['name'].str.upper() + "!"
+        copies['vote_count'] = copies['vote_count'] + 1
+        self.listed = pd.concat([self.data, copies], ignore_index=True)
+
+    def test_minhash(self):
+        signatures = minhash(self.listed, num_perm=32)
+        self.assertEqual(signatures.shape, (len(self.listed), 32))
+        # the same tokens give the same signature
+        self.assertTrue((signatures[:50] == signatures[-50:]).all())
+        self.assertFalse((minhash(self.listed, num_perm=32, seed=1) == signatures).all())
+
+    def test_find_duplicates(self):
+        report = find_duplicates(self.listed)
+        self.assertEqual(sorted(report['kept_id']), sorted(self.data['id'][:50] + 10 ** 6))
+        self.assertEqual(sorted(report['dropped_id']), sorted(self.data['id'][:50]))
+        self.assertTrue((report['similarity'] == 1).all())
+        # the synthetic names differ just by their numbers, which are never merged
+        self.assertEqual(len(find_duplicates(self.data, threshold=0.5)), 0)
+        self.assertRaises(ValueError, find_duplicates, self.data, bands=5)
+        self.assertRaises(ValueError, find_duplicates, self.data, threshold=2)
+
+    def test_dates(self):
+        listed = self.listed.copy()
+        listed.loc[len(self.data):, 'first_air_date'] = "1900-01-01"
+        self.assertEqual(len(find_duplicates(listed)), 0)
+        self.assertEqual(len(find_duplicates(listed, threshold=0.6, max_years=200)), 50)
+
+    def test_collapse_duplicates(self):
+        data, report = collapse_duplicates(self.listed)
+        self.assertEqual(len(data), len(self.data))
+        self.assertEqual(len(report), 50)
+        self.assertTrue(data['id'].is_unique)
+        self.assertEqual(list(data.index), list(range(len(data))))
+        self.assertFalse(data['id'].isin(report['dropped_id']).any())
+
+if __name__ == '__main__':
+    unittest.main()
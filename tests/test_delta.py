@@ -0,0 +1,83 @@
+import unittest
+import numpy as np
+import pandas as pd
+
+from src.delta import apply_delta
+from src.aggregates import yearly_aggregates
+import filter as flt
+import trigram
+
+class TestDelta(unittest.TestCase):
+
+    def setUp(self):
+        self.raw_file = flt.raw_file.copy()
+
+    def tearDown(self):
+        flt.raw_file = self.raw_file
+
+    def test_apply_delta_matches_recompute(self):
+        yearly = yearly_aggregates()
+        delta = flt.raw_file.head(20).copy()
+        delta['genres'] = 'Drama, Western'
+        delta['vote_count'] = delta['vote_count'] + 10
+        new_rows = flt.raw_file.tail(5).copy()
+        new_rows['id'] = new_rows['id'] + flt.raw_file['id'].max()
+        delta = pd.concat([delta, new_rows])
+
+        updated = apply_delta(delta, yearly)
+        self.assertEqual(len(flt.raw_file), len(self.raw_file) + 5)
+        expected = yearly_aggregates().sort_values(['year', 'genres', 'networks']).reset_index(drop=True)
+        pd.testing.assert_frame_equal(updated, expected, check_dtype=False)
+
+    def test_apply_delta_changes_only(self):
+        # rows changed in place, made valid or invalid, with no new row to replace the dataset
+        yearly = yearly_aggregates()
+        others = ['name', 'vote_count', 'vote_average', 'popularity', 'networks', 'first_air_date']
+        missing = flt.raw_file.index[flt.raw_file['genres'].isna() & flt.valid_rows(flt.raw_file, others)][:3]
+        delta = flt.raw_file.loc[missing].copy()
+        delta['genres'] = "Drama"
+        dropped = flt.raw_file[flt.raw_file['genres'].notna()].head(3).copy()
+        dropped['genres'] = np.nan
+        raw_file = flt.raw_file
+
+        updated = apply_delta(pd.concat([delta, dropped]), yearly)
+        self.assertIs(flt.raw_file, raw_file)
+        self.assertEqual(flt.filter_second(0)['id'].isin(delta['id']).sum(),
+                         flt.raw_file.loc[missing, 'networks'].str.count(", ").sum() + 3)
+        self.assertFalse(flt.filter_second(0)['id'].isin(dropped['id']).any())
+        expected = yearly_aggregates().sort_values(['year', 'genres', 'networks']).reset_index(drop=True)
+        pd.testing.assert_frame_equal(updated, expected, check_dtype=False)
+
+    def test_apply_delta_grows_in_place(self):
+        largest = flt.raw_file['id'].max()
+        added = flt.raw_file.tail(5).copy()
+        added['id'] = added['id'] + largest
+        apply_delta(added)
+        grown = flt.raw_file
+        # new shows and a change of a show added by the previous delta
+        delta = pd.concat([flt.raw_file.tail(3).assign(id=lambda rows: rows['id'] + largest),
+                           flt.raw_file.tail(1).assign(genres="Western")])
+        yearly = yearly_aggregates()
+
+        updated = apply_delta(delta, yearly)
+        self.assertEqual(len(flt.raw_file), len(self.raw_file) + 8)
+        # the second delta wrote into the spare room of the columns, without copying them
+        self.assertTrue(np.shares_memory(grown['name'].to_numpy(), flt.raw_file['name'].to_numpy()))
+        pd.testing.assert_frame_equal(flt.filter_second(0), flt.filter_second(0, data=flt.raw_file.copy()))
+        expected = yearly_aggregates().sort_values(['year', 'genres', 'networks']).reset_index(drop=True)
+        pd.testing.assert_frame_equal(updated, expected, check_dtype=False)
+
+    def test_apply_delta_renames(self):
+        trigram.name_index(flt.raw_file)
+        delta = flt.raw_file.head(1).copy()
+        delta['name'] = "Zzqxj"
+        apply_delta(delta)
+        self.assertEqual(list(trigram.name_index(flt.raw_file).contains("zzqxj")), list(delta['id']))
+
+    def test_apply_delta_repeated_ids(self):
+        delta = pd.concat([flt.raw_file.head(1), flt.raw_file.head(1)])
+        with self.assertRaises(ValueError):
+            apply_delta(delta)
+
+if __name__ == '__main__':
+    unittest.main()
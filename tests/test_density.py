@@ -0,0 +1,48 @@
+import unittest
+import numpy as np
+
+from src.density import count_grid, binned_kde
+
+class TestDensity(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(2)
+        self.x = rng.exponential(10, 20000)
+        self.y = np.clip(rng.normal(7, 1.2, 20000), 0, 10)
+
+    def test_count_grid(self):
+        counts, extent = count_grid(self.x, self.y, (40, 20), y_limits=(0, 10))
+        self.assertEqual(counts.shape, (20, 40))
+        self.assertEqual(counts.sum(), len(self.x))
+        expected, _, _ = np.histogram2d(self.y, self.x, bins=(20, 40), range=[extent[2:], extent[:2]])
+        np.testing.assert_array_equal(counts, expected)
+
+    def test_count_grid_limits(self):
+        x = np.array([0.0, 1.0, 2.0, np.nan, 5.0])
+        y = np.array([1.0, 1.0, 1.0, 1.0, 1.0])
+        counts, extent = count_grid(x, y, (2, 1), x_limits=(0, 2))
+        self.assertEqual(extent, (0.0, 2.0, 0.5, 1.5))
+        self.assertEqual(list(counts[0]), [1, 2])
+        self.assertRaises(ValueError, count_grid, x, y[:2])
+        self.assertRaises(ValueError, count_grid, x, y, (0, 3))
+
+    def test_binned_kde(self):
+        grid, density = binned_kde(self.y[:2000], 256)
+        bandwidth = self.y[:2000].std(ddof=1) * 2000 ** (-1 / 5)
+        direct = np.exp(-0.5 * ((grid[:, None] - self.y[:2000]) / bandwidth) ** 2).sum(axis=1) \
+            / (2000 * bandwidth * np.sqrt(2 * np.pi))
+        np.testing.assert_allclose(density, direct, atol=1e-3 * direct.max())
+
+    def test_binned_kde_mass(self):
+        grid, density = binned_kde(self.y, limits=(-5, 15))
+        self.assertAlmostEqual(np.trapezoid(density, grid) if hasattr(np, 'trapezoid') else np.trapz(density, grid), 1, 3)
+        # values outside the grid keep their share of the total
+        grid, density = binned_kde(np.array([1.0, 1.0, 50.0]), bandwidth=0.1, limits=(0, 2))
+        self.assertAlmostEqual(density.max(), 2 / 3 / (0.1 * np.sqrt(2 * np.pi)), 2)
+
+    def test_binned_kde_invalid(self):
+        self.assertRaises(ValueError, binned_kde, [np.nan])
+        self.assertRaises(ValueError, binned_kde, [1.0, 2.0], 1)
+        grid, density = binned_kde([3.0, 3.0])
+        self.assertEqual((grid[0], grid[-1]), (2.5, 3.5))
+        self.assertTrue(np.isfinite(density).all())
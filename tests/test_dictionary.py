@@ -0,0 +1,38 @@
+import unittest
+import numpy as np
+import pandas as pd
+
+from src.dictionary import StringDictionary, split_codes
+
+class TestDictionary(unittest.TestCase):
+
+    def setUp(self):
+        self.dictionary = StringDictionary()
+
+    def test_encode_decode(self):
+        codes = self.dictionary.encode(["Netflix", "HBO", "Netflix", None])
+        self.assertEqual(codes.dtype, np.int32)
+        self.assertEqual(list(codes), [0, 1, 0, -1])
+        # codes are stable when new strings are added
+        self.assertEqual(list(self.dictionary.encode(pd.Series(["ABC", "HBO"]))), [2, 1])
+        decoded = self.dictionary.decode(codes)
+        self.assertEqual(list(decoded[:3]), ["Netflix", "HBO", "Netflix"])
+        self.assertTrue(pd.isna(decoded[3]))
+        self.assertIs(decoded[0], decoded[2])
+
+    def test_ranks(self):
+        codes = self.dictionary.encode(["b", "c", "a"])
+        self.assertEqual(list(self.dictionary.ranks()[codes]), [1, 2, 0])
+        codes = self.dictionary.encode(["aa"])
+        self.assertEqual(list(self.dictionary.ranks()), [2, 3, 0, 1])
+
+    def test_split_codes(self):
+        values = pd.Series(["Drama, Comedy", "Drama", np.nan, "Comedy, Drama, News"])
+        lengths, codes = split_codes(values, dictionary=self.dictionary)
+        self.assertEqual(list(lengths), [2, 1, 1, 3])
+        decoded = self.dictionary.decode(codes)
+        exploded = values.str.split(", ").explode()
+        self.assertEqual(list(pd.Series(decoded).fillna("-")), list(exploded.fillna("-")))
+
+if __name__ == '__main__':
+    unittest.main()
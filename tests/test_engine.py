@@ -0,0 +1,121 @@
+import threading
+import unittest
+import numpy as np
+import pandas as pd
+
+import engine
+from engine import PandasEngine, ArrowEngine, get_engine, set_engine, using
+from src.filter import filter_second, filter_third
+from src.aggregates import yearly_aggregates
+from src.trends import network_trends
+from src.dictionary import split_codes
+from src.synthetic import generate
+
+try:
+    import pyarrow # noqa: F401
+    ARROW = True
+except ImportError:
+    ARROW = False
+
+class TestEngine(unittest.TestCase):
+
+    def test_pandas_engine(self):
+        pandas = PandasEngine()
+        codes, uniques = pandas.factorize(["b", None, "a", "b"])
+        self.assertEqual(list(codes), [0, -1, 1, 0])
+        self.assertEqual(list(uniques), ["b", "a"])
+        lengths, items = pandas.split(["Drama, Comedy", "Drama"], ", ")
+        self.assertEqual(list(lengths), [2, 1])
+        self.assertEqual(list(items), ["Drama", "Comedy", "Drama"])
+        self.assertEqual(list(pandas.years(["2021-01-05", "1999-12-31"])), [2021, 1999])
+        self.assertEqual(list(pandas.valid(pd.Series([1.0, np.nan, 0.0]))), [True, False, False])
+        frame = pd.DataFrame({'key': ["a", "b", "a"], 'value': [1, 2, 3]})
+        summed = pandas.group_sum(frame, ['key'], ['value']).set_index('key')
+        self.assertEqual(summed.loc["a", 'value'], 4)
+
+    def test_set_engine(self):
+        previous = get_engine()
+        self.assertRaises(ValueError, set_engine, 'polars')
+        self.assertIs(get_engine(), previous)
+        with using('pandas') as current:
+            self.assertIs(get_engine(), current)
+        self.assertIs(get_engine(), previous)
+        with self.assertRaises(ValueError):
+            with using('polars'):
+                pass
+
+    def test_using_per_thread(self):
+        # each thread keeps the engine of its own block, whatever the others use meanwhile
+        barrier = threading.Barrier(2)
+        found = {}
+        def run(thread, name):
+            with using(name) as current:
+                barrier.wait()
+                found[thread] = get_engine() is current
+                barrier.wait()
+            found[thread] = found[thread] and get_engine() is previous
+        previous = get_engine()
+        threads = [threading.Thread(target=run, args=(thread, name))
+                   for thread, name in enumerate(['pandas', 'arrow' if ARROW else 'pandas'])]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(found, {0: True, 1: True})
+        self.assertIs(get_engine(), previous)
+
+    @unittest.skipIf(ARROW, "pyarrow is installed")
+    def test_arrow_missing(self):
+        self.assertRaises(ImportError, ArrowEngine)
+        self.assertRaises(ImportError, set_engine, 'arrow')
+
+@unittest.skipUnless(ARROW, "pyarrow isn't installed")
+class TestParity(unittest.TestCase):
+
+    def run_with(self, name, function):
+        # a new table for every engine, so no cached valid rows are shared between them
+        with using(name):
+            return function(generate(3000, seed=5))
+
+    def both(self, function):
+        return self.run_with('pandas', function), self.run_with('arrow', function)
+
+    def test_engines(self):
+        self.assertEqual(engine.ENGINES['arrow'], ArrowEngine)
+        arrow = ArrowEngine()
+        pandas = PandasEngine()
+        values = ["Drama, Comedy", None, "Drama", "Drama, Comedy"]
+        for expected, found in zip(pandas.factorize(values), arrow.factorize(values)):
+            self.assertEqual(list(expected), list(found))
+        for expected, found in zip(pandas.split(["a, b", "c"], ", "), arrow.split(["a, b", "c"], ", ")):
+            self.assertEqual(list(expected), list(found))
+        self.assertEqual(list(arrow.years(["2021-01-05", "1999"])), [2021, 1999])
+        for values in [pd.Series([1.0, np.nan, 0.0]), pd.Series(["a", None, ""])]:
+            self.assertEqual(list(arrow.valid(values)), list(pandas.valid(values)))
+
+    def test_filters(self):
+        for shows_minimum in [0, 10]:
+            expected, found = self.both(lambda data: filter_second(shows_minimum, [2000, 2020], data))
+            pd.testing.assert_frame_equal(expected, found)
+            expected, found = self.both(lambda data: filter_third(shows_minimum, 5, data))
+            pd.testing.assert_frame_equal(expected, found)
+
+    def test_aggregates(self):
+        order = ['year', 'genres', 'networks']
+        expected, found = self.both(yearly_aggregates)
+        pd.testing.assert_frame_equal(expected.sort_values(order).reset_index(drop=True),
+                                      found.sort_values(order).reset_index(drop=True))
+
+    def test_trends(self):
+        expected, found = self.both(lambda data: network_trends(5, data))
+        self.assertTrue(expected.networks.equals(found.networks))
+        for metric in ['count', 'popularity', 'vote_average']:
+            pd.testing.assert_frame_equal(expected.series(metric), found.series(metric))
+
+    def test_split_codes(self):
+        expected, found = self.both(lambda data: split_codes(data['genres']))
+        for left, right in zip(expected, found):
+            self.assertTrue(np.array_equal(left, right))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,10 +1,72 @@
 import unittest
+import numpy as np
 import pandas as pd
 
-from src.filter import filter_second, filter_third
+from src.filter import filter_first, filter_second, filter_third, valid_rows, rows_changed
 
 class TestFilter(unittest.TestCase):
 
+    def setUp(self):
+        # a small in-memory dataset, with the columns used by the filters
+        self.data = pd.DataFrame({
+            'id': [1, 2, 3, 4, 5],
+            'name': ['A', 'B', 'C', 'D', 'E'],
+            'number_of_seasons': [2, 0, 1, 3, 1],
+            'number_of_episodes': [20, 8, 0, 30, 10],
+            'vote_count': [100, 50, 10, 0, 200],
+            'vote_average': [8.0, 7.0, 6.0, 0.0, 9.0],
+            'popularity': [10.0, 5.0, 1.0, 2.0, 20.0],
+            'genres': ['Drama, Comedy', 'Drama', 'Comedy', 'Drama', np.nan],
+            'networks': ['HBO', 'HBO, Netflix', 'Netflix', 'HBO', 'Netflix'],
+            'first_air_date': ['2020-01-01', '2022-05-01', '2023-01-01', '2021-01-01', '2022-01-01'],
+        })
+
+    def test_valid_rows(self):
+        columns = ['name', 'vote_count', 'vote_average', 'genres', 'first_air_date']
+        expected = self.data[columns].replace(to_replace=0, value=np.nan).dropna().index
+        self.assertEqual(list(self.data.index[valid_rows(self.data, columns)]), list(expected))
+        # the masks of the table are kept, and combined with the ones of other columns
+        self.assertEqual(list(valid_rows(self.data, ['number_of_episodes'])), [True, True, False, True, True])
+        self.assertEqual(list(valid_rows(self.data, ['vote_count', 'number_of_episodes'])), [True, True, False, False, True])
+
+    def test_rows_changed(self):
+        data = pd.concat([self.data] * 4, ignore_index=True)
+        self.assertEqual(valid_rows(data, ['genres', 'vote_count']).sum(), 12)
+        # rows sharing a byte of the masks, made valid and invalid in place
+        data.loc[[4, 9, 16], 'genres'] = "Drama"
+        data.loc[[0, 1], 'vote_count'] = 0
+        rows_changed(data, [4, 9, 16, 0, 1])
+        expected = data[['genres', 'vote_count']].replace(to_replace=0, value=np.nan).notna().all(axis=1)
+        self.assertEqual(list(valid_rows(data, ['genres', 'vote_count'])), list(expected))
+
+    def test_injected_filter_first(self):
+        result = filter_first(20, self.data)
+        self.assertEqual(list(result['name']), ['A', 'B', 'E'])
+        # shows with episodes but no seasons get one season, in the result only
+        self.assertEqual(list(result['avg_ep_per_season']), [10.0, 8.0, 10.0])
+        self.assertEqual(list(result['number_of_seasons']), [2, 1, 1])
+        self.assertEqual(list(self.data['number_of_seasons']), [2, 0, 1, 3, 1])
+
+    def test_injected_filter_second(self):
+        result = filter_second(0, [2021, 2023], self.data)
+        self.assertEqual(sorted(zip(result['genres'], result['networks'])),
+                         [('Comedy', 'Netflix'), ('Drama', 'HBO'), ('Drama', 'Netflix')])
+        self.assertEqual(list(filter_second(2, [0, 9999], self.data)['networks'].unique()), ['HBO'])
+
+    def test_injected_filter_third(self):
+        result = filter_third(0, 20, self.data)
+        # E has no genres, so its network has no shows counted
+        self.assertEqual(list(result['name']), ['A', 'B'])
+        self.assertTrue(filter_third(1, 20, self.data).empty)
+
+    def test_ids_predicate(self):
+        self.assertEqual(list(filter_first(0, self.data, ids=[5, 1, 9])['name']), ['A', 'E'])
+        result = filter_second(0, [0, 9999], self.data, ids=[2])
+        self.assertEqual(sorted(zip(result['genres'], result['networks'])), [('Drama', 'HBO'), ('Drama', 'Netflix')])
+        # the networks are counted over the selected shows only
+        self.assertEqual(list(filter_third(0, 1, self.data, ids=[2, 5])['name']), ['B'])
+        self.assertTrue(filter_third(0, 1, self.data, ids=[]).empty)
+
     def test_expected_nodate_filter_second(self):
         try:
             result_df = filter_second(100)
@@ -0,0 +1,70 @@
+import os
+import tempfile
+import unittest
+import pandas as pd
+
+from src.ingest import expand, read_table, read_tables
+from src.synthetic import generate
+
+class TestIngest(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.data = generate(300, seed=7)
+        # two monthly snapshots sharing 100 shows, the newest with other popularities
+        newer = self.data.iloc[100:].copy()
+        newer['popularity'] = newer['popularity'] + 1000
+        self.data.iloc[:200].to_csv(self.path("tmdb-2024-01.csv"), index=False)
+        newer.to_csv(self.path("tmdb-2024-02.csv"), index=False)
+        self.data.iloc[100:250].to_csv(self.path("regional.csv"), index=False)
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.folder.name, name)
+
+    def test_expand(self):
+        self.assertEqual(expand([self.path("tmdb-*.csv"), self.path("regional.csv")]),
+                         [self.path("tmdb-2024-01.csv"), self.path("tmdb-2024-02.csv"), self.path("regional.csv")])
+        self.assertRaises(FileNotFoundError, expand, self.path("missing-*.csv"))
+        self.assertRaises(FileNotFoundError, expand, self.path("missing.csv"))
+
+    def test_schema(self):
+        table = read_table(self.path("tmdb-2024-01.csv"), engine='pandas')
+        self.assertEqual(table['adult'].dtype, bool)
+        self.assertEqual(table['vote_count'].dtype, 'int64')
+        self.assertEqual(table['overview'].dtype, object)
+        self.assertRaises(ValueError, read_table, self.path("regional.csv"), {'name': 'int64'}, 'pandas')
+        self.assertRaises(ValueError, read_table, self.path("regional.csv"), engine='polars')
+
+    def test_newest_snapshot_wins(self):
+        table = read_tables([self.path("tmdb-*.csv")], workers=2, engine='pandas')
+        self.assertEqual(len(table), 300)
+        self.assertTrue(table['id'].is_unique)
+        self.assertEqual(list(table.index), list(range(300)))
+        popularity = table.set_index('id')['popularity']
+        original = self.data.set_index('id')['popularity']
+        ids = self.data['id']
+        pd.testing.assert_series_equal(popularity[ids[:100]], original[ids[:100]])
+        pd.testing.assert_series_equal(popularity[ids[100:]], original[ids[100:]] + 1000)
+
+        # the regional extract, given last, is the newest for its shows
+        table = read_tables([self.path("tmdb-*.csv"), self.path("regional.csv")], engine='pandas')
+        self.assertEqual(table.set_index('id')['popularity'][ids[220]], original[ids[220]])
+
+    def test_pyarrow(self):
+        try:
+            import pyarrow.csv # noqa: F401
+        except ImportError:
+            self.assertRaises(ImportError, read_table, self.path("regional.csv"), engine='pyarrow')
+            return
+        arrow = read_tables(self.path("tmdb-*.csv"), engine='pyarrow')
+        pandas = read_tables(self.path("tmdb-*.csv"), engine='pandas')
+        pd.testing.assert_frame_equal(arrow, pandas, check_dtype=False)
+        # empty fields are missing, not empty strings
+        self.assertTrue(arrow['genres'].isna().any())
+        self.assertFalse((arrow['genres'] == "").any())
+
+if __name__ == '__main__':
+    unittest.main()
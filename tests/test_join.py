@@ -0,0 +1,66 @@
+import unittest
+import numpy as np
+import pandas as pd
+
+from src.join import IdIndex, id_index, rows, attach
+from src.filter import filter_first
+from src.leonardo_hypothesis import analysis_bins
+from src.synthetic import generate
+
+class TestJoin(unittest.TestCase):
+
+    def setUp(self):
+        self.data = generate(500, seed=11)
+        rng = np.random.default_rng(0)
+        # a season export: many seasons per show, for some of the shows, in no particular order
+        ids = rng.permutation(self.data['id'].to_numpy())[:300]
+        self.seasons = pd.DataFrame({'id': np.repeat(ids, 3), 'episode_count': rng.integers(1, 30, 900)})
+
+    def test_index(self):
+        index = IdIndex([30, 10, 20, 10])
+        self.assertFalse(index.unique)
+        self.assertEqual(list(index.positions([20, 40, 30, 10])), [2, -1, 0, 1])
+        self.assertEqual(list(IdIndex([]).positions([1])), [-1])
+        self.assertIs(id_index(self.data), id_index(self.data))
+        self.assertTrue(id_index(self.data).unique)
+
+    def test_appended(self):
+        ids = np.array([30, 10, 20, 10, 50])
+        appended = IdIndex(ids[:3]).appended(ids[3:])
+        fresh = IdIndex(ids)
+        np.testing.assert_array_equal(appended.order, fresh.order)
+        np.testing.assert_array_equal(appended.sorted, fresh.sorted)
+        self.assertEqual(appended.unique, fresh.unique)
+        grown = pd.concat([self.data, self.data.head(2).assign(id=[-1, -2])], ignore_index=True)
+        self.assertEqual(list(id_index(grown, previous=self.data).positions([-2, -1])), [501, 500])
+
+    def test_rows(self):
+        ids = self.data['id'].to_numpy()[[7, 3, 450]]
+        self.assertEqual(list(rows(self.data, ids)['id']), list(ids))
+        with self.assertRaises(KeyError):
+            rows(self.data, [-5])
+
+    def test_attach_matches_merge(self):
+        per_show = self.seasons.groupby('id', as_index=False).agg(avg_ep_per_season=('episode_count', 'mean'))
+        with self.assertRaises(ValueError):
+            attach(self.data, self.seasons)
+        attached = attach(self.data, per_show)
+        self.assertNotIn('avg_ep_per_season', self.data.columns)
+        merged = self.data.merge(per_show, on='id', how='left')
+        np.testing.assert_array_equal(attached['avg_ep_per_season'], merged['avg_ep_per_season'])
+        self.assertEqual(list(attached.index), list(self.data.index))
+
+        attach(self.data, per_show, inplace=True)
+        np.testing.assert_array_equal(self.data['avg_ep_per_season'], merged['avg_ep_per_season'])
+
+    def test_attached_column_feeds_filter_first(self):
+        per_show = self.seasons.groupby('id', as_index=False).agg(avg_ep_per_season=('episode_count', 'mean'))
+        estimated = filter_first(0, self.data.copy())
+        data = attach(self.data, per_show)
+        real = filter_first(0, data)
+        expected = data.loc[real.index, 'avg_ep_per_season'].fillna(estimated['avg_ep_per_season'])
+        np.testing.assert_array_equal(real['avg_ep_per_season'], expected)
+        self.assertEqual(len(analysis_bins(3, 0, data)), len(real))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,3 +1,5 @@
+import os
+import tempfile
 import unittest
 import pandas as pd
 import numpy as np
@@ -127,6 +129,11 @@ class TestPlot(unittest.TestCase):
         except Exception as e:
             self.fail(f"Unexpected error: {e}")
 
+    def test_plot_charts_density(self):
+        with tempfile.TemporaryDirectory() as folder:
+            plot_charts(self.valid_df, folder, resamples=0, density_rows=0)
+            self.assertIn("Scatter Plot of Ratings by Average Episodes per Season.png", os.listdir(folder))
+
     def test_plot_charts_empty_dataframe(self):
         empty_df = pd.DataFrame()
         with self.assertRaises(ValueError):
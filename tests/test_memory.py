@@ -0,0 +1,50 @@
+import json
+import os
+import tempfile
+import tracemalloc
+import unittest
+
+import pandas as pd
+
+import memory
+from memory import accounting, track
+from src.filter import filter_third
+
+class TestMemory(unittest.TestCase):
+
+    def test_track_outside_accounting(self):
+        track("nothing", pd.DataFrame({'a': [1, 2]}), copied=True)
+        self.assertIsNone(memory._active)
+
+    def test_accounting_report(self):
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, "memory.json")
+            with accounting(path) as account:
+                filter_third(10, 10)
+            with open(path) as file:
+                report = json.load(file)
+
+        self.assertEqual(report, json.loads(json.dumps(account.report())))
+        self.assertFalse(tracemalloc.is_tracing())
+        stages = {stage['stage']: stage for stage in report['stages']}
+        self.assertIn('filter_third', stages)
+        self.assertIn('filter_third.network_count', stages)
+        self.assertGreaterEqual(stages['filter_third']['peak_bytes'], stages['filter_third.network_count']['peak_bytes'])
+
+        frames = {frame['frame']: frame for frame in report['frames']}
+        self.assertEqual(frames['filter_third.result']['stage'], 'filter_third')
+        self.assertGreater(frames['filter_third.votes']['bytes'], 0)
+        # the copies of filter_third are never modified afterwards
+        self.assertTrue(frames['filter_third.votes']['unused_copy'])
+        # the validity of the rows comes from the masks kept per column, without temporary frames
+        self.assertNotIn('filter_third.valid_scan', frames)
+
+    def test_used_copy(self):
+        with accounting() as account:
+            frame = pd.DataFrame({'a': [1, 2]}).copy()
+            track("copy", frame, copied=True)
+            frame['a'] = frame['a'] * 2
+        self.assertFalse(account.report()['frames'][0]['unused_copy'])
+
+if __name__ == '__main__':
+    unittest.main()
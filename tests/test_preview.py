@@ -0,0 +1,58 @@
+import unittest
+import numpy as np
+import pandas as pd
+
+from src.preview import stratified_sample, preview_genre_table, preview_dilmar_bins
+from src.silvio_hypothesis import voted_genre_table, popular_genre_table
+from src.dilmar_hypothesis import dilmar_bins
+from src.synthetic import generate
+
+class TestPreview(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.data = generate(5000, seed=3, networks=60)
+
+    def test_stratified_sample(self):
+        sample = stratified_sample(0.1, data=self.data)
+        strata = sample.groupby('stratum').agg(drawn=('id', 'size'), N=('stratum_size', 'first'), n=('sample_size', 'first'))
+        self.assertTrue((strata['drawn'] == strata['n']).all())
+        self.assertTrue((strata['n'] >= np.minimum(strata['N'], 2)).all())
+        self.assertEqual(strata['N'].sum(), len(self.data))
+        self.assertTrue(sample['id'].is_unique)
+        pd.testing.assert_frame_equal(sample, stratified_sample(0.1, data=self.data))
+
+    def test_full_rate_is_exact(self):
+        for metric, exact in [('voted', voted_genre_table), ('popular', popular_genre_table)]:
+            table, stable = preview_genre_table(metric, 5, 10, [2000, 2024], rate=1, data=self.data)
+            expected = exact(5, 10, [2000, 2024], self.data)
+            self.assertEqual(list(table.index), list(expected.index))
+            np.testing.assert_allclose(table.iloc[:, 0], expected.iloc[:, 0])
+            np.testing.assert_allclose(table['low'], table['high'])
+            self.assertTrue(stable)
+
+        df, _ = preview_dilmar_bins(10, 10, rate=1, data=self.data)
+        expected, _ = dilmar_bins(10, 10, self.data)
+        merged = df.merge(expected, on=['labels', 'networks'])
+        self.assertEqual(len(merged), len(expected))
+        np.testing.assert_allclose(merged['popularity_x'], merged['popularity_y'])
+
+    def test_sampled_intervals(self):
+        table, stable = preview_genre_table('voted', 5, 10, rate=0.2, data=self.data)
+        self.assertIsInstance(stable, bool)
+        self.assertTrue(((table['low'] <= table['final_average']) & (table['final_average'] <= table['high'])).all())
+        table, _ = preview_genre_table('voted', 5, 10, rate=0.05, error=0.001, data=self.data)
+        self.assertGreater(table.attrs['rate'], 0.05)
+
+    def test_invalid_arguments_preview(self):
+        with self.assertRaises(ValueError):
+            preview_genre_table('frequent', 5)
+        with self.assertRaises(ValueError):
+            stratified_sample(0)
+        with self.assertRaises(TypeError):
+            preview_dilmar_bins("10", 10)
+        with self.assertRaises(ValueError):
+            preview_genre_table('voted', 5, 10 ** 9, data=self.data)
+
+if __name__ == '__main__':
+    unittest.main()
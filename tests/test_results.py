@@ -0,0 +1,67 @@
+import os
+import tempfile
+import unittest
+import warnings
+import numpy as np
+import pandas as pd
+
+from src.results import ResultsStore, fingerprint
+
+class TestResults(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.store = ResultsStore(os.path.join(self.folder.name, "results"))
+        self.table = pd.DataFrame({
+            'labels': pd.Categorical(['[1 - 2]', '[2 - 3]', '[1 - 2]'], categories=['[1 - 2]', '[2 - 3]'], ordered=True),
+            'networks': ['HBO', np.nan, 'AMC'],
+            'popularity': [1.5, 2.5, 3.5],
+            'shows': [1, 2, 3],
+        })
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def test_round_trip(self):
+        # comparing None with NaN is deprecated, so a None read back for missing text fails here
+        with warnings.catch_warnings():
+            warnings.simplefilter('error', FutureWarning)
+            version = self.store.write('dilmar', self.table, {'shows_minimum': 10}, "abc")
+            self.assertEqual(version, 1)
+            pd.testing.assert_frame_equal(self.store.read('dilmar'), self.table)
+            # named indexes are restored, unnamed ones dropped
+            indexed = self.table.set_index('networks')
+            self.store.write('voted', indexed)
+            pd.testing.assert_frame_equal(self.store.read('voted'), indexed)
+            self.store.write('voted', self.table.iloc[::-1])
+            pd.testing.assert_frame_equal(self.store.read('voted'), self.table.iloc[::-1].reset_index(drop=True))
+
+    def test_versions(self):
+        self.assertEqual(self.store.versions('dilmar'), [])
+        self.store.write('dilmar', self.table, {'shows_minimum': 10, 'years': [2020, 2023]}, "abc")
+        self.store.write('dilmar', self.table.head(1), {'shows_minimum': 5}, "abc")
+        self.store.write('dilmar', self.table.head(2), {'shows_minimum': 10, 'years': [2020, 2023]}, "def")
+        self.assertEqual(self.store.versions('dilmar'), [1, 2, 3])
+        self.assertEqual(self.store.find('dilmar', {'years': [2020, 2023], 'shows_minimum': 10}), 3)
+        self.assertEqual(self.store.find('dilmar', {'shows_minimum': 10, 'years': [2020, 2023]}, "abc"), 1)
+        self.assertIsNone(self.store.find('dilmar', {'shows_minimum': 1}))
+        self.assertEqual(len(self.store.read('dilmar', params={'shows_minimum': 5})), 1)
+        self.assertEqual(len(self.store.read('dilmar', version=1)), 3)
+        self.assertEqual(self.store.meta('dilmar', 2)['rows'], 1)
+        self.assertRaises(KeyError, self.store.read, 'dilmar', params={'shows_minimum': 1})
+        self.assertRaises(KeyError, self.store.read, 'leonardo')
+
+    def test_memory_mapped(self):
+        self.store.write('dilmar', self.table)
+        if self.store.meta('dilmar', 1)['format'] == 'npy':
+            # the columns are read-only views of the files
+            self.assertFalse(self.store.read('dilmar')['popularity'].to_numpy().flags.writeable)
+
+    def test_fingerprint(self):
+        self.assertEqual(fingerprint(self.table), fingerprint(self.table.set_axis([5, 6, 7])))
+        changed = self.table.assign(popularity=[1.5, 2.5, 3.6])
+        self.assertNotEqual(fingerprint(self.table), fingerprint(changed))
+        self.assertNotEqual(fingerprint(self.table), fingerprint(self.table.rename(columns={'shows': 'count'})))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import asyncio
+import json
+import unittest
+
+from src.server import Server, Warm, parse_query
+
+class TestServer(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.warm = Warm()
+
+    def test_parse_query(self):
+        self.assertEqual(parse_query("/voted?top_n=10&shows_minimum=100&years=2022-2023"),
+                         ('voted', (('top_n', 10), ('shows_minimum', 100)), (2022, 2023), 'json'))
+        self.assertEqual(parse_query("/dilmar?votes_minimum=1&shows_minimum=2"),
+                         ('dilmar', (('shows_minimum', 2), ('votes_minimum', 1)), (0, 9999), 'json'))
+        with self.assertRaises(KeyError):
+            parse_query("/banana")
+        with self.assertRaises(ValueError):
+            parse_query("/voted?shows_minimum=10")
+        with self.assertRaises(ValueError):
+            parse_query("/voted?top_n=ten")
+        with self.assertRaises(ValueError):
+            parse_query("/dilmar?shows_minimum=1&votes_minimum=1&format=png")
+
+    def test_coalesces_identical_queries(self):
+        server = Server(self.warm, workers=2)
+        query = parse_query("/popular?top_n=5&shows_minimum=10")
+        async def run():
+            return await asyncio.gather(*[server.query(query) for _ in range(5)])
+        answers = asyncio.run(run())
+        self.assertEqual(server.computed, 1)
+        self.assertTrue(all(answer is answers[0] for answer in answers))
+
+    def test_http(self):
+        server = Server(self.warm, workers=2)
+        async def run():
+            ready = asyncio.Event()
+            task = asyncio.create_task(server.serve(port=0, ready=ready))
+            await ready.wait()
+            port = server.sockets[0].getsockname()[1]
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            responses = []
+            for target in ["/voted?top_n=3&shows_minimum=10", "/voted?top_n=3&shows_minimum=10&format=png",
+                           "/voted?top_n=3&shows_minimum=999999999"]:
+                writer.write(f"GET {target} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+                status = (await reader.readline()).split()[1]
+                headers = {}
+                while (line := await reader.readline()).strip():
+                    key, _, value = line.decode().partition(':')
+                    headers[key.lower()] = value.strip()
+                responses.append((int(status), headers['content-type'], await reader.readexactly(int(headers['content-length']))))
+            writer.close()
+            task.cancel()
+            return responses
+        (status, _, body), (png_status, png_type, png), (error_status, _, _) = asyncio.run(run())
+        self.assertEqual(status, 200)
+        self.assertEqual(len(json.loads(body)['index']), 3)
+        self.assertEqual((png_status, png_type), (200, 'image/png'))
+        self.assertTrue(png.startswith(b'\x89PNG'))
+        self.assertEqual(error_status, 400)
+
+if __name__ == '__main__':
+    unittest.main()
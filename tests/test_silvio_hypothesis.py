@@ -1,7 +1,7 @@
 import unittest
 import pandas as pd
 
-from src.silvio_hypothesis import most_frequent_genre, most_popular_genre, most_voted_genre, plot_bar
+from src.silvio_hypothesis import most_frequent_genre, most_popular_genre, most_voted_genre, plot_bar, genre_windows
 
 class TestSilvio_Hypothesis(unittest.TestCase):
 
@@ -73,5 +73,22 @@ class TestSilvio_Hypothesis(unittest.TestCase):
         with self.assertRaises(TypeError):
             most_voted_genre("kajhsdasd", "leão")
 
+    def test_expected_genre_windows(self):
+        windows = genre_windows('frequent', 10, 1, 2, 1, [2020, 2023])
+        self.assertTrue(set(windows).issubset({(2020, 2021), (2021, 2022), (2022, 2023)}))
+        for table in windows.values():
+            self.assertIsInstance(table, pd.DataFrame)
+            self.assertLessEqual(len(table), 10)
+
+    def test_invalid_arguments_genre_windows(self):
+        with self.assertRaises(TypeError):
+            genre_windows('voted', "kajhsdasd", 10)
+        with self.assertRaises(ValueError):
+            genre_windows('voted', 10, 10, 0)
+        with self.assertRaises(ValueError):
+            genre_windows('banana', 10, 10)
+        with self.assertRaises(ValueError):
+            genre_windows('voted', 10, 10, 2, 1, [2025, 2024])
+
 if __file__ == "__main__":
     unittest.main()
@@ -0,0 +1,95 @@
+import json
+import os
+import tarfile
+import tempfile
+import unittest
+import zipfile
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+
+from sinks import ArchiveSink, FolderSink, PdfSink, Sink, open_sink, save_figure
+from src.dilmar_hypothesis import dilmar_bins, plot_bins
+from src.synthetic import generate
+
+class TestSinks(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.figure = plt.figure()
+        plt.plot([1, 2, 3])
+
+    def tearDown(self):
+        plt.close(self.figure)
+        self.folder.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.folder.name, name)
+
+    def test_open_sink(self):
+        self.assertIsInstance(open_sink(self.folder.name), FolderSink)
+        for name, kind in [("a.pdf", PdfSink), ("a.zip", ArchiveSink), ("a.tar", ArchiveSink), ("a.tgz", ArchiveSink)]:
+            with open_sink(self.path(name)) as sink:
+                self.assertIsInstance(sink, kind)
+        self.assertRaises(ValueError, ArchiveSink, self.path("a.rar"))
+
+    def test_abstract_sink(self):
+        # a sink that can't write fails when it's built, not at its first chart
+        self.assertRaises(TypeError, Sink)
+        self.assertRaises(TypeError, type('Unwritable', (Sink,), {}))
+
+    def test_folder(self):
+        with FolderSink(self.folder.name) as sink:
+            sink.save("one.png")
+            sink.subfolder("sub").save("two.png")
+        self.assertTrue(os.path.exists(self.path("one.png")))
+        self.assertTrue(os.path.exists(self.path(os.path.join("sub", "two.png"))))
+        self.assertEqual([entry['name'] for entry in sink.entries], ["one.png", "sub/two.png"])
+        self.assertRaises(ValueError, sink.save, "three.png")
+        save_figure(self.folder.name, "four.png")
+        self.assertTrue(os.path.exists(self.path("four.png")))
+
+    def test_pdf(self):
+        with PdfSink(self.path("charts.pdf")) as sink:
+            for i in range(3):
+                sink.save(f"graph{i}.png", dpi=50, format='png')
+        self.assertEqual([entry['page'] for entry in sink.entries], [1, 2, 3])
+        with open(self.path("charts.pdf"), 'rb') as file:
+            self.assertEqual(file.read(5), b"%PDF-")
+        self.assertEqual(os.listdir(self.folder.name), ["charts.pdf"])
+
+    def test_zip(self):
+        # a tiny buffer flushes after every chart
+        with ArchiveSink(self.path("charts.zip"), flush_bytes=1) as sink:
+            sink.save("graph0.png")
+            sink.subfolder("copy").save("graph0.png")
+            self.assertEqual(len(sink.entries), 2)
+        with zipfile.ZipFile(self.path("charts.zip")) as archive:
+            self.assertEqual(archive.namelist(), ["graph0.png", "copy/graph0.png", "manifest.json"])
+            manifest = json.loads(archive.read("manifest.json"))
+            self.assertEqual(manifest['charts'][1], {'name': "copy/graph0.png", 'bytes': len(archive.read("copy/graph0.png"))})
+            self.assertEqual(archive.read("graph0.png")[:4], b"\x89PNG")
+
+    def test_tar(self):
+        with ArchiveSink(self.path("charts.tar")) as sink:
+            sink.save("graph0.png")
+            sink.save("graph1.png")
+            self.assertEqual(sink.entries, [])
+        with tarfile.open(self.path("charts.tar")) as archive:
+            manifest = json.load(archive.extractfile("manifest.json"))
+        with open(self.path("charts.tar"), 'rb') as file:
+            for entry in manifest['charts']:
+                file.seek(entry['offset'])
+                self.assertEqual(file.read(4), b"\x89PNG")
+
+    def test_dilmar_into_archive(self):
+        df, bins_intervals = dilmar_bins(5, 5, generate(1000, seed=4))
+        with open_sink(self.path("dilmar.zip")) as sink:
+            plot_bins(df, bins_intervals, sink)
+        plt.close('all')
+        with zipfile.ZipFile(self.path("dilmar.zip")) as archive:
+            self.assertEqual(len(archive.namelist()), len(bins_intervals) + 1)
+
+if __name__ == '__main__':
+    unittest.main()
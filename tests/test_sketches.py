@@ -0,0 +1,76 @@
+import unittest
+import numpy as np
+import pandas as pd
+
+from src.sketches import HyperLogLog, CountMinSketch, NetworkSketch
+from src.filter import filter_second, filter_third, filter_second_stream, filter_third_stream
+from src.synthetic import generate
+
+class TestSketches(unittest.TestCase):
+
+    def test_hyperloglog(self):
+        sketch = HyperLogLog(10)
+        keys = np.repeat(["a", "b", "c"], [20000, 500, 3])
+        items = np.concatenate([np.arange(20000), np.arange(500) * 7, [1, 1, 2]])
+        sketch.update(keys, items)
+        estimate = sketch.estimate()
+        self.assertLess(abs(estimate['a'] / 20000 - 1), 3 * sketch.error)
+        self.assertLess(abs(estimate['b'] / 500 - 1), 3 * sketch.error)
+        self.assertAlmostEqual(estimate['c'], 2, delta=0.1)
+        self.assertRaises(ValueError, HyperLogLog, 20)
+
+    def test_hyperloglog_merge(self):
+        # two workers seeing overlapping shows count them once when merged
+        first, second, whole = HyperLogLog(8), HyperLogLog(8), HyperLogLog(8)
+        first.update(["HBO"] * 600, np.arange(600))
+        second.update(["HBO"] * 600 + ["AMC"] * 10, np.concatenate([np.arange(300, 900), np.arange(10)]))
+        whole.update(["HBO"] * 900 + ["AMC"] * 10, np.concatenate([np.arange(900), np.arange(10)]))
+        merged = first.merge(second)
+        self.assertTrue(merged.estimate().sort_index().equals(whole.estimate().sort_index()))
+        self.assertRaises(ValueError, merged.merge, HyperLogLog(9))
+
+    def test_count_min(self):
+        rng = np.random.default_rng(0)
+        items = rng.zipf(1.5, 20000) % 3000
+        sketch = CountMinSketch(width=512, depth=4)
+        sketch.update(items[:10000])
+        other = CountMinSketch(width=512, depth=4)
+        other.update(items[10000:])
+        sketch.merge(other)
+        values, counts = np.unique(items, return_counts=True)
+        estimate = sketch.query(values)
+        self.assertTrue((estimate >= counts).all())
+        self.assertLessEqual(np.mean(estimate - counts > sketch.error), np.exp(-4))
+        self.assertEqual(sketch.total, 20000)
+        self.assertRaises(ValueError, sketch.merge, CountMinSketch(width=256, depth=4))
+
+    def test_network_sketch(self):
+        rows = pd.DataFrame({'id': [1, 2, 3, 4], 'genres': ["Drama", "Drama", "Comedy", None],
+                             'networks': ["HBO", "HBO", "HBO", "AMC"]})
+        sketch = NetworkSketch(exploded=True)
+        sketch.update(rows)
+        self.assertEqual(list(sketch.frequency(["Drama", "Comedy", "Drama"], ["HBO", "HBO", "AMC"])), [2, 1, 0])
+        self.assertEqual(sketch.bounds().loc["HBO", 'upper'], 3)
+        sketch = NetworkSketch(exploded=False)
+        sketch.update(rows)
+        # AMC has no show with a genre, so it isn't counted
+        self.assertEqual(list(sketch.bounds().index), ["HBO"])
+        self.assertAlmostEqual(sketch.bounds().loc["HBO", 'estimate'], 3, delta=0.1)
+
+    def test_streams_match_filters(self):
+        data = generate(6000, seed=11)
+        chunks = lambda: (data.iloc[first:first + 1000] for first in range(0, len(data), 1000))
+        for shows_minimum in [0, 5, 30, 100]:
+            self.assertTrue(filter_third_stream(chunks(), shows_minimum, 5).equals(filter_third(shows_minimum, 5, data)))
+            self.assertTrue(filter_second_stream(chunks(), shows_minimum, [2000, 2020])
+                            .equals(filter_second(shows_minimum, [2000, 2020], data)))
+
+    def test_streams_arguments(self):
+        self.assertTrue(filter_second_stream(iter([]), 10).empty)
+        self.assertTrue(filter_third_stream(iter([]), 10).empty)
+        self.assertRaises(TypeError, filter_second_stream, iter([]), 1.5)
+        self.assertRaises(TypeError, filter_second_stream, iter([]), 1, [2000])
+        self.assertRaises(ValueError, filter_second_stream, iter([]), 1, [2020, 2000])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,35 @@
+import unittest
+import numpy as np
+import pandas as pd
+
+from src.sweep import sweep_shows_minimum, sweep_votes_minimum
+from src.filter import filter_third
+
+class TestSweep(unittest.TestCase):
+
+    def test_expected_sweep_shows_minimum(self):
+        result = sweep_shows_minimum([0, 10, 100], 'voted')
+        self.assertIsInstance(result, pd.DataFrame)
+        sizes = result.groupby(level='shows_minimum').size()
+        self.assertTrue((np.diff(sizes.to_numpy()) <= 0).all())  # higher thresholds keep fewer networks
+        self.assertTrue((result.loc[100]['shows'] > 100).all())
+
+    def test_sweep_votes_minimum_matches_filter_third(self):
+        result = sweep_votes_minimum([1, 100], 10)
+        for votes_minimum in [1, 100]:
+            expected = filter_third(10, votes_minimum).groupby('networks')['popularity'].mean()
+            self.assertEqual(list(result.loc[votes_minimum].index), list(expected.index))
+            np.testing.assert_allclose(result.loc[votes_minimum]['popularity'], expected)
+
+    def test_invalid_arguments_sweep(self):
+        with self.assertRaises(TypeError):
+            sweep_shows_minimum(10, 'voted')
+        with self.assertRaises(TypeError):
+            sweep_votes_minimum([1, "banana"])
+        with self.assertRaises(ValueError):
+            sweep_shows_minimum([10], 'banana')
+        with self.assertRaises(ValueError):
+            sweep_shows_minimum([10], 'voted', [2025, 2024])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,38 @@
+import os
+import tempfile
+import unittest
+import pandas as pd
+
+from src.synthetic import generate, write_synthetic, COLUMNS
+
+class TestSynthetic(unittest.TestCase):
+
+    def test_generate_schema(self):
+        data = generate(500)
+        self.assertEqual(list(data.columns), COLUMNS)
+        self.assertEqual(len(data), 500)
+        self.assertTrue(data['id'].is_unique)
+        self.assertTrue(data['vote_average'].between(0, 10).all())
+
+    def test_generate_reproducible(self):
+        pd.testing.assert_frame_equal(generate(200, 7), generate(200, 7))
+        self.assertFalse(generate(200, 7).equals(generate(200, 8)))
+
+    def test_write_synthetic_chunks(self):
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, "synthetic.csv")
+            write_synthetic(path, 250, chunk_size=100)
+            data = pd.read_csv(path)
+        self.assertEqual(list(data.columns), COLUMNS)
+        self.assertEqual(list(data['id']), list(range(1, 251)))
+
+    def test_invalid_arguments_generate(self):
+        with self.assertRaises(TypeError):
+            generate("banana")
+        with self.assertRaises(ValueError):
+            generate(-1)
+        with self.assertRaises(ValueError):
+            write_synthetic("banana.csv", 10, chunk_size=0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import json
+import os
+import tempfile
+import threading
+import unittest
+
+import tracing
+from src.filter import filter_third
+from tracing import span, summary
+
+class TestTracing(unittest.TestCase):
+
+    def test_disabled_records_nothing(self):
+        tracing.enable()
+        tracing.disable()
+        with span("nothing") as stage:
+            stage.rows_out = 10
+        self.assertTrue(summary().empty)
+
+    def test_tracing_records_stages(self):
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, "trace.json")
+            with tracing.tracing(path):
+                with span("outer", 5) as stage:
+                    result = filter_third(10, 10)
+                    stage.rows_out = len(result)
+            with open(path) as file:
+                events = json.load(file)['traceEvents']
+
+        table = summary()
+        self.assertIn('filter_third', table.index)
+        self.assertIn('filter_third.network_count', table.index)
+        self.assertEqual(table.loc['outer', 'rows_out'], len(result))
+        self.assertEqual(table.loc['filter_third', 'rows_out'], len(result))
+        # the outer span sees, at least, the peak of the inner ones
+        self.assertGreaterEqual(table.loc['outer', 'peak_bytes'], table.loc['filter_third', 'peak_bytes'])
+        self.assertEqual({event['ph'] for event in events}, {'X'})
+        self.assertIn('outer', [event['name'] for event in events])
+
+    def test_threads_record_no_peak(self):
+        # the peak of tracemalloc is process-wide, so it's dropped while spans of two threads overlap
+        barrier = threading.Barrier(2)
+        # the dataset is read by threads of its own, so it's loaded before tracing
+        filter_third(10, 10)
+        def stage(name):
+            with span(name):
+                barrier.wait()
+                barrier.wait()
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, "trace.json")
+            with tracing.tracing(path):
+                threads = [threading.Thread(target=stage, args=(name,)) for name in ["first", "second"]]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+                with span("alone"):
+                    filter_third(10, 10)
+            with open(path) as file:
+                events = {event['name']: event['args'] for event in json.load(file)['traceEvents']}
+
+        table = summary()
+        self.assertTrue(table.loc[['first', 'second'], 'peak_bytes'].isna().all())
+        self.assertGreater(table.loc['alone', 'peak_bytes'], 0)
+        self.assertNotIn('peak_bytes', events['first'])
+        self.assertIn('peak_bytes', events['alone'])
+
+if __name__ == '__main__':
+    unittest.main()
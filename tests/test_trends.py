@@ -0,0 +1,70 @@
+import itertools
+import unittest
+from unittest import mock
+import numpy as np
+import pandas as pd
+
+import dictionary
+from src.trends import network_trends
+from src.synthetic import generate
+
+class TestTrends(unittest.TestCase):
+
+    def setUp(self):
+        self.data = pd.DataFrame({
+            'id': [1, 2, 3, 4, 5],
+            'networks': ['HBO', 'HBO, AMC', 'AMC', 'HBO', np.nan],
+            'first_air_date': ['2020-01-01', '2020-05-01', '2022-01-01', '2023-01-01', '2021-01-01'],
+            'popularity': [10.0, 20.0, 30.0, 40.0, 50.0],
+            'vote_count': [1, 3, 0, 2, 5],
+            'vote_average': [6.0, 8.0, np.nan, 9.0, 7.0],
+        })
+
+    def test_series(self):
+        trends = network_trends(data=self.data)
+        self.assertEqual(list(trends.networks), ['AMC', 'HBO'])
+        self.assertEqual(list(trends.years), [2020, 2021, 2022, 2023])
+        self.assertEqual(trends.series('count').loc['HBO'].tolist(), [2, 0, 0, 1])
+        self.assertEqual(trends.series('popularity').loc['AMC'].tolist()[::2], [20.0, 30.0])
+        # weighted by the votes; years without votes have no average
+        self.assertEqual(trends.series('vote_average').loc['HBO', 2020], 7.5)
+        self.assertTrue(np.isnan(trends.series('vote_average').loc['AMC', 2022]))
+        self.assertEqual(list(network_trends(2, self.data).networks), ['HBO'])
+        self.assertRaises(ValueError, trends.series, 'rating')
+        self.assertRaises(TypeError, network_trends, 1.5, self.data)
+
+    def test_strings_added_meanwhile(self):
+        # another thread adding strings that sort first between two reads of the ranks would shift them
+        ranks, added = dictionary.DICTIONARY.ranks, itertools.count()
+        def ranks_then_add():
+            current = ranks()
+            dictionary.DICTIONARY.encode([f" {next(added)}"])
+            return current
+        with mock.patch.object(dictionary.DICTIONARY, 'ranks', ranks_then_add):
+            trends = network_trends(data=self.data)
+        self.assertEqual(list(trends.networks), ['AMC', 'HBO'])
+        self.assertEqual(trends.series('count').loc['HBO'].tolist(), [2, 0, 0, 1])
+
+    def test_rolling_and_delta(self):
+        trends = network_trends(data=self.data)
+        self.assertEqual(trends.rolling('count', 2).loc['HBO'].tolist(), [2.0, 1.0, 0.0, 0.5])
+        # the popularity of all the shows of the window, not the mean of the yearly means
+        self.assertEqual(trends.rolling('popularity', 4).loc['HBO', 2023], 70 / 3)
+        self.assertEqual(trends.delta('count').loc['HBO'].tolist()[1:], [-2, 0, 1])
+        self.assertTrue(trends.delta('count').iloc[:, 0].isna().all())
+        self.assertRaises(ValueError, trends.rolling, 'count', 0)
+
+    def test_matches_groupby(self):
+        data = generate(3000, seed=2)
+        trends = network_trends(data=data)
+        rows = data.dropna(subset=['networks', 'first_air_date', 'popularity'])
+        rows = rows.assign(year=rows['first_air_date'].str[:4].astype(int),
+                           networks=rows['networks'].str.split(', ')).explode('networks')
+        expected = rows.groupby(['networks', 'year'])['popularity'].mean().unstack()
+        result = trends.series('popularity').loc[expected.index, expected.columns]
+        self.assertTrue(np.allclose(result, expected, equal_nan=True))
+        expected = rows.groupby(['networks', 'year']).size().unstack(fill_value=0)
+        self.assertEqual(trends.series('count').to_numpy().sum(), expected.to_numpy().sum())
+
+if __name__ == '__main__':
+    unittest.main()
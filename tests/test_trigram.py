@@ -0,0 +1,45 @@
+import unittest
+import numpy as np
+import pandas as pd
+
+from src.trigram import TrigramIndex, name_index
+from src.synthetic import generate
+
+class TestTrigram(unittest.TestCase):
+
+    def setUp(self):
+        self.index = TrigramIndex(["Stranger Things", "Squid Game", "Sweet Home season 2", None,
+                                   "Sweet Home season 3", "Star Trek: Picard"], ids=[10, 20, 30, 40, 50, 60])
+
+    def test_contains(self):
+        self.assertEqual(list(self.index.contains("season 2")), [30])
+        self.assertEqual(list(self.index.contains("SWEET home")), [30, 50])
+        self.assertEqual(list(self.index.contains("s")), [10, 20, 30, 50, 60])
+        self.assertEqual(list(self.index.contains("zzz")), [])
+        # the trigrams of the pattern are in the padded name, but the pattern isn't in the name
+        self.assertEqual(list(self.index.contains("me season 3 ")), [])
+
+    def test_contains_matches_scan(self):
+        data = generate(500, seed=5)
+        index = TrigramIndex(data['name'], data['id'])
+        for pattern in ["00001", "show 0000", "ow 00003", "7", "x"]:
+            expected = data['id'][data['name'].str.lower().str.contains(pattern, regex=False)]
+            self.assertEqual(list(index.contains(pattern)), list(expected))
+
+    def test_fuzzy(self):
+        self.assertEqual(list(self.index.fuzzy("stranger thngs")), [10])
+        self.assertEqual(list(self.index.fuzzy("sweet home season", threshold=0.5)), [30, 50])
+        self.assertEqual(list(self.index.fuzzy("sweet home season 3", threshold=0.5, limit=1)), [50])
+        similarity = self.index.similarity("Squid Game")
+        self.assertEqual(similarity[1], 1)
+        self.assertEqual(similarity[3], 0)
+        self.assertTrue(np.all((similarity >= 0) & (similarity <= 1)))
+
+    def test_name_index(self):
+        data = pd.DataFrame({'id': [3, 1, 2], 'name': ["Lost", "Lost Girl", "Dark"]})
+        index = name_index(data)
+        self.assertIs(name_index(data), index)
+        self.assertEqual(list(index.contains("lost")), [3, 1])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,29 @@
+import unittest
+
+import pandas as pd
+
+from src.warm import Warm
+from src.silvio_hypothesis import voted_genre_table, frequent_genre_table
+from src.synthetic import generate
+
+class TestWarm(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.warm = Warm()
+
+    def test_genre_table_matches_silvio(self):
+        pd.testing.assert_frame_equal(self.warm.genre_table('voted', 10, 10, (2020, 2023)),
+                                      voted_genre_table(10, 10, [2020, 2023]), check_names=False)
+        pd.testing.assert_frame_equal(self.warm.genre_table('frequent', 5, 10), frequent_genre_table(5, 10)[['count']],
+                                      check_names=False)
+
+    def test_injected_dataset(self):
+        data = generate(3000, seed=1, networks=50)
+        warm = Warm(data=data)
+        pd.testing.assert_frame_equal(warm.genre_table('voted', 5, 10), voted_genre_table(5, 10, data=data),
+                                      check_names=False)
+        self.assertFalse(warm.genre_table('voted', 5, 10).equals(self.warm.genre_table('voted', 5, 10)))
+
+if __name__ == '__main__':
+    unittest.main()